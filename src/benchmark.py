@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Reproducible performance benchmark on synthetic FPL-shaped data.
+
+For each scale (players x gameweeks x seasons) a synthetic data folder is
+generated once (cached under data_processed/bench_data/, keyed by the generator
+version) and these stages are timed in-process against it:
+
+  ingest    ingest.load_all_player_gameweek_stats
+  features  features_with_fixture.add_fixture_features + build_training_table_with_fixture
+  train     train_with_fixture.run_feature_set (Ridge / RF / HGB on 'extended_basic')
+  predict   predict_next_gw: history features + RF fit + next-GW rows + predict
+
+Results are appended to data_processed/benchmarks/results.csv tagged with the
+current git commit, so runs can be compared between commits:
+
+  python src/benchmark.py                       # default scales
+  python src/benchmark.py --scale 300x10x1      # custom players x gameweeks x seasons
+  python src/benchmark.py --compare             # table of the last two commits
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import os
+import subprocess
+import time
+
+# the pipeline functions are profiled; the benchmark does its own timing
+os.environ.setdefault("FPL_PROFILE", "0")
+
+import pandas as pd
+
+import ingest
+import features_with_fixture as fwf
+import train_with_fixture as twf
+import predict_next_gw as pnw
+import player_identity
+from synthetic_data import GENERATOR_VERSION, generate_dataset
+
+THIS_FILE = Path(__file__).resolve()
+PROJECT_ROOT = THIS_FILE.parent.parent
+BENCH_DATA_DIR = PROJECT_ROOT / "data_processed" / "bench_data"
+RESULTS_FILE = PROJECT_ROOT / "data_processed" / "benchmarks" / "results.csv"
+
+DEFAULT_SCALES = ["300x10x1", "600x38x1", "600x38x3"]
+SEED = 7
+
+
+def parse_scale(s: str) -> tuple[int, int, int]:
+    try:
+        players, gws, seasons = (int(v) for v in s.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"scale must look like PLAYERSxGWSxSEASONS, got {s!r}")
+    return players, gws, seasons
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def dataset_for(players: int, gws: int, seasons: int) -> Path:
+    root = BENCH_DATA_DIR / f"p{players}_gw{gws}_s{seasons}_seed{SEED}_v{GENERATOR_VERSION}"
+    marker = root / ".complete"
+    if not marker.is_file():
+        t0 = time.perf_counter()
+        generate_dataset(root, n_players=players, n_gameweeks=gws, n_seasons=seasons, seed=SEED)
+        marker.write_text("ok")
+        print(f"  generated {root.relative_to(PROJECT_ROOT)} in {time.perf_counter() - t0:.1f}s")
+    return root
+
+
+def point_modules_at(data_root: Path):
+    """Every script hard-codes its data path as a module constant; redirect them."""
+    ingest.DATA_ROOT = data_root
+    fwf.DATA_REPO_ROOT = data_root
+    pnw.DATA_REPO_ROOT = data_root
+    player_identity.DATA_REPO_ROOT = data_root
+
+
+def _timed(results: list, stage: str, fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    elapsed = time.perf_counter() - t0
+    rows = len(out[0]) if isinstance(out, tuple) else len(out)
+    results.append({"stage": stage, "seconds": round(elapsed, 4), "rows": rows})
+    print(f"    {stage:<10} {elapsed:8.2f}s  rows={rows}")
+    return out
+
+
+def _features(df_raw):
+    return fwf.build_training_table_with_fixture(fwf.add_fixture_features(df_raw))
+
+
+def _train(df_table):
+    df = twf.add_engineered_columns(twf.clean_snapshot_columns(df_table.copy()))
+    season = sorted(df["season"].astype(str).unique())[-1]
+    df_season = df[df["season"].astype(str) == season]
+    cutoff = int(df_season["gameweek"].max()) - 1
+    df_train, df_test = twf.make_train_test_split(df_season, cutoff)
+    scores = twf.run_feature_set(df_train, df_test, twf.FEATURES_EXTENDED_BASIC, "extended_basic")
+    return scores[0]["df_train_used"]
+
+
+def _predict(df_raw):
+    season = sorted(df_raw["season"].unique())[-1]
+    last_gw = int(df_raw.loc[df_raw["season"] == season, "gameweek"].max())
+    hist = pnw.compute_rolling_features_for_history(pnw.attach_fixture_context(df_raw.copy()))
+    train_df, feature_cols = pnw.build_train_frame_for_model(hist)
+    train_df = train_df[train_df["season"] == season]
+    model = pnw.RandomForestRegressor(n_estimators=200, random_state=42, n_jobs=-1)
+    model.fit(train_df[feature_cols], train_df["event_points"])
+    df_next = pnw.build_next_gw_feature_rows(df_raw, season, last_gw, last_gw + 1)
+    df_next["predicted_points"] = model.predict(df_next[feature_cols])
+    return df_next
+
+
+def run_scale(scale: str) -> list[dict]:
+    players, gws, seasons = parse_scale(scale)
+    print(f"\n== scale {scale} (players x gameweeks x seasons) ==")
+    root = dataset_for(players, gws, seasons)
+    point_modules_at(root)
+
+    results = []
+    df_raw = _timed(results, "ingest", ingest.load_all_player_gameweek_stats)
+    df_raw["gameweek"] = df_raw["gameweek"].astype(int)
+    df_table = _timed(results, "features", _features, df_raw)
+    _timed(results, "train", _train, df_table)
+    _timed(results, "predict", _predict, df_raw)
+
+    stamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+    for r in results:
+        r.update({
+            "timestamp": stamp, "commit": git_commit(), "scale": scale,
+            "players": players, "gameweeks": gws, "seasons": seasons,
+        })
+    return results
+
+
+def save_results(results: list[dict]):
+    RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    cols = ["timestamp", "commit", "scale", "players", "gameweeks", "seasons", "stage", "seconds", "rows"]
+    df = pd.DataFrame(results)[cols]
+    df.to_csv(RESULTS_FILE, mode="a", header=not RESULTS_FILE.is_file(), index=False)
+    print(f"\nAppended {len(df)} rows to {RESULTS_FILE.relative_to(PROJECT_ROOT)}")
+
+
+def compare():
+    if not RESULTS_FILE.is_file():
+        print(f"No results yet at {RESULTS_FILE}")
+        return
+    df = pd.read_csv(RESULTS_FILE)
+    # latest run per (commit, scale, stage), commits ordered by first appearance
+    commits = list(dict.fromkeys(df["commit"]))[-2:]
+    latest = df[df["commit"].isin(commits)].groupby(["scale", "stage", "commit"])["seconds"].last()
+    table = latest.unstack("commit").reindex(columns=commits)
+    if len(commits) == 2:
+        table["ratio"] = table[commits[1]] / table[commits[0]]
+    print(table.round(3).to_string())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on synthetic data")
+    parser.add_argument("--scale", action="append", type=str,
+                        help=f"PLAYERSxGWSxSEASONS, repeatable (default: {' '.join(DEFAULT_SCALES)})")
+    parser.add_argument("--compare", action="store_true", help="compare the last two commits and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare()
+        return 0
+
+    scales = args.scale or DEFAULT_SCALES
+    for s in scales:
+        parse_scale(s)
+
+    results = []
+    for s in scales:
+        results.extend(run_scale(s))
+    save_results(results)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
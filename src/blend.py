@@ -0,0 +1,127 @@
+# src/blend.py
+"""
+Per-position blend of the Ridge / RandomForest / HistGBDT point models.
+
+train_with_fixture.fit_blend() refits the three models on expanding time folds
+over the last few GWs <= cutoff_gw and passes their out-of-fold predictions here.
+For each position the convex weights (w >= 0, sum = 1) minimizing MAE are picked
+from a grid over the simplex, scored in one matrix product. Positions with too
+few rows use the weights learned on all rows ("_all"). blend_scores() then rates
+the weights on the test split (> cutoff_gw), which they never saw.
+
+Weights are stored in data_processed/models/blend_weights.json together with
+the feature columns and model params they were learned with; predict_next_gw
+(MODEL_MODE = "blend") refits exactly those models on those columns.
+"""
+
+from __future__ import annotations
+from itertools import product
+from pathlib import Path
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+THIS_FILE = Path(__file__).resolve()
+PROJECT_ROOT = THIS_FILE.parent.parent
+BLEND_WEIGHTS_FILE = PROJECT_ROOT / "data_processed" / "models" / "blend_weights.json"
+
+MODEL_NAMES = ["Ridge", "RandomForest", "HistGBDT"]
+GRID_STEP = 0.05
+MIN_POSITION_ROWS = 100
+
+
+def _simplex_grid(n_models: int, step: float) -> np.ndarray:
+    """(n_models, n_combos) weight vectors on the simplex at the given resolution."""
+    k = int(round(1 / step))
+    combos = [c for c in product(range(k + 1), repeat=n_models - 1) if sum(c) <= k]
+    return np.array([list(c) + [k - sum(c)] for c in combos], dtype=float).T / k
+
+
+def _best_weights(P: np.ndarray, y: np.ndarray, grid: np.ndarray):
+    mae = np.abs(P @ grid - y[:, None]).mean(axis=0)
+    i = int(np.argmin(mae))
+    return grid[:, i], float(mae[i])
+
+
+def learn_blend_weights(preds: pd.DataFrame, y, positions) -> tuple[dict, pd.DataFrame]:
+    """
+    preds: one column per model (MODEL_NAMES), aligned with y and positions.
+    Returns ({position: {model: weight}}, summary table of per-position MAEs).
+    """
+    grid = _simplex_grid(len(MODEL_NAMES), GRID_STEP)
+    P = preds[MODEL_NAMES].to_numpy(dtype=float)
+    y = np.asarray(y, dtype=float)
+    positions = pd.Series(positions).astype(str).to_numpy()
+
+    groups = {"_all": np.ones(len(y), dtype=bool)}
+    for pos in sorted(set(positions)):
+        mask = positions == pos
+        if mask.sum() >= MIN_POSITION_ROWS:
+            groups[pos] = mask
+
+    weights, summary = {}, []
+    for key, mask in groups.items():
+        w, mae = _best_weights(P[mask], y[mask], grid)
+        weights[key] = dict(zip(MODEL_NAMES, np.round(w, 4).tolist()))
+        summary.append({
+            "position": key,
+            "rows": int(mask.sum()),
+            **{f"mae_{m}": float(np.abs(P[mask, j] - y[mask]).mean()) for j, m in enumerate(MODEL_NAMES)},
+            "mae_blend": mae,
+            **{f"w_{m}": weights[key][m] for m in MODEL_NAMES},
+        })
+    return weights, pd.DataFrame(summary)
+
+
+def blend_scores(preds: pd.DataFrame, y, positions, weights: dict) -> pd.DataFrame:
+    """MAE of each model and of the blend with the given weights, overall and per position."""
+    y = np.asarray(y, dtype=float)
+    positions = pd.Series(positions).astype(str).to_numpy()
+    blended = blend_predict(preds, positions, weights)
+    P = preds[MODEL_NAMES].to_numpy(dtype=float)
+    groups = {"_all": np.ones(len(y), dtype=bool)}
+    groups.update({pos: positions == pos for pos in sorted(set(positions))})
+    return pd.DataFrame([
+        {
+            "position": key,
+            "rows": int(mask.sum()),
+            **{f"mae_{m}": float(np.abs(P[mask, j] - y[mask]).mean()) for j, m in enumerate(MODEL_NAMES)},
+            "mae_blend": float(np.abs(blended[mask] - y[mask]).mean()),
+        }
+        for key, mask in groups.items() if mask.any()
+    ])
+
+
+def blend_predict(preds: pd.DataFrame, positions, weights: dict) -> np.ndarray:
+    """Apply per-position weights; unknown positions use "_all"."""
+    positions = pd.Series(positions).astype(str).to_numpy()
+    W = np.array([
+        [weights.get(pos, weights["_all"])[m] for m in MODEL_NAMES]
+        for pos in positions
+    ]).reshape(len(positions), len(MODEL_NAMES))
+    return (preds[MODEL_NAMES].to_numpy(dtype=float) * W).sum(axis=1)
+
+
+def save_blend_weights(weights: dict, feature_set: str, feature_cols, eval_gws, model_params: dict):
+    BLEND_WEIGHTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    BLEND_WEIGHTS_FILE.write_text(json.dumps({
+        "weights": weights,
+        "feature_set": feature_set,
+        "feature_cols": list(feature_cols),
+        "model_params": model_params,
+        "learned_on_gws": [int(g) for g in eval_gws],
+        "learned_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }, indent=2))
+
+
+def load_blend_config() -> dict:
+    """The whole blend_weights.json (weights, feature_set, feature_cols, model_params), or {}."""
+    if not BLEND_WEIGHTS_FILE.is_file():
+        return {}
+    return json.loads(BLEND_WEIGHTS_FILE.read_text())
+
+
+def load_blend_weights() -> dict:
+    return load_blend_config().get("weights", {})
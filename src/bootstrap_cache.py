@@ -0,0 +1,236 @@
+# src/bootstrap_cache.py
+"""
+Cache of the FPL bootstrap-static payload, anchored at the project root.
+
+  data_processed/fpl_api_cache/
+    bootstrap-static.json.gz   the raw payload, compact JSON, gzipped (~10x smaller
+                               than the old indent=2 file)
+    players.pkl                player index: DataFrame indexed by FPL element id
+    teams.pkl                  team index: DataFrame indexed by FPL team id
+  data_processed/availability/
+    {season}_gw{N}_availability.csv
+                               status / chance of playing / news before GW N's
+                               deadline, kept for backtesting
+
+The indexes are small pickled DataFrames built once when the payload is saved
+(or on first use if they're missing / older than the payload), so scripts that
+only need names get them without parsing megabytes of JSON:
+
+  from bootstrap_cache import player_index, team_index
+  player_index().loc[pid, "web_name"]
+"""
+
+from __future__ import annotations
+from functools import lru_cache
+from pathlib import Path
+import gzip
+import json
+import pickle
+
+import pandas as pd
+
+THIS_FILE = Path(__file__).resolve()
+PROJECT_ROOT = THIS_FILE.parent.parent
+CACHE_DIR = PROJECT_ROOT / "data_processed" / "fpl_api_cache"
+RAW_FILE = CACHE_DIR / "bootstrap-static.json.gz"
+LEGACY_RAW_FILE = CACHE_DIR / "bootstrap-static.json"   # pretty-printed, pre-index versions
+PLAYERS_FILE = CACHE_DIR / "players.pkl"
+TEAMS_FILE = CACHE_DIR / "teams.pkl"
+AVAILABILITY_DIR = PROJECT_ROOT / "data_processed" / "availability"
+
+PLAYER_COLS = [
+    "web_name", "first_name", "second_name", "team", "team_short", "team_code",
+    "position", "position_short", "element_type", "now_cost", "price",
+    "status", "chance_of_playing_next_round", "news", "selected_by_percent", "code",
+]
+# play probability when chance_of_playing_next_round is blank, by FPL status code
+STATUS_PLAY_PROB = {"a": 1.0, "d": 0.5, "i": 0.0, "s": 0.0, "u": 0.0, "n": 0.0}
+TEAM_COLS = [
+    "code", "name", "short_name", "strength",
+    "strength_attack_home", "strength_attack_away",
+    "strength_defence_home", "strength_defence_away",
+]
+
+
+############################
+# Build
+############################
+
+def build_team_index(data: dict) -> pd.DataFrame:
+    teams = pd.DataFrame(data["teams"])
+    return teams.set_index("id")[[c for c in TEAM_COLS if c in teams.columns]]
+
+
+def build_player_index(data: dict, teams: pd.DataFrame | None = None) -> pd.DataFrame:
+    """id -> name / team / position / price / availability."""
+    if teams is None:
+        teams = build_team_index(data)
+    el = pd.DataFrame(data["elements"]).set_index("id")
+    types = pd.DataFrame(data["element_types"]).set_index("id")
+
+    out = el.reindex(columns=[
+        "web_name", "first_name", "second_name", "team", "team_code", "element_type",
+        "now_cost", "status", "chance_of_playing_next_round", "news",
+        "selected_by_percent", "code",
+    ])
+    out["team_short"] = out["team"].map(teams["short_name"])
+    out["position"] = out["element_type"].map(types["singular_name"])
+    out["position_short"] = out["element_type"].map(types["singular_name_short"])
+    out["price"] = out["now_cost"] / 10.0
+    out["selected_by_percent"] = pd.to_numeric(out["selected_by_percent"], errors="coerce")
+    out["chance_of_playing_next_round"] = pd.to_numeric(
+        out["chance_of_playing_next_round"], errors="coerce"
+    )
+    for col in ["team", "team_code", "element_type", "now_cost", "code"]:
+        out[col] = pd.to_numeric(out[col], errors="coerce").astype("Int32")
+    for col in ["team_short", "position", "position_short", "status"]:
+        out[col] = out[col].astype("category")
+    out["news"] = out["news"].fillna("")
+    return out[PLAYER_COLS]
+
+
+def _write_pickle(obj, path: Path):
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as fh:
+        pickle.dump(obj, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp.replace(path)
+
+
+def build_indexes(data: dict):
+    teams = build_team_index(data)
+    players = build_player_index(data, teams)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    _write_pickle(teams, TEAMS_FILE)
+    _write_pickle(players, PLAYERS_FILE)
+    player_index.cache_clear()
+    team_index.cache_clear()
+    return players, teams
+
+
+def save_bootstrap(data: dict) -> Path:
+    """Store the raw payload (compact, gzipped) and rebuild the indexes."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = RAW_FILE.with_name(RAW_FILE.name + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as fh:
+        json.dump(data, fh, ensure_ascii=False, separators=(",", ":"))
+    tmp.replace(RAW_FILE)
+    load_raw.cache_clear()
+    build_indexes(data)
+    return RAW_FILE
+
+
+############################
+# Load (lazy)
+############################
+
+@lru_cache(maxsize=1)
+def load_raw() -> dict:
+    """The full payload; only for callers that need fields outside the indexes."""
+    if RAW_FILE.is_file():
+        with gzip.open(RAW_FILE, "rt", encoding="utf-8") as fh:
+            return json.load(fh)
+    if LEGACY_RAW_FILE.is_file():
+        return json.loads(LEGACY_RAW_FILE.read_text())
+    raise FileNotFoundError(
+        f"No bootstrap cache at {RAW_FILE}; run src/fpl_api_bootstrap.py first."
+    )
+
+
+def _raw_mtime() -> float:
+    for path in (RAW_FILE, LEGACY_RAW_FILE):
+        if path.is_file():
+            return path.stat().st_mtime
+    return 0.0
+
+
+def _load_index(path: Path, which: int) -> pd.DataFrame:
+    if path.is_file() and path.stat().st_mtime >= _raw_mtime():
+        try:
+            with path.open("rb") as fh:
+                return pickle.load(fh)
+        except Exception:  # written by another pandas version: rebuild below
+            pass
+    return build_indexes(load_raw())[which]
+
+
+@lru_cache(maxsize=1)
+def player_index() -> pd.DataFrame:
+    return _load_index(PLAYERS_FILE, 0)
+
+
+@lru_cache(maxsize=1)
+def team_index() -> pd.DataFrame:
+    return _load_index(TEAMS_FILE, 1)
+
+
+############################
+# Availability snapshots
+############################
+
+def next_event_id(data: dict | None = None) -> int | None:
+    """The GW the payload's news applies to (the 'is_next' event)."""
+    events = (data if data is not None else load_raw()).get("events", [])
+    return next((e["id"] for e in events if e.get("is_next")), None)
+
+
+def payload_season(data: dict | None = None) -> str | None:
+    """Season of the payload, e.g. "2025-2026", from its first event's deadline."""
+    events = (data if data is not None else load_raw()).get("events", [])
+    deadline = events[0].get("deadline_time") if events else None
+    if not deadline:
+        return None
+    year = int(str(deadline)[:4])
+    return f"{year}-{year + 1}"
+
+
+def availability_file(season: str, gw: int) -> Path:
+    return AVAILABILITY_DIR / f"{season}_gw{gw}_availability.csv"
+
+
+def play_probability(status, chance) -> pd.Series:
+    """chance_of_playing_next_round / 100, else a default per status code."""
+    default = pd.Series(status, dtype="object").astype(str).map(STATUS_PLAY_PROB).fillna(1.0)
+    prob = pd.to_numeric(pd.Series(chance), errors="coerce").to_numpy() / 100
+    return pd.Series(prob, index=default.index).fillna(default).clip(0, 1)
+
+
+def save_availability_snapshot() -> Path | None:
+    """Write {season}_gw{next}_availability.csv from the cached payload (overwrites: latest news wins)."""
+    data = load_raw()
+    gw, season = next_event_id(data), payload_season(data)
+    if gw is None or season is None:
+        return None
+    snap = player_index()[["code", "web_name", "status", "chance_of_playing_next_round", "news"]]
+    snap = snap.rename_axis("element").reset_index()
+    snap.insert(0, "season", season)
+    snap["play_prob"] = play_probability(snap["status"], snap["chance_of_playing_next_round"]).to_numpy()
+    AVAILABILITY_DIR.mkdir(parents=True, exist_ok=True)
+    path = availability_file(season, gw)
+    snap.to_csv(path, index=False)
+    return path
+
+
+def availability_snapshot(season: str, gw: int) -> pd.DataFrame | None:
+    """
+    Stored snapshot for (season, gw), else one built from the cache if the cache
+    is for that season and GW. None otherwise: today's news would be wrong for a
+    past GW, and last season's GW N says nothing about this season's.
+    """
+    path = availability_file(season, gw)
+    if not path.is_file():
+        try:
+            data = load_raw()
+        except FileNotFoundError:
+            print("Availability: no bootstrap cache (run src/fpl_api_bootstrap.py); skipped.")
+            return None
+        cache_season, cache_gw = payload_season(data), next_event_id(data)
+        if (cache_season, cache_gw) != (str(season), gw):
+            print(f"Availability: bootstrap cache is for {cache_season} GW{cache_gw}, "
+                  f"not {season} GW{gw}; skipped.")
+            return None
+        path = save_availability_snapshot()
+    snap = pd.read_csv(path, dtype={"season": str})
+    if "season" not in snap.columns or (snap["season"] != str(season)).any():
+        print(f"Availability: {path.name} isn't a {season} snapshot; skipped.")
+        return None
+    return snap
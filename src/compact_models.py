@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Size-vs-MAE sweep for the tree models in train_with_fixture.run_feature_set().
+
+A full-depth 300-tree forest pickles to hundreds of MB, too much to keep one
+model per GW for backtesting. For each setting below (depth / leaf-count
+limits), this script fits the model on a validation split taken from before
+cutoff_gw (the last --val-gws GWs <= cutoff_gw, trained on everything earlier),
+so train_with_fixture's test split stays unseen, and reports:
+
+  val_mae        sklearn predict on the validation GWs
+  flat_mae       the compacted flat model (float32 thresholds/values, fast_forest.py)
+  pickle_mb      plain pickle, what joblib.dump(model) writes by default
+  joblib_z_mb    joblib.dump(..., compress=3)
+  flat_mb        compacted flat model, np.savez_compressed
+  *_load_s       time to load each file back
+
+Output (data_processed/compaction/):
+  sweep.csv            one row per (model, setting)
+  chosen_settings.json per model, the smallest flat model whose val MAE is
+                       within --tol of the unrestricted setting; train_with_fixture
+                       applies it when COMPACT_MODELS = True
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import json
+import pickle
+import tempfile
+import time
+
+import joblib
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+from sklearn.metrics import mean_absolute_error
+
+import train_with_fixture as twf
+from fast_forest import FlatForest, compile_model
+from schema import FEATURE_SCHEMA, read_table
+
+THIS_FILE = Path(__file__).resolve()
+PROJECT_ROOT = THIS_FILE.parent.parent
+OUT_DIR = PROJECT_ROOT / "data_processed" / "compaction"
+CHOSEN_FILE = OUT_DIR / "chosen_settings.json"
+
+# first entry of each list = the unrestricted reference
+SWEEP = {
+    "rf": [
+        {},
+        {"max_depth": 20},
+        {"max_depth": 14},
+        {"max_depth": 10},
+        {"max_leaf_nodes": 4096},
+        {"max_leaf_nodes": 1024},
+        {"max_leaf_nodes": 256},
+        {"max_depth": 14, "min_samples_leaf": 5},
+        {"max_leaf_nodes": 1024, "min_samples_leaf": 5},
+    ],
+    "hgb": [
+        {},
+        {"max_leaf_nodes": 15},
+        {"max_iter": 250},
+        {"max_iter": 250, "max_leaf_nodes": 15},
+    ],
+}
+
+
+def make_model(name: str, setting: dict, feature_set: str):
+    tuned = twf.load_tuned_params(feature_set)
+    if name == "rf":
+        params = {"n_estimators": 300, **tuned.get("rf", {}), **setting}
+        return RandomForestRegressor(**params, random_state=42, n_jobs=-1)
+    params = {"learning_rate": 0.05, "max_depth": 6, "max_iter": 500, **tuned.get("hgb", {}), **setting}
+    return HistGradientBoostingRegressor(**params, random_state=42)
+
+
+def load_split(feature_cols, n_val_gws: int, multi_season: bool):
+    """Val = the last n_val_gws GWs <= cutoff_gw of the current season, train = everything before."""
+    df = read_table(twf.DATA_FILE, FEATURE_SCHEMA)
+    df = twf.add_engineered_columns(twf.clean_snapshot_columns(df))
+    season_current = sorted(df["season"].astype(str).unique())[-1]
+    if not multi_season:
+        df = df[df["season"].astype(str) == season_current]
+    val_gws = twf.validation_gws(df, season_current, n_val_gws)
+    if not val_gws:
+        raise RuntimeError(f"No current-season GWs <= cutoff_gw={twf.cutoff_gw} to validate on.")
+    is_current = df["season"].astype(str) == season_current
+    df_train = df[~is_current | (df["gameweek"] < min(val_gws))]
+    df_val = df[is_current & df["gameweek"].isin(val_gws)]
+    X_train, y_train, _ = twf.build_xy(df_train, feature_cols)
+    X_val, y_val, _ = twf.build_xy(df_val, feature_cols)
+    return X_train, y_train, X_val, y_val, val_gws
+
+
+def _timed_load(fn, path):
+    t0 = time.perf_counter()
+    fn(path)
+    return time.perf_counter() - t0
+
+
+def measure(model, X_val, y_val, tmp: Path) -> dict:
+    flat = compile_model(model).compact()
+    paths = {k: tmp / f"m.{k}" for k in ("pkl", "joblib", "npz")}
+    paths["pkl"].write_bytes(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    joblib.dump(model, paths["joblib"], compress=3)
+    flat.save(paths["npz"])
+    mb = lambda p: p.stat().st_size / 2**20
+    return {
+        "n_trees": flat.n_trees,
+        "n_nodes": len(flat.left),
+        "max_depth": int(flat.depths.max()),
+        "val_mae": mean_absolute_error(y_val, model.predict(X_val)),
+        "flat_mae": mean_absolute_error(y_val, flat.predict(X_val)),
+        "pickle_mb": mb(paths["pkl"]),
+        "joblib_z_mb": mb(paths["joblib"]),
+        "flat_mb": mb(paths["npz"]),
+        "pickle_load_s": _timed_load(lambda p: pickle.loads(p.read_bytes()), paths["pkl"]),
+        "joblib_z_load_s": _timed_load(joblib.load, paths["joblib"]),
+        "flat_load_s": _timed_load(FlatForest.load, paths["npz"]),
+    }
+
+
+def choose(sweep: pd.DataFrame, tol: float) -> dict:
+    """Per model: smallest flat file whose val MAE is within tol (relative) of the reference."""
+    chosen = {}
+    for name, grp in sweep.groupby("model", sort=False):
+        ref_mae = grp.iloc[0]["val_mae"]
+        ok = grp[grp["val_mae"] <= ref_mae * (1 + tol)]
+        best = ok.sort_values("flat_mb").iloc[0]
+        chosen[name] = {
+            "params": json.loads(best["setting"]),
+            "val_mae": float(best["val_mae"]),
+            "reference_mae": float(ref_mae),
+            "flat_mb": float(best["flat_mb"]),
+            "reference_pickle_mb": float(grp.iloc[0]["pickle_mb"]),
+        }
+    return chosen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Model size vs MAE sweep")
+    parser.add_argument("--model", choices=["rf", "hgb", "both"], default="both")
+    parser.add_argument("--feature-set", default="extended_basic", choices=twf.FEATURE_SET_NAMES)
+    parser.add_argument("--tol", type=float, default=0.01, help="allowed relative MAE increase")
+    parser.add_argument("--val-gws", type=int, default=3, help="GWs up to cutoff_gw used for validation")
+    parser.add_argument("--all-seasons", action="store_true")
+    args = parser.parse_args(argv)
+
+    feature_cols = twf.feature_set_columns(args.feature_set)
+    X_train, y_train, X_val, y_val, val_gws = load_split(feature_cols, args.val_gws, args.all_seasons)
+    print(f"Train rows {len(X_train)}, val rows {len(X_val)} (GWs {val_gws}, cutoff GW {twf.cutoff_gw})")
+
+    models = ["rf", "hgb"] if args.model == "both" else [args.model]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in models:
+            for setting in SWEEP[name]:
+                t0 = time.perf_counter()
+                model = make_model(name, setting, args.feature_set).fit(X_train, y_train)
+                fit_s = time.perf_counter() - t0
+                rec = {"model": name, "setting": json.dumps(setting), "fit_s": fit_s,
+                       **measure(model, X_val, y_val, Path(tmp))}
+                rows.append(rec)
+                print(f"  {name:<3} {rec['setting']:<45} MAE {rec['val_mae']:.4f} "
+                      f"pickle {rec['pickle_mb']:7.1f} MB  flat {rec['flat_mb']:6.2f} MB")
+
+    sweep = pd.DataFrame(rows)
+    chosen = choose(sweep, args.tol)
+
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    sweep.to_csv(OUT_DIR / "sweep.csv", index=False)
+    CHOSEN_FILE.write_text(json.dumps(chosen, indent=2))
+
+    print("\n" + sweep.drop(columns=["n_nodes"]).round(4).to_string(index=False))
+    for name, rec in chosen.items():
+        print(f"\n[{name}] chosen {rec['params'] or 'unrestricted'}: MAE {rec['val_mae']:.4f} "
+              f"(ref {rec['reference_mae']:.4f}), {rec['flat_mb']:.2f} MB "
+              f"vs {rec['reference_pickle_mb']:.1f} MB pickled")
+    print(f"Wrote {CHOSEN_FILE.relative_to(PROJECT_ROOT)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
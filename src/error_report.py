@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Build a compact error report from data_processed/error_analysis/gw*_pred_vs_actual.csv
+instead of one PNG per team per gameweek.
+
+Outputs:
+  data_processed/reports/gw{N}_facets.png   (one figure per GW, 20 team subplots)
+  data_processed/reports/error_report.html  (single self-contained HTML, inline SVG charts)
+
+The HTML report needs no extra assets: every chart is a small inline SVG, with
+player names on hover, plus per-GW and per-team MAE tables.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import html
+import math
+import re
+import sys
+import pandas as pd
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+# ---------- repo paths ----------
+THIS = Path(__file__).resolve()
+ROOT = THIS.parent.parent
+PRED_ERR_DIR = ROOT / "data_processed" / "error_analysis"
+REPORT_DIR = ROOT / "data_processed" / "reports"
+HTML_FILE = REPORT_DIR / "error_report.html"
+
+REQUIRED = {"gameweek", "team_short", "player_name", "predicted_points", "event_points"}
+FACET_COLS = 5
+FACET_DPI = 110
+LABEL_TOP_N = 3      # label only the worst misses per team to keep facets readable
+SVG_SIZE = 220
+SVG_PAD = 24
+
+# ---------- helpers ----------
+def _gw_from_name(p: Path) -> int:
+    m = re.search(r"gw(\d+)_pred_vs_actual\.csv$", p.name, flags=re.IGNORECASE)
+    if not m:
+        raise ValueError(f"Cannot infer GW from filename: {p.name}")
+    return int(m.group(1))
+
+def _limits(x: np.ndarray, y: np.ndarray, pad: float = 0.5) -> tuple[float, float]:
+    lo = float(min(np.min(x) if x.size else 0, np.min(y) if y.size else 0))
+    hi = float(max(np.max(x) if x.size else 1, np.max(y) if y.size else 1))
+    return (math.floor(lo - pad), math.ceil(hi + pad))
+
+def load_error_tables() -> pd.DataFrame:
+    """Concatenate every per-GW error table into one frame (one row per player-GW)."""
+    files = sorted(PRED_ERR_DIR.glob("gw*_pred_vs_actual.csv"), key=_gw_from_name)
+    frames = []
+    for fpath in files:
+        df = pd.read_csv(fpath)
+        missing = REQUIRED - set(df.columns)
+        if missing:
+            print(f"Skipping {fpath.name}: missing columns {sorted(missing)}")
+            continue
+        df["gameweek"] = _gw_from_name(fpath)
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=sorted(REQUIRED))
+
+    df = pd.concat(frames, ignore_index=True)
+    df = df[df["team_short"].notna()].copy()
+    df["predicted_points"] = pd.to_numeric(df["predicted_points"], errors="coerce")
+    df["event_points"] = pd.to_numeric(df["event_points"], errors="coerce")
+    df["error"] = df["predicted_points"] - df["event_points"]
+    df["abs_error"] = df["error"].abs()
+    return df
+
+def summarize(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Per-GW and per-(GW, team) error summaries."""
+    by_gw = (
+        df.groupby("gameweek")
+        .agg(n=("abs_error", "size"), mae=("abs_error", "mean"), bias=("error", "mean"))
+        .reset_index()
+    )
+    by_team = (
+        df.groupby(["gameweek", "team_short"])
+        .agg(n=("abs_error", "size"), mae=("abs_error", "mean"), bias=("error", "mean"))
+        .reset_index()
+    )
+    return by_gw, by_team
+
+# ---------- faceted PNG ----------
+def render_gw_facets(df_gw: pd.DataFrame, gw: int, out_path: Path) -> Path:
+    teams = sorted(df_gw["team_short"].astype(str).unique())
+    n_rows = max(1, math.ceil(len(teams) / FACET_COLS))
+    lo, hi = _limits(df_gw["predicted_points"].to_numpy(float), df_gw["event_points"].to_numpy(float))
+
+    fig, axes = plt.subplots(
+        n_rows, FACET_COLS,
+        figsize=(3.2 * FACET_COLS, 3.2 * n_rows),
+        sharex=True, sharey=True, squeeze=False,
+    )
+    for ax, team in zip(axes.flat, teams):
+        sub = df_gw[df_gw["team_short"].astype(str) == team]
+        ax.scatter(sub["predicted_points"], sub["event_points"], s=12, alpha=0.7)
+        ax.plot([lo, hi], [lo, hi], lw=0.8, color="grey")
+        for _, r in sub.nlargest(LABEL_TOP_N, "abs_error").iterrows():
+            ax.annotate(str(r["player_name"]), (r["predicted_points"], r["event_points"]),
+                        textcoords="offset points", xytext=(3, 2), fontsize=6)
+        ax.set_title(f"{team}  MAE {sub['abs_error'].mean():.2f}", fontsize=9)
+    for ax in list(axes.flat)[len(teams):]:
+        ax.set_visible(False)
+
+    axes[0][0].set_xlim(lo, hi)
+    axes[0][0].set_ylim(lo, hi)
+    fig.supxlabel("Predicted points")
+    fig.supylabel("Actual points")
+    fig.suptitle(f"GW{gw} — Actual vs Predicted by team (MAE {df_gw['abs_error'].mean():.2f})")
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=FACET_DPI)
+    plt.close(fig)
+    return out_path
+
+def write_facets(df: pd.DataFrame, force: bool = False) -> list[Path]:
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    written = []
+    for gw, df_gw in df.groupby("gameweek", sort=True):
+        gw = int(gw)
+        out_path = REPORT_DIR / f"gw{gw}_facets.png"
+        src = PRED_ERR_DIR / f"gw{gw}_pred_vs_actual.csv"
+        if (not force and out_path.is_file() and src.is_file()
+                and out_path.stat().st_mtime >= src.stat().st_mtime):
+            continue
+        written.append(render_gw_facets(df_gw, gw, out_path))
+        print(f"  - {out_path.relative_to(ROOT)}")
+    return written
+
+# ---------- HTML / SVG ----------
+def _svg_scatter(sub: pd.DataFrame, lo: float, hi: float) -> str:
+    size, pad = SVG_SIZE, SVG_PAD
+    span = (hi - lo) or 1.0
+
+    def sx(v):
+        return pad + (v - lo) / span * (size - 2 * pad)
+
+    def sy(v):
+        return size - pad - (v - lo) / span * (size - 2 * pad)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+        f'viewBox="0 0 {size} {size}">',
+        f'<rect x="{pad}" y="{pad}" width="{size - 2 * pad}" height="{size - 2 * pad}" '
+        'fill="none" stroke="#ccc"/>',
+        f'<line x1="{sx(lo):.1f}" y1="{sy(lo):.1f}" x2="{sx(hi):.1f}" y2="{sy(hi):.1f}" stroke="#999"/>',
+        f'<text x="{pad}" y="{size - 6}" font-size="9">{lo:g}</text>',
+        f'<text x="{size - pad}" y="{size - 6}" font-size="9" text-anchor="end">pred {hi:g}</text>',
+        f'<text x="4" y="{pad + 8}" font-size="9">act {hi:g}</text>',
+    ]
+    for _, r in sub.iterrows():
+        tip = html.escape(
+            f"{r['player_name']}: pred {r['predicted_points']:.2f}, actual {r['event_points']:g}"
+        )
+        parts.append(
+            f'<circle cx="{sx(r["predicted_points"]):.1f}" cy="{sy(r["event_points"]):.1f}" r="3" '
+            f'fill="#1f77b4" fill-opacity="0.7"><title>{tip}</title></circle>'
+        )
+    parts.append("</svg>")
+    return "".join(parts)
+
+def _table(df: pd.DataFrame) -> str:
+    return df.to_html(index=False, float_format=lambda v: f"{v:.2f}", border=0, classes="t")
+
+def build_html(df: pd.DataFrame) -> str:
+    by_gw, by_team = summarize(df)
+    out = [
+        "<!doctype html><html><head><meta charset='utf-8'>",
+        "<title>FPL model error report</title><style>",
+        "body{font-family:sans-serif;margin:1.5em}",
+        ".grid{display:flex;flex-wrap:wrap;gap:6px}",
+        ".cell{border:1px solid #eee;padding:2px}",
+        ".cell h4{margin:2px 4px;font-size:12px}",
+        ".t td,.t th{padding:2px 8px;text-align:right}",
+        "details{margin:0.6em 0}",
+        "</style></head><body>",
+        "<h1>Actual vs predicted points</h1>",
+        "<h2>MAE by gameweek</h2>",
+        _table(by_gw),
+    ]
+    for gw, df_gw in df.groupby("gameweek", sort=True):
+        gw = int(gw)
+        lo, hi = _limits(df_gw["predicted_points"].to_numpy(float), df_gw["event_points"].to_numpy(float))
+        out.append(f"<details><summary><b>GW{gw}</b> — MAE {df_gw['abs_error'].mean():.2f} "
+                   f"({len(df_gw)} players)</summary><div class='grid'>")
+        for team, sub in df_gw.groupby("team_short", sort=True):
+            out.append(
+                f"<div class='cell'><h4>{html.escape(str(team))} — MAE {sub['abs_error'].mean():.2f}</h4>"
+                f"{_svg_scatter(sub, lo, hi)}</div>"
+            )
+        out.append("</div>")
+        out.append(_table(by_team[by_team["gameweek"] == gw].drop(columns="gameweek")))
+        out.append("</details>")
+    out.append("</body></html>")
+    return "\n".join(out)
+
+# ---------- main ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Faceted / HTML error report")
+    parser.add_argument("--format", choices=["facets", "html", "both"], default="both")
+    parser.add_argument("--force", action="store_true", help="re-render facets even if up to date")
+    args = parser.parse_args(argv)
+
+    if not PRED_ERR_DIR.exists():
+        print(f"ERROR: missing directory {PRED_ERR_DIR}", file=sys.stderr)
+        return 1
+
+    df = load_error_tables()
+    if df.empty:
+        print(f"No usable gw*_pred_vs_actual.csv files found in {PRED_ERR_DIR}")
+        return 0
+    print(f"Loaded {len(df)} player rows across {df['gameweek'].nunique()} GWs")
+
+    if args.format in ("facets", "both"):
+        written = write_facets(df, force=args.force)
+        print(f"Faceted figures written: {len(written)}")
+
+    if args.format in ("html", "both"):
+        REPORT_DIR.mkdir(parents=True, exist_ok=True)
+        HTML_FILE.write_text(build_html(df), encoding="utf-8")
+        print(f"Wrote {HTML_FILE.relative_to(ROOT)} ({HTML_FILE.stat().st_size / 1024:.0f} KB)")
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Automatic feature-set search for the points model.
+
+1. Fit one cheap HistGBDT on every candidate column (HGB handles the NaNs in
+   the rolling windows natively, so no rows are dropped) and rank features by
+   permutation importance on the last GWs up to cutoff_gw.
+2. Greedy forward selection over the top-ranked candidates: each round scores
+   "current set + one more feature" for every remaining candidate in parallel
+   and keeps the best, until the validation MAE stops improving.
+
+Every fitted subset is memoized (validation MAE keyed by the data hash + sorted
+feature list), and the all-features model is cached with joblib, so rerunning
+after a small change only fits what's new.
+
+Output (data_processed/feature_selection/):
+  importance.csv       ranked permutation importances
+  selection_path.csv   step, feature added, validation MAE
+  chosen_features.json the selected set (picked up by train_with_fixture as 'selected')
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.inspection import permutation_importance
+from sklearn.metrics import mean_absolute_error
+
+import train_with_fixture as twf
+from schema import FEATURE_SCHEMA, read_table
+
+THIS_FILE = Path(__file__).resolve()
+PROJECT_ROOT = THIS_FILE.parent.parent
+CACHE_DIR = PROJECT_ROOT / "data_processed" / "cache"
+OUT_DIR = PROJECT_ROOT / "data_processed" / "feature_selection"
+CHOSEN_FILE = OUT_DIR / "chosen_features.json"
+
+# everything the feature table can offer; missing columns are skipped
+CANDIDATE_FEATURES = list(dict.fromkeys(
+    twf.FEATURES_EXTENDED_INTERACT + twf.FEATURES_SEASON_AWARE + [
+        "pts_avg_last5",
+        "mins_avg_last5",
+        "played60_rate_last5",
+        "xgi_avg_last3",
+        "xgi_avg_last5",
+        "shots_last3",
+        "shots_last5",
+        "cs_rate_last3",
+        "cs_rate_last5",
+        "gc_avg_last3",
+        "gc_avg_last5",
+    ]
+))
+
+# deliberately small: we rank subsets, we don't need the final model here
+CHEAP_MODEL_PARAMS = dict(max_iter=150, learning_rate=0.1, max_leaf_nodes=31, random_state=42)
+
+
+def cheap_model():
+    return HistGradientBoostingRegressor(**CHEAP_MODEL_PARAMS)
+
+
+############################
+# Data
+############################
+
+def load_split(n_val_gws: int, multi_season: bool):
+    """
+    Val = the last n_val_gws GWs <= cutoff_gw of the current season, train =
+    everything before them. GWs after cutoff_gw (train_with_fixture's test
+    split, where 'selected' is scored) are left out entirely.
+    """
+    df = read_table(twf.DATA_FILE, FEATURE_SCHEMA)
+    df = twf.add_engineered_columns(twf.clean_snapshot_columns(df))
+    season_current = sorted(df["season"].astype(str).unique())[-1]
+    is_current = df["season"].astype(str) == season_current
+    if not multi_season:
+        df, is_current = df[is_current], is_current[is_current]
+
+    candidates = [c for c in CANDIDATE_FEATURES if c in df.columns and df[c].notna().any()]
+    df = df[df[twf.TARGET_COL].notna()]
+    is_current = is_current.loc[df.index]
+
+    val_gws = twf.validation_gws(df, season_current, n_val_gws)
+    if not val_gws:
+        raise RuntimeError(f"No current-season GWs <= cutoff_gw={twf.cutoff_gw} to validate on.")
+    is_val = is_current & df["gameweek"].isin(val_gws)
+    is_train = ~is_current | (df["gameweek"] < min(val_gws))
+
+    X_train = df.loc[is_train, candidates].astype(np.float32)
+    y_train = df.loc[is_train, twf.TARGET_COL].astype(np.float32)
+    X_val = df.loc[is_val, candidates].astype(np.float32)
+    y_val = df.loc[is_val, twf.TARGET_COL].astype(np.float32)
+    print(f"Candidates: {len(candidates)} | train rows {len(X_train)} | "
+          f"val rows {len(X_val)} (GWs {[int(g) for g in val_gws]})")
+    return X_train, y_train, X_val, y_val, candidates
+
+
+def data_hash(*frames) -> str:
+    h = hashlib.sha1()
+    for f in frames:
+        h.update(pd.util.hash_pandas_object(f, index=False).to_numpy().tobytes())
+    h.update(json.dumps(CHEAP_MODEL_PARAMS, sort_keys=True).encode())
+    return h.hexdigest()[:16]
+
+
+############################
+# Scoring (memoized)
+############################
+
+class SubsetScorer:
+    """Validation MAE per feature subset, persisted in data_processed/cache/."""
+
+    def __init__(self, X_train, y_train, X_val, y_val, key: str):
+        self.X_train, self.y_train = X_train, y_train
+        self.X_val, self.y_val = X_val, y_val
+        self.memo_file = CACHE_DIR / f"feature_subset_scores_{key}.json"
+        self.memo = json.loads(self.memo_file.read_text()) if self.memo_file.is_file() else {}
+        self.n_fitted = 0
+
+    @staticmethod
+    def _key(cols) -> str:
+        return "|".join(sorted(cols))
+
+    def score_many(self, subsets: list[list[str]], n_jobs: int) -> list[float]:
+        todo = [s for s in subsets if self._key(s) not in self.memo]
+        if todo:
+            maes = Parallel(n_jobs=n_jobs)(
+                delayed(_fit_score)(self.X_train[s], self.y_train, self.X_val[s], self.y_val)
+                for s in todo
+            )
+            for s, mae in zip(todo, maes):
+                self.memo[self._key(s)] = mae
+            self.n_fitted += len(todo)
+            self.save()
+        return [self.memo[self._key(s)] for s in subsets]
+
+    def save(self):
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        self.memo_file.write_text(json.dumps(self.memo))
+
+
+def _fit_score(X_train, y_train, X_val, y_val) -> float:
+    model = cheap_model().fit(X_train, y_train)
+    return float(mean_absolute_error(y_val, model.predict(X_val)))
+
+
+############################
+# Steps
+############################
+
+def rank_by_permutation(X_train, y_train, X_val, y_val, key: str, n_repeats: int, n_jobs: int):
+    model_file = CACHE_DIR / f"feature_selection_full_{key}.joblib"
+    if model_file.is_file():
+        model = joblib.load(model_file)
+        print(f"Loaded cached all-features model {model_file.name}")
+    else:
+        model = cheap_model().fit(X_train, y_train)
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        joblib.dump(model, model_file, compress=3)
+
+    base_mae = mean_absolute_error(y_val, model.predict(X_val))
+    imp = permutation_importance(
+        model, X_val, y_val,
+        scoring="neg_mean_absolute_error",
+        n_repeats=n_repeats, random_state=42, n_jobs=n_jobs,
+    )
+    ranking = pd.DataFrame({
+        "feature": X_val.columns,
+        "importance_mean": imp.importances_mean,   # MAE increase when shuffled
+        "importance_std": imp.importances_std,
+    }).sort_values("importance_mean", ascending=False).reset_index(drop=True)
+    ranking["rank"] = np.arange(1, len(ranking) + 1)
+    print(f"All-features model: val MAE {base_mae:.4f}")
+    return ranking, base_mae
+
+
+def forward_select(scorer: SubsetScorer, pool: list[str], max_features: int, tol: float, n_jobs: int):
+    chosen, path = [], []
+    best_mae = np.inf
+    while pool and len(chosen) < max_features:
+        trials = [chosen + [c] for c in pool]
+        maes = scorer.score_many(trials, n_jobs)
+        i = int(np.argmin(maes))
+        if best_mae - maes[i] < tol:
+            break
+        best_mae = maes[i]
+        chosen.append(pool.pop(i))
+        path.append({"step": len(chosen), "added": chosen[-1], "val_mae": best_mae})
+        print(f"  step {len(chosen):>2}: + {chosen[-1]:<24} val MAE {best_mae:.4f}")
+    return chosen, pd.DataFrame(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Permutation-importance ranking + greedy forward selection")
+    parser.add_argument("--val-gws", type=int, default=3, help="GWs up to cutoff_gw used for validation")
+    parser.add_argument("--top-k", type=int, default=20, help="only the top-k ranked features enter forward selection")
+    parser.add_argument("--max-features", type=int, default=15)
+    parser.add_argument("--tol", type=float, default=0.002, help="min MAE improvement to keep adding")
+    parser.add_argument("--repeats", type=int, default=5, help="permutation repeats")
+    parser.add_argument("--all-seasons", action="store_true")
+    parser.add_argument("--jobs", type=int, default=-1)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    X_train, y_train, X_val, y_val, candidates = load_split(args.val_gws, args.all_seasons)
+    key = data_hash(X_train, y_train, X_val, y_val)
+
+    ranking, full_mae = rank_by_permutation(X_train, y_train, X_val, y_val, key, args.repeats, args.jobs)
+    print("\nPermutation importance (val MAE increase when shuffled):")
+    print(ranking.head(args.top_k).to_string(index=False))
+
+    pool = ranking["feature"].head(args.top_k).tolist()
+    scorer = SubsetScorer(X_train, y_train, X_val, y_val, key)
+    print(f"\nForward selection over top {len(pool)} features:")
+    chosen, path = forward_select(scorer, pool, args.max_features, args.tol, args.jobs)
+
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    ranking.to_csv(OUT_DIR / "importance.csv", index=False)
+    path.to_csv(OUT_DIR / "selection_path.csv", index=False)
+    final_mae = float(path["val_mae"].iloc[-1]) if len(path) else None
+    CHOSEN_FILE.write_text(json.dumps({
+        "features": chosen,
+        "val_mae": final_mae,
+        "all_features_val_mae": float(full_mae),
+        "val_gws": args.val_gws,
+        "selected_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }, indent=2))
+
+    print(f"\nChosen {len(chosen)} features (val MAE {final_mae or float('nan'):.4f}) vs all {len(candidates)} "
+          f"(val MAE {full_mae:.4f}); {scorer.n_fitted} subset fits, {time.perf_counter() - t0:.1f}s")
+    print(f"Wrote {CHOSEN_FILE.relative_to(PROJECT_ROOT)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,7 +1,14 @@
+from functools import lru_cache
 from pathlib import Path
 import pandas as pd
 import numpy as np
 
+from profiling import profiled
+from schema import RAW_SCHEMA, FEATURE_SCHEMA, apply_schema, read_table
+from validate_sources import SOURCE_SCHEMAS, require_columns, warn_source
+from team_model import TEAM_FEATURES, attach_team_expectations, team_gw_expectations
+from player_identity import code_map, player_key
+
 THIS_FILE = Path(__file__).resolve()
 PROJECT_ROOT = THIS_FILE.parent.parent
 
@@ -16,7 +23,22 @@ DATA_REPO_ROOT = Path("/home/mann-gandhi/FPL-Elo-Insights-data/data")
 
 PLAYER_ID_COL = "id"  # in training_base_raw.csv
 
+# rolling / lag features follow the player_code across seasons (player_identity.py);
+# False resets every player's history each season (FPL ids change in August)
+CARRY_FORM = True
+
+# season-aware columns added by add_season_context(); used by the multi-season mode
+SEASON_CONTEXT_FEATURES = [
+    "gameweek",               # early-season rows behave differently
+    "prev_season_pts_avg",    # carry-over form from the player's previous season
+    "prev_season_mins_avg",
+    "has_prev_season",        # 0 for new signings / first season in the data
+    "is_promoted",            # team wasn't in the previous season's teams.csv
+    "opp_is_promoted",
+]
+
 
+@profiled()
 def load_raw():
     """
     Load the concatenated per-player-per-gameweek data we built in ingest.py.
@@ -27,7 +49,7 @@ def load_raw():
     - event_points
     - now_cost, form, selected_by_percent, minutes, etc.
     """
-    df = pd.read_csv(RAW_FILE)
+    df = read_table(RAW_FILE, RAW_SCHEMA)
     # make sure gameweek is int not float
     df["gameweek"] = df["gameweek"].astype(int)
     return df
@@ -55,7 +77,7 @@ def build_player_team_map():
 
         # expected columns:
         # player_id, team_code, position, web_name, ...
-        if "player_id" not in players_df.columns or "team_code" not in players_df.columns:
+        if not require_columns(players_df.columns, ["player_id", "team_code"], players_csv):
             continue
 
         tmp = players_df[["player_id", "team_code"]].copy()
@@ -73,6 +95,22 @@ def build_player_team_map():
     return out
 
 
+def premier_league_fixtures(fx, fixtures_csv):
+    """
+    Rows of one fixtures.csv that are Premier League matches: by 'tournament',
+    else by 'prem' in match_id, else (with a warning) every row.
+    """
+    if "tournament" in fx.columns:
+        col = "tournament"
+    elif "match_id" in fx.columns:
+        warn_source(fixtures_csv, "no 'tournament' column, filtering on match_id")
+        col = "match_id"
+    else:
+        warn_source(fixtures_csv, "no 'tournament' / 'match_id' column, keeping every fixture")
+        return fx.copy()
+    return fx[fx[col].astype(str).str.contains("prem", case=False, na=False)].copy()
+
+
 def build_fixture_table():
     """
     Build a table of (season, gameweek, team_code) -> opponent attributes.
@@ -92,6 +130,7 @@ def build_fixture_table():
       is_home          (1 if this team is home)
       team_elo         (elo for this team going into that match)
       opp_elo          (elo for opponent going into that match)
+      goals_for, goals_against  (NaN until the match is played)
     """
     rows = []
 
@@ -126,17 +165,15 @@ def build_fixture_table():
             # gameweek, home_team, home_team_elo, away_team, away_team_elo, tournament, ...
             # (your sample shows 'tournament' as last col)
             # Filter to matches that look like Premier League.
-            if "tournament" in fx.columns:
-                fx_pl = fx[fx["tournament"].astype(str).str.contains("prem", case=False, na=False)].copy()
-            else:
-                # worst case: if no tournament column, we just keep everything
-                fx_pl = fx.copy()
+            if not require_columns(fx.columns, SOURCE_SCHEMAS["fixtures"]["required"], fixtures_csv):
+                continue
+            fx_pl = premier_league_fixtures(fx, fixtures_csv)
 
             if fx_pl.empty:
                 continue
 
             # make sure numeric
-            for col in ["home_team", "away_team", "home_team_elo", "away_team_elo"]:
+            for col in ["home_team", "away_team", "home_team_elo", "away_team_elo", "home_score", "away_score"]:
                 if col in fx_pl.columns:
                     fx_pl[col] = pd.to_numeric(fx_pl[col], errors="coerce")
 
@@ -149,6 +186,8 @@ def build_fixture_table():
                 "is_home": 1,
                 "team_elo": fx_pl["home_team_elo"],
                 "opp_elo": fx_pl["away_team_elo"],
+                "goals_for": fx_pl.get("home_score"),
+                "goals_against": fx_pl.get("away_score"),
             })
 
             # One row for away team
@@ -160,6 +199,8 @@ def build_fixture_table():
                 "is_home": 0,
                 "team_elo": fx_pl["away_team_elo"],
                 "opp_elo": fx_pl["home_team_elo"],
+                "goals_for": fx_pl.get("away_score"),
+                "goals_against": fx_pl.get("home_score"),
             })
 
             rows.append(home_rows)
@@ -208,7 +249,7 @@ def build_opponent_strength_lookup():
             "strength_defence_home",
             "strength_defence_away",
         ]
-        if not all(c in teams_df.columns for c in needed_cols):
+        if not require_columns(teams_df.columns, needed_cols, teams_csv):
             continue
 
         tmp = teams_df[needed_cols].copy()
@@ -233,10 +274,72 @@ def build_opponent_strength_lookup():
     return out
 
 
+def aggregate_team_gw_fixtures(fixtures_long, opp_strength_lookup):
+    """
+    One row per (season, gameweek, team_code), so joining it onto player rows can
+    never duplicate them in a double gameweek:
+      n_fixtures        number of PL fixtures the team plays that GW (2 in a DGW)
+      is_home           share of those fixtures at home (0 / 1 for a single fixture)
+      team_elo, opp_elo, opp_def_strength
+                        averaged over the fixtures
+      opp_code          first opponent (an id, can't be averaged)
+
+    opp_def_strength is the opponent's away defence when we're home and its home
+    defence when we're away.
+    """
+    opp = opp_strength_lookup[["season", "team_code", "strength_defence_home", "strength_defence_away"]]
+    fx = fixtures_long.merge(
+        opp.rename(columns={
+            "team_code": "opp_code",
+            "strength_defence_home": "opp_strength_defence_home",
+            "strength_defence_away": "opp_strength_defence_away",
+        }),
+        on=["season", "opp_code"],
+        how="left"
+    )
+    fx["opp_def_strength"] = np.where(
+        fx["is_home"] == 1, fx["opp_strength_defence_away"], fx["opp_strength_defence_home"]
+    )
+
+    agg = (
+        fx.groupby(["season", "gameweek", "team_code"], sort=False)
+        .agg(
+            n_fixtures=("opp_code", "size"),
+            is_home=("is_home", "mean"),
+            team_elo=("team_elo", "mean"),
+            opp_elo=("opp_elo", "mean"),
+            opp_def_strength=("opp_def_strength", "mean"),
+            opp_code=("opp_code", "first"),
+        )
+        .reset_index()
+    )
+    return agg
+
+
+def attach_team_gw_fixtures(df, fixtures_agg):
+    """
+    Left-join the per-(team, GW) fixture vector. Players whose team blanks keep
+    their row with n_fixtures = 0 (fixture columns NaN); players with no known
+    team keep NaN.
+    """
+    df = df.merge(fixtures_agg, on=["season", "gameweek", "team_code"], how="left")
+    blank = df["n_fixtures"].isna() & df["team_code"].notna()
+    df["n_fixtures"] = df["n_fixtures"].mask(blank, 0)
+    return df
+
+
+@lru_cache(maxsize=1)
+def team_expectations():
+    """team_model.team_gw_expectations over every fixture we have (computed once per process)."""
+    return team_gw_expectations(build_fixture_table(), build_opponent_strength_lookup())
+
+
+@profiled()
 def add_fixture_features(df_raw):
     """
     Add team_code to each player row, merge fixture info, and compute opponent difficulty.
-    Returns df_raw_enriched.
+    Returns df_raw_enriched (same rows as df_raw: double gameweeks are aggregated,
+    blank gameweeks kept with n_fixtures = 0), plus the team_model expectations.
     """
 
     # 1. Map each player (by id) to team_code for that season
@@ -255,51 +358,127 @@ def add_fixture_features(df_raw):
     # Make sure team_code is numeric/int
     df["team_code"] = pd.to_numeric(df["team_code"], errors="coerce").astype("Int64")
 
-    # 2. Merge in fixture rows for Premier League games
-    fixtures_long = build_fixture_table()
+    # 2. Premier League fixtures + opponent defensive strength, one row per (team, GW)
+    fixtures_agg = aggregate_team_gw_fixtures(build_fixture_table(), build_opponent_strength_lookup())
+    fixtures_agg["team_code"] = fixtures_agg["team_code"].astype("Int64")
 
-    df = df.merge(
-        fixtures_long,
-        on=["season", "gameweek", "team_code"],
-        how="left"
-    )
+    df = attach_team_gw_fixtures(df, fixtures_agg)
 
-    # 3. Merge opponent defensive strength from opponent team_code
-    #    We'll join opponent info (opp_code) against teams.csv lookup.
-    opp_strength_lookup = build_opponent_strength_lookup()
-    opp_strength_lookup = opp_strength_lookup.rename(columns={
-        "team_code": "opp_code",
-        "strength_defence_home": "opp_strength_defence_home",
-        "strength_defence_away": "opp_strength_defence_away",
-    })
+    # 3. team-level expected goals for / against + clean-sheet chance (team_model.py)
+    df = attach_team_expectations(df, team_expectations())
 
-    df = df.merge(
-        opp_strength_lookup,
-        on=["season", "opp_code"],
-        how="left"
+    return df
+
+
+def build_player_code_map():
+    """
+    (season, player_id) -> player_code, from the persistent identity index
+    (player_identity.py). FPL ids are re-issued every season; player_code stays
+    with the player. Empty frame if no players.csv has a code column.
+    """
+    return code_map(DATA_REPO_ROOT)
+
+
+@profiled()
+def add_season_context(df, df_history):
+    """
+    Add SEASON_CONTEXT_FEATURES to df (needs season, id, team_code, opp_code).
+
+    Previous-season averages come from df_history (raw player-GW rows, any seasons)
+    and are joined through player_code, so they survive the yearly id reshuffle.
+    Missing history is filled with 0 and flagged by has_prev_season = 0.
+    """
+    df = df.copy()
+    season_str = df["season"].astype(str)
+    seasons = sorted(set(season_str) | set(df_history["season"].astype(str)))
+    prev_of = {s: seasons[i - 1] for i, s in enumerate(seasons) if i > 0}
+    df["_prev_season"] = season_str.map(prev_of)
+
+    # --- carry-over form via player_code ---
+    codes = build_player_code_map().rename(columns={"player_id": PLAYER_ID_COL})
+    codes["season"] = codes["season"].astype(str)
+    if not codes.empty:
+        hist = df_history[["season", PLAYER_ID_COL, "event_points", "minutes"]].copy()
+        hist["season"] = hist["season"].astype(str)
+        hist = hist.merge(codes, on=["season", PLAYER_ID_COL], how="inner")
+        season_stats = (
+            hist.groupby(["season", "player_code"])
+            .agg(prev_season_pts_avg=("event_points", "mean"),
+                 prev_season_mins_avg=("minutes", "mean"))
+            .reset_index()
+            .rename(columns={"season": "_prev_season"})
+        )
+        df["_season_str"] = season_str
+        df = df.merge(
+            codes.rename(columns={"season": "_season_str"}),
+            on=["_season_str", PLAYER_ID_COL],
+            how="left",
+        )
+        df = df.merge(season_stats, on=["_prev_season", "player_code"], how="left")
+        df = df.drop(columns=["_season_str", "player_code"])
+    else:
+        df["prev_season_pts_avg"] = np.nan
+        df["prev_season_mins_avg"] = np.nan
+
+    df["has_prev_season"] = df["prev_season_pts_avg"].notna().astype(int)
+    df["prev_season_pts_avg"] = df["prev_season_pts_avg"].fillna(0.0)
+    df["prev_season_mins_avg"] = df["prev_season_mins_avg"].fillna(0.0)
+
+    # --- promoted teams: not present in the previous season's teams.csv ---
+    present = build_opponent_strength_lookup()[["season", "team_code"]].drop_duplicates()
+    present = present.rename(columns={"season": "_prev_season"}).assign(_present=1)
+    present["_prev_season"] = present["_prev_season"].astype(str)
+    present["team_code"] = present["team_code"].astype(float)
+
+    for code_col, out_col in [("team_code", "is_promoted"), ("opp_code", "opp_is_promoted")]:
+        if code_col not in df.columns:
+            df[out_col] = 0
+            continue
+        keys = pd.DataFrame({
+            "_prev_season": df["_prev_season"].to_numpy(),
+            "team_code": pd.to_numeric(df[code_col], errors="coerce").astype(float).to_numpy(),
+        })
+        hit = keys.merge(present, on=["_prev_season", "team_code"], how="left")["_present"]
+        df[out_col] = (
+            keys["_prev_season"].notna() & keys["team_code"].notna() & hit.isna()
+        ).astype(int).to_numpy()
+
+    return df.drop(columns=["_prev_season"])
+
+
+def rolling_key(df):
+    """Group key of the rolling features: one per person (CARRY_FORM) or per (season, id)."""
+    if CARRY_FORM:
+        return player_key(df["season"], df[PLAYER_ID_COL], DATA_REPO_ROOT)
+    return pd.Series(
+        df.groupby(["season", PLAYER_ID_COL], sort=False, observed=True).ngroup().to_numpy(),
+        index=df.index,
     )
 
-    # 4. Compute an "effective opponent defence strength"
-    #    Logic:
-    #    - if we are home, the opponent is away, so use opponent's away defence strength
-    #    - if we are away, opponent is home, so use opponent's home defence strength
-    def pick_def_strength(row):
-        if pd.isna(row.get("is_home")):
-            return np.nan
-        if row["is_home"] == 1:
-            return row["opp_strength_defence_away"]
-        else:
-            return row["opp_strength_defence_home"]
 
-    df["opp_def_strength"] = df.apply(pick_def_strength, axis=1)
+def past_rolling(values, key, window, how="mean"):
+    """
+    rolling(window, min_periods=1).<how>() over each player's PREVIOUS rows (the
+    current row is excluded), in row order, never crossing from one player into
+    the next. NaNs are skipped like rolling() does. how: "mean" or "sum".
 
-    return df
+    Vectorized with grouped cumulative sums instead of groupby().rolling().
+    """
+    prev = values.astype(float).groupby(key, sort=False).shift(1)
+    csum = prev.fillna(0.0).groupby(key, sort=False).cumsum()
+    ccnt = prev.notna().astype(float).groupby(key, sort=False).cumsum()
+    wsum = csum - csum.groupby(key, sort=False).shift(window).fillna(0.0)
+    wcnt = ccnt - ccnt.groupby(key, sort=False).shift(window).fillna(0.0)
+    out = wsum.where(wcnt > 0)
+    return out / wcnt if how == "mean" else out
 
 
+@profiled()
 def add_rolling_features(df):
     """
     Adds rolling/lag features for each player, based only on PAST gameweeks.
-    We compute both last-3 and last-5 style features.
+    We compute both last-3 and last-5 style features. With CARRY_FORM the
+    windows run on across seasons (GW1 sees the end of last season).
 
     New columns (examples):
       pts_avg_last5
@@ -312,74 +491,29 @@ def add_rolling_features(df):
     """
 
     df = df.sort_values(by=["season", PLAYER_ID_COL, "gameweek"]).copy()
-    g = df.groupby(["season",PLAYER_ID_COL], group_keys = False)
+    key = rolling_key(df)
 
     # Base lag stuff (already had)
-    df["pts_prev_gw"] = g["event_points"].shift(1)
-
-    df["pts_avg_last3"] = (
-        g["event_points"]
-        .shift(1)
-        .rolling(window=3, min_periods=1)
-        .mean()
-    )
+    df["pts_prev_gw"] = df["event_points"].astype(float).groupby(key, sort=False).shift(1)
 
-    df["pts_avg_last5"] = (
-        g["event_points"]
-        .shift(1)
-        .rolling(window=5, min_periods=1)
-        .mean()
-    )
+    df["pts_avg_last3"] = past_rolling(df["event_points"], key, 3)
+    df["pts_avg_last5"] = past_rolling(df["event_points"], key, 5)
 
-    df["mins_avg_last3"] = (
-        g["minutes"]
-        .shift(1)
-        .rolling(window=3, min_periods=1)
-        .mean()
-    )
-
-    df["mins_avg_last5"] = (
-        g["minutes"]
-        .shift(1)
-        .rolling(window=5, min_periods=1)
-        .mean()
-    )
+    df["mins_avg_last3"] = past_rolling(df["minutes"], key, 3)
+    df["mins_avg_last5"] = past_rolling(df["minutes"], key, 5)
 
     # Played >=60 proxy for nailedness
     df["played60"] = (df["minutes"] >= 60).astype(float)
-    #g = df.groupby(["season", PLAYER_ID_COL], group_keys=False) # regroup after adding played60
 
-    df["played60_rate_last3"] = (
-        g["played60"]
-        .shift(1)
-        .rolling(window=3, min_periods=1)
-        .mean()
-    )
-
-    df["played60_rate_last5"] = (
-        g["played60"]
-        .shift(1)
-        .rolling(window=5, min_periods=1)
-        .mean()
-    )
+    df["played60_rate_last3"] = past_rolling(df["played60"], key, 3)
+    df["played60_rate_last5"] = past_rolling(df["played60"], key, 5)
 
     # xGI = xG + xA
     if "expected_goals" in df.columns and "expected_assists" in df.columns:
         df["xgi"] = df["expected_goals"].fillna(0) + df["expected_assists"].fillna(0)
 
-        df["xgi_avg_last3"] = (
-            g["xgi"]
-            .shift(1)
-            .rolling(window=3, min_periods=1)
-            .mean()
-        )
-
-        df["xgi_avg_last5"] = (
-            g["xgi"]
-            .shift(1)
-            .rolling(window=5, min_periods=1)
-            .mean()
-        )
+        df["xgi_avg_last3"] = past_rolling(df["xgi"], key, 3)
+        df["xgi_avg_last5"] = past_rolling(df["xgi"], key, 5)
     else:
         df["xgi_avg_last3"] = np.nan
         df["xgi_avg_last5"] = np.nan
@@ -388,19 +522,8 @@ def add_rolling_features(df):
     if "goals_scored" in df.columns and "assists" in df.columns and "goals_conceded" in df.columns:
         # if you have "total_shots" use that; if not, skip this block
         if "total_shots" in df.columns:
-            df["shots_last3"] = (
-                g["total_shots"]
-                .shift(1)
-                .rolling(window=3, min_periods=1)
-                .sum()
-            )
-
-            df["shots_last5"] = (
-                g["total_shots"]
-                .shift(1)
-                .rolling(window=5, min_periods=1)
-                .sum()
-            )
+            df["shots_last3"] = past_rolling(df["total_shots"], key, 3, how="sum")
+            df["shots_last5"] = past_rolling(df["total_shots"], key, 5, how="sum")
         else:
             df["shots_last3"] = np.nan
             df["shots_last5"] = np.nan
@@ -411,35 +534,15 @@ def add_rolling_features(df):
     # defensive trend features:
     # clean_sheets, goals_conceded
     if "clean_sheets" in df.columns:
-        df["cs_rate_last3"] = (
-            g["clean_sheets"]
-            .shift(1)
-            .rolling(window=3, min_periods=1)
-            .mean()
-        )
-        df["cs_rate_last5"] = (
-            g["clean_sheets"]
-            .shift(1)
-            .rolling(window=5, min_periods=1)
-            .mean()
-        )
+        df["cs_rate_last3"] = past_rolling(df["clean_sheets"], key, 3)
+        df["cs_rate_last5"] = past_rolling(df["clean_sheets"], key, 5)
     else:
         df["cs_rate_last3"] = np.nan
         df["cs_rate_last5"] = np.nan
 
     if "goals_conceded" in df.columns:
-        df["gc_avg_last3"] = (
-            g["goals_conceded"]
-            .shift(1)
-            .rolling(window=3, min_periods=1)
-            .mean()
-        )
-        df["gc_avg_last5"] = (
-            g["goals_conceded"]
-            .shift(1)
-            .rolling(window=5, min_periods=1)
-            .mean()
-        )
+        df["gc_avg_last3"] = past_rolling(df["goals_conceded"], key, 3)
+        df["gc_avg_last5"] = past_rolling(df["goals_conceded"], key, 5)
     else:
         df["gc_avg_last3"] = np.nan
         df["gc_avg_last5"] = np.nan
@@ -470,17 +573,35 @@ def build_training_table_with_fixture(df_raw_enriched):
         "mins_avg_last3",
         "played60_rate_last3",
 
+        # longer windows + attacking/defensive trends
+        # (not in the hand-written feature sets; candidates for feature_selection.py)
+        "pts_avg_last5",
+        "mins_avg_last5",
+        "played60_rate_last5",
+        "xgi_avg_last3",
+        "xgi_avg_last5",
+        "shots_last3",
+        "shots_last5",
+        "cs_rate_last3",
+        "cs_rate_last5",
+        "gc_avg_last3",
+        "gc_avg_last5",
+
         # snapshot info we know pre-deadline
         "now_cost",
         "selected_by_percent",
         "form",
 
         # fixture difficulty
+        "n_fixtures",
         "is_home",
         "team_elo",
         "opp_elo",
         "opp_def_strength",
 
+        # team-level expectations (team_model.py), same for every player of a team
+        *TEAM_FEATURES,
+
         # You *could* also include team_code and opp_code as numeric IDs,
         # which lets the model learn "playing vs BUR is good".
         # We'll include them since RF can handle ints fine.
@@ -489,6 +610,9 @@ def build_training_table_with_fixture(df_raw_enriched):
 
         # we carry minutes for debug only (we'll drop before training in train.py)
         "minutes",
+
+        # season-aware context (multi-season training); gameweek is already an id col
+        *[c for c in SEASON_CONTEXT_FEATURES if c != "gameweek"],
     ]
 
     # keep only columns that actually exist
@@ -502,10 +626,13 @@ def build_training_table_with_fixture(df_raw_enriched):
     if "pts_prev_gw" in model_df.columns:
         model_df = model_df[model_df["pts_prev_gw"].notna()].copy()
 
-    # drop rows where we didn't get fixture info (opp_def_strength missing etc.)
-    # This will naturally restrict to PL rows that actually scored FPL points.
+    # drop rows where we didn't get fixture info (opp_def_strength missing etc.),
+    # but keep blank gameweeks (n_fixtures = 0): a guaranteed zero is still a row.
     if "opp_def_strength" in model_df.columns:
-        model_df = model_df[model_df["opp_def_strength"].notna()].copy()
+        has_fixture = model_df["opp_def_strength"].notna()
+        if "n_fixtures" in model_df.columns:
+            has_fixture |= model_df["n_fixtures"] == 0
+        model_df = model_df[has_fixture].copy()
 
     # drop rows with missing target
     model_df = model_df[model_df[target_col].notna()].copy()
@@ -516,6 +643,7 @@ def build_training_table_with_fixture(df_raw_enriched):
 def main():
     df_raw = load_raw()
     df_enriched = add_fixture_features(df_raw)
+    df_enriched = add_season_context(df_enriched, df_raw)
 
     # Save a preview of what columns we ended up with, for debugging
     print("Columns after fixture merge:")
@@ -523,6 +651,7 @@ def main():
     print()
 
     training_df = build_training_table_with_fixture(df_enriched)
+    training_df = apply_schema(training_df, FEATURE_SCHEMA)
 
     OUT_FILE.parent.mkdir(parents=True, exist_ok=True)
     training_df.to_csv(OUT_FILE, index=False)
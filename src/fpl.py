@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+One entry point for the scripts in src/:
+
+  python src/fpl.py predict                       # = python src/predict_next_gw.py
+  python src/fpl.py train --feature-set baseline
+  python src/fpl.py top -p MID -n 10              # from the latest predictions file
+  python src/fpl.py startup                       # startup-time benchmark
+
+Only stdlib is imported here. A subcommand imports its script (and with it
+pandas / sklearn / ...) when it runs, so `top` and `--help` don't pay for the
+model stack. Arguments after the subcommand are passed to the script as its
+sys.argv.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import csv
+import importlib
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+THIS_FILE = Path(__file__).resolve()
+SRC_DIR = THIS_FILE.parent
+PROJECT_ROOT = SRC_DIR.parent
+PRED_DIR = PROJECT_ROOT / "predictions"
+STARTUP_FILE = PROJECT_ROOT / "data_processed" / "benchmarks" / "startup.csv"
+
+# subcommand -> (module in src/, help)
+SCRIPTS = {
+    "validate":    ("validate_sources", "check upstream CSV headers / dtypes for drift"),
+    "ingest":      ("ingest", "combine per-GW player stats into training_base_raw.csv"),
+    "patch":       ("patch_event_points", "patch event_points from the FPL API"),
+    "features":    ("features_with_fixture", "build training_table_with_fixture.csv"),
+    "train":       ("train_with_fixture", "train / evaluate the point models"),
+    "predict":     ("predict_next_gw", "predict the next GW"),
+    "errors":      ("error_analysis", "predicted vs actual per GW"),
+    "report":      ("error_report", "error report across GWs"),
+    "plot":        ("plot_team_scatter_per_gw", "per-team scatter plots"),
+    "team":        ("team_model", "team expected goals / clean-sheet model"),
+    "chips":       ("chip_planner", "chip timing plan"),
+    "league":      ("minileague", "mini-league effective ownership / rank swings"),
+    "select":      ("feature_selection", "permutation importance + forward selection"),
+    "tune":        ("tune_hyperparams", "hyperparameter search"),
+    "compact":     ("compact_models", "model size vs MAE sweep"),
+    "bootstrap":   ("fpl_api_bootstrap", "download bootstrap-static"),
+    "gw-points":   ("fpl_api_gw_points", "download live GW points"),
+    "prices":      ("price_history", "price / ownership history and momentum"),
+    "identity":    ("player_identity", "update the cross-season player_code index"),
+    "pipeline":    ("run_pipeline", "run the stages whose inputs changed"),
+    "bench":       ("benchmark", "pipeline benchmark on synthetic data"),
+}
+
+POSITION_ALIASES = {
+    "GK": "Goalkeeper", "GKP": "Goalkeeper",
+    "DEF": "Defender",
+    "MID": "Midfielder",
+    "FWD": "Forward", "FW": "Forward",
+}
+POSITION_SHORT = {"Goalkeeper": "GK", "Defender": "DEF", "Midfielder": "MID", "Forward": "FWD"}
+
+
+def run_script(module_name: str, args: list[str]) -> int:
+    sys.argv = [str(SRC_DIR / f"{module_name}.py"), *args]
+    rc = importlib.import_module(module_name).main()
+    return rc if isinstance(rc, int) else 0
+
+
+############################
+# top
+############################
+
+def latest_predictions_file(gw: int | None = None) -> Path:
+    files = {}
+    for p in PRED_DIR.glob("gw*_predictions.csv"):
+        m = re.fullmatch(r"gw(\d+)_predictions\.csv", p.name)
+        if m:
+            files[int(m.group(1))] = p
+    if not files:
+        raise SystemExit(f"No gw*_predictions.csv in {PRED_DIR}; run `fpl.py predict` first.")
+    if gw is None:
+        return files[max(files)]
+    if gw not in files:
+        raise SystemExit(f"No predictions for GW{gw} (have {sorted(files)})")
+    return files[gw]
+
+
+def cmd_top(args) -> int:
+    path = latest_predictions_file(args.gw)
+    position = POSITION_ALIASES.get(args.position.upper(), args.position) if args.position else None
+    with path.open(newline="", encoding="utf-8") as fh:
+        rows = [r for r in csv.DictReader(fh) if position is None or r["position"] == position]
+    rows.sort(key=lambda r: float(r["predicted_points"] or "nan"), reverse=True)
+
+    print(f"{path.name}: top {args.n} {position or 'overall'}")
+    for i, r in enumerate(rows[:args.n], 1):
+        pos = POSITION_SHORT.get(r["position"], r["position"])
+        label = f"{r['player_name']} ({r['team_short']}, {pos})"
+        print(f"{i:>2}. {label:<30}{float(r['predicted_points']):>7.3f}")
+    return 0
+
+
+############################
+# startup benchmark
+############################
+
+def _time_cmd(cmd: list[str], repeat: int) -> float:
+    """Median wall time (ms) of a fresh interpreter running cmd."""
+    env = {**os.environ, "FPL_PROFILE": "0"}
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, cwd=SRC_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def cmd_startup(args) -> int:
+    py = sys.executable
+    cases = [("python (baseline)", [py, "-c", "pass"]),
+             ("fpl.py --help", [py, str(THIS_FILE), "--help"])]
+    if any(PRED_DIR.glob("gw*_predictions.csv")):
+        cases.append(("fpl.py top -p MID", [py, str(THIS_FILE), "top", "-p", "MID"]))
+    for name, (module, _) in SCRIPTS.items():
+        cases.append((f"import {module}", [py, "-c", f"import {module}"]))
+
+    rows = []
+    for label, cmd in cases:
+        ms = _time_cmd(cmd, args.repeat)
+        rows.append({"case": label, "median_ms": round(ms, 1)})
+        print(f"  {label:<40} {ms:8.1f} ms")
+
+    STARTUP_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with STARTUP_FILE.open("w", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=["case", "median_ms"])
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Saved to {STARTUP_FILE}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="fpl", description="FPL model command line")
+    sub = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    # listed for --help only; main() hands these straight to the script
+    for name, (_, help_text) in SCRIPTS.items():
+        sub.add_parser(name, help=help_text, add_help=False)
+
+    p = sub.add_parser("top", help="top players from the latest predictions file")
+    p.add_argument("-p", "--position", help="GK / DEF / MID / FWD (default: all)")
+    p.add_argument("-n", type=int, default=10)
+    p.add_argument("--gw", type=int, help="predictions for this GW (default: latest)")
+    p.set_defaults(func=cmd_top)
+
+    p = sub.add_parser("startup", help="time interpreter startup for each subcommand")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=cmd_startup)
+    return parser
+
+
+def main(argv=None) -> int:
+    if str(SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(SRC_DIR))
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in SCRIPTS:
+        return run_script(SCRIPTS[argv[0]][0], argv[1:])
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
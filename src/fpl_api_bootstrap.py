@@ -1,18 +1,23 @@
 # src/fpl_api_bootstrap.py
-from pathlib import Path
-import json, requests
+import requests
 
-CACHE = Path("data_processed/fpl_api_cache")
-CACHE.mkdir(parents=True, exist_ok=True)
-OUT = CACHE / "bootstrap-static.json"
+from bootstrap_cache import save_bootstrap, save_availability_snapshot, next_event_id, player_index, team_index
+from price_history import append_snapshot
 
-url = "https://fantasy.premierleague.com/api/bootstrap-static/"
-r = requests.get(url, timeout=30)
-r.raise_for_status()
-data = r.json()
-OUT.write_text(json.dumps(data, ensure_ascii=False, indent=2))
+URL = "https://fantasy.premierleague.com/api/bootstrap-static/"
 
-# tiny sanity print
-print("Saved:", OUT)
-print("players:", len(data.get("elements", [])), "teams:", len(data.get("teams", [])))
 
+def main():
+    r = requests.get(URL, timeout=30)
+    r.raise_for_status()
+    out = save_bootstrap(r.json())
+
+    # tiny sanity print
+    print("Saved:", out)
+    print("players:", len(player_index()), "teams:", len(team_index()))
+    print("Availability snapshot:", save_availability_snapshot())
+    print("Price history: appended", append_snapshot(player_index(), next_event_id()), "changed players")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
 from pathlib import Path
+import os
 import pandas as pd
 
+from profiling import profiled, profile_stage
+from schema import RAW_SCHEMA, apply_schema, memory_mb
+from validate_sources import SOURCE_SCHEMAS, require_columns
+
 
 # === paths ===
 # This file lives in:    fpl-model/src/ingest.py
@@ -14,21 +19,15 @@ OUT_DIR = PROJECT_ROOT / "data_processed"
 OUT_FILE = OUT_DIR / "training_base_raw.csv"
 
 
-def load_all_player_gameweek_stats():
+def iter_gameweek_files():
     """
     Walk all seasons under DATA_ROOT, e.g.:
         data/2024-2025/By Gameweek/GW1/player_gameweek_stats.csv
         data/2025-2026/By Gameweek/GW2/player_gameweek_stats.csv
-    For every CSV found:
-      - read it
-      - add 'season' and 'gameweek' columns
-    Return one big DataFrame.
+    Yield (season_name, gw_num, csv_path) in season / gameweek order.
     """
-
-    frames = []
-
     # loop over seasons like "2024-2025", "2025-2026", etc.
-    for season_dir in DATA_ROOT.iterdir():
+    for season_dir in sorted(DATA_ROOT.iterdir()):
         if not season_dir.is_dir():
             continue
 
@@ -40,6 +39,7 @@ def load_all_player_gameweek_stats():
             continue
 
         # inside "By Gameweek" we expect folders like "GW1", "GW2", ...
+        gw_dirs = []
         for gw_dir in by_gw_dir.iterdir():
             if not gw_dir.is_dir():
                 continue
@@ -52,20 +52,36 @@ def load_all_player_gameweek_stats():
                 gw_num = int(gw_dir.name[2:])
             except ValueError:
                 continue
+            gw_dirs.append((gw_num, gw_dir))
 
+        for gw_num, gw_dir in sorted(gw_dirs):
             csv_path = gw_dir / "player_gameweek_stats.csv"
             if not csv_path.is_file():
                 # some gameweeks might be missing this file
                 continue
+            yield season_name, gw_num, csv_path
+
 
-            df = pd.read_csv(csv_path)
+def iter_player_gameweek_frames():
+    """One DataFrame per gameweek file, with 'season' and 'gameweek' columns added."""
+    required = SOURCE_SCHEMAS["player_gameweek_stats"]["required"]
+    for season_name, gw_num, csv_path in iter_gameweek_files():
+        df = pd.read_csv(csv_path)
+        if not require_columns(df.columns, required, csv_path):
+            continue
 
-            # add context columns
-            df["season"] = season_name
-            df["gameweek"] = gw_num
+        # add context columns
+        df["season"] = season_name
+        df["gameweek"] = gw_num
+        yield df
 
-            frames.append(df)
 
+@profiled()
+def load_all_player_gameweek_stats():
+    """
+    Every gameweek file in one DataFrame (in memory; main() streams to disk instead).
+    """
+    frames = list(iter_player_gameweek_frames())
     if not frames:
         raise RuntimeError(
             f"No player_gameweek_stats.csv files found under {DATA_ROOT}. "
@@ -78,28 +94,79 @@ def load_all_player_gameweek_stats():
     return big_df
 
 
+def _column_union():
+    """Pass 1: header rows only. Columns in first-seen order, plus season / gameweek."""
+    cols = {}
+    n_files = 0
+    for _, _, csv_path in iter_gameweek_files():
+        cols.update(dict.fromkeys(pd.read_csv(csv_path, nrows=0).columns))
+        n_files += 1
+    cols.update(dict.fromkeys(["season", "gameweek"]))
+    return list(cols), n_files
+
+
+def _normalize_chunk(df: pd.DataFrame, columns) -> pd.DataFrame:
+    """
+    Same columns in every chunk, compact dtypes. Integer columns that hold NaN in
+    this chunk become nullable ints so they're written as '3' (not '3.0') like
+    in the chunks without NaN.
+    """
+    df = apply_schema(df.reindex(columns=columns), RAW_SCHEMA)
+    for col, dtype in RAW_SCHEMA.items():
+        if dtype.startswith("int") and col in df.columns and df[col].isna().any():
+            df[col] = df[col].astype(dtype.capitalize())
+    return df
+
+
+def stream_player_gameweek_stats(out_file: Path = OUT_FILE) -> dict:
+    """
+    Two passes over the gameweek files; only one gameweek is in memory at a time:
+      1. read headers to get the union of columns (files differ between seasons)
+      2. read each file, normalize to that column set + RAW_SCHEMA, append to a
+         temp CSV; the temp file replaces out_file only once everything is written.
+    Returns a small summary (rows, per season gameweeks, peak chunk memory).
+    """
+    with profile_stage("stream_player_gameweek_stats") as rec:
+        columns, n_files = _column_union()
+        if not n_files:
+            raise RuntimeError(
+                f"No player_gameweek_stats.csv files found under {DATA_ROOT}. "
+                "Check that DATA_ROOT is correct."
+            )
+
+        out_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = out_file.with_name(out_file.name + ".tmp")
+        summary = {"rows": 0, "files": n_files, "columns": len(columns),
+                   "gameweeks": {}, "peak_chunk_mb": 0.0}
+        try:
+            with tmp_file.open("w", newline="") as fh:
+                for i, df in enumerate(iter_player_gameweek_frames()):
+                    df = _normalize_chunk(df, columns)
+                    df.to_csv(fh, header=(i == 0), index=False)
+
+                    season = str(df["season"].iloc[0]) if len(df) else "?"
+                    summary["gameweeks"].setdefault(season, []).append(int(df["gameweek"].iloc[0]) if len(df) else None)
+                    summary["rows"] += len(df)
+                    summary["peak_chunk_mb"] = max(summary["peak_chunk_mb"], memory_mb(df))
+            os.replace(tmp_file, out_file)
+        finally:
+            tmp_file.unlink(missing_ok=True)
+        rec["rows"] = summary["rows"]
+    return summary
+
+
 def main():
-    # load + merge everything
-    df = load_all_player_gameweek_stats()
+    # stream every gameweek file into OUT_FILE, one file at a time
+    summary = stream_player_gameweek_stats(OUT_FILE)
 
     # quick sanity prints
-    print("Combined shape:", df.shape)
-    print("Seasons found:", sorted(df["season"].unique()))
-    # show first few unique gameweeks per season
-    preview = (
-        df[["season", "gameweek"]]
-        .drop_duplicates()
-        .sort_values(["season", "gameweek"])
-        .groupby("season")
-        .head(20)
-    )
-    print("Sample season/gameweek combos:\n", preview)
-
-    # make sure output dir exists
-    OUT_DIR.mkdir(parents=True, exist_ok=True)
-
-    # save the raw merged data
-    df.to_csv(OUT_FILE, index=False)
+    print(f"Streamed {summary['files']} gameweek files, {summary['rows']} rows, "
+          f"{summary['columns']} columns")
+    print(f"Largest chunk in memory: {summary['peak_chunk_mb']:.2f} MB")
+    print("Seasons found:", sorted(summary["gameweeks"]))
+    # show first few gameweeks per season
+    for season, gws in sorted(summary["gameweeks"].items()):
+        print(f"  {season}: GW {gws[:20]}{' ...' if len(gws) > 20 else ''}")
     print(f"Wrote {OUT_FILE}")
 
 
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Mini-league view of the next GW: effective ownership, differentials and rank swings.
+
+Rival squads come from local JSON files laid out like the FPL API paths:
+
+  data_processed/minileague/
+    leagues-classic/{league_id}/standings.json   optional, entry names
+    entry/{entry_id}/event/{gw}/picks.json       one per rival (and for us)
+
+For each entry the newest picks file at or before the target GW is used. Picks
+from an earlier GW have their one-off chip multipliers reset (bench boost, triple
+captain), since we can't know the chips a rival will play next.
+
+Everything is computed for all rivals at once on an (entries x players) matrix
+of multipliers:
+
+  eo            effective ownership = mean multiplier over the league (x100, %)
+  differential  (our multiplier - eo) * predicted points: what a player moves us
+                against the league average
+  ranks         n_sims simulated GWs. Player points ~ Poisson(predicted points x
+                a shared per-team shock) so team-mates haul together; entry
+                scores are one matmul, ranks one rankdata over the entries
+
+  python src/minileague.py --league 12345 --entry 678
+  python src/minileague.py --gw 14 --sims 20000
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import json
+import re
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata
+
+from fpl import latest_predictions_file
+from predict_next_gw import DATA_REPO_ROOT, load_player_lookup
+
+THIS_FILE = Path(__file__).resolve()
+PROJECT_ROOT = THIS_FILE.parent.parent
+LEAGUE_DIR = PROJECT_ROOT / "data_processed" / "minileague"
+
+N_SIMS = 5000
+TEAM_SHOCK_SHAPE = 4.0   # gamma shape of the per-team multiplier (mean 1, sd 0.5)
+STARTING_SLOTS = 11
+
+
+############################
+# Load
+############################
+
+def load_standings(league_id: int, root: Path = LEAGUE_DIR) -> pd.DataFrame:
+    """entry, entry_name, player_name, total, rank from leagues-classic/{id}/standings.json."""
+    path = root / "leagues-classic" / str(league_id) / "standings.json"
+    if not path.is_file():
+        raise SystemExit(f"No standings file at {path}")
+    results = json.loads(path.read_text())["standings"]["results"]
+    return pd.DataFrame(results, columns=["entry", "entry_name", "player_name", "total", "rank"])
+
+
+def picks_file(entry: int, gw: int, root: Path = LEAGUE_DIR) -> tuple[Path, int] | None:
+    """Newest entry/{entry}/event/{g}/picks.json with g <= gw, and its g."""
+    event_dir = root / "entry" / str(entry) / "event"
+    gws = [int(p.name) for p in event_dir.glob("*") if p.name.isdigit() and (p / "picks.json").is_file()]
+    gws = [g for g in gws if g <= gw]
+    if not gws:
+        return None
+    g = max(gws)
+    return event_dir / str(g) / "picks.json", g
+
+
+def load_picks(entries, gw: int, root: Path = LEAGUE_DIR) -> pd.DataFrame:
+    """
+    One row per (entry, pick): entry, element, multiplier, is_captain, picks_gw,
+    total_points (season total after picks_gw). Entries without a picks file are
+    reported and left out.
+    """
+    rows, missing = [], []
+    for entry in entries:
+        found = picks_file(int(entry), gw, root)
+        if found is None:
+            missing.append(entry)
+            continue
+        path, picks_gw = found
+        payload = json.loads(path.read_text())
+        total = (payload.get("entry_history") or {}).get("total_points", np.nan)
+        for p in payload["picks"]:
+            rows.append((int(entry), int(p["element"]), int(p["position"]), int(p["multiplier"]),
+                         bool(p.get("is_captain", False)), picks_gw, total))
+    if missing:
+        print(f"No picks at or before GW{gw} for {len(missing)} entries: {missing[:10]}")
+    picks = pd.DataFrame(rows, columns=["entry", "element", "position", "multiplier",
+                                        "is_captain", "picks_gw", "total_points"])
+
+    # carried-over squads: bench back to 0, triple captain back to 2
+    stale = picks["picks_gw"] < gw
+    picks.loc[stale & (picks["position"] > STARTING_SLOTS), "multiplier"] = 0
+    picks.loc[stale, "multiplier"] = picks.loc[stale, "multiplier"].clip(upper=2)
+    return picks
+
+
+def load_predictions(gw: int | None, season: str) -> tuple[pd.DataFrame, int]:
+    """predictions/gw{N}_predictions.csv keyed by FPL element id, and N."""
+    path = latest_predictions_file(gw)
+    n = int(re.fullmatch(r"gw(\d+)_predictions\.csv", path.name).group(1))
+    preds = pd.read_csv(path)
+    lookup = load_player_lookup(season).drop(columns=["position"])
+    preds = preds.merge(lookup, on=["player_name", "team_short"], how="inner")
+    preds = preds.drop_duplicates("player_id").rename(columns={"player_id": "element"})
+    return preds.set_index("element"), n
+
+
+def current_season() -> str:
+    return sorted(p.name for p in DATA_REPO_ROOT.iterdir() if (p / "players.csv").is_file())[-1]
+
+
+############################
+# League matrix
+############################
+
+def multiplier_matrix(picks: pd.DataFrame, entries: np.ndarray, elements: np.ndarray) -> np.ndarray:
+    """(n_entries, n_elements) float32; picks outside `elements` are ignored."""
+    row = pd.Index(entries).get_indexer(picks["entry"])
+    col = pd.Index(elements).get_indexer(picks["element"])
+    ok = (row >= 0) & (col >= 0)
+    M = np.zeros((len(entries), len(elements)), dtype=np.float32)
+    M[row[ok], col[ok]] = picks["multiplier"].to_numpy()[ok]
+    return M
+
+
+def effective_ownership(M: np.ndarray, owned: np.ndarray, captained: np.ndarray) -> pd.DataFrame:
+    """Per element: owned %, captained %, effective ownership % (captaincy counted double)."""
+    return pd.DataFrame({
+        "owned_pct": owned.mean(axis=0) * 100,
+        "captain_pct": captained.mean(axis=0) * 100,
+        "eo_pct": M.mean(axis=0) * 100,
+    })
+
+
+def simulate_scores(mu: np.ndarray, team_idx: np.ndarray, M: np.ndarray,
+                    n_sims: int = N_SIMS, seed: int = 0) -> np.ndarray:
+    """(n_sims, n_entries) simulated GW scores."""
+    rng = np.random.default_rng(seed)
+    n_teams = int(team_idx.max()) + 1 if len(team_idx) else 0
+    shock = rng.gamma(TEAM_SHOCK_SHAPE, 1.0 / TEAM_SHOCK_SHAPE, size=(n_sims, n_teams))
+    pts = rng.poisson(mu[None, :] * shock[:, team_idx]).astype(np.float32)
+    return pts @ M.T
+
+
+def rank_distribution(totals: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """(n_sims, n_entries) league rank after the GW (1 = top, ties share the best rank)."""
+    return rankdata(-(totals[None, :] + scores), method="min", axis=1).astype(np.int32)
+
+
+def rank_summary(entries: pd.DataFrame, ranks: np.ndarray, scores: np.ndarray) -> pd.DataFrame:
+    now = entries["rank_now"].to_numpy()
+    out = entries.copy()
+    out["exp_points"] = scores.mean(axis=0, dtype=np.float64)
+    out["exp_rank"] = ranks.mean(axis=0)
+    for q in (10, 50, 90):
+        out[f"rank_p{q}"] = np.percentile(ranks, q, axis=0)
+    out["p_rise"] = (ranks < now[None, :]).mean(axis=0)
+    out["p_fall"] = (ranks > now[None, :]).mean(axis=0)
+    out["p_top"] = (ranks == 1).mean(axis=0)
+    return out.sort_values("exp_rank")
+
+
+############################
+# Main
+############################
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mini-league effective ownership / differentials / rank swings")
+    parser.add_argument("--league", type=int, help="leagues-classic id (default: every entry under entry/)")
+    parser.add_argument("--entry", type=int, help="our entry id, for the differentials table")
+    parser.add_argument("--gw", type=int, help="predictions GW (default: latest predictions file)")
+    parser.add_argument("--season", help="season folder for the element id lookup (default: latest)")
+    parser.add_argument("--dir", type=Path, default=LEAGUE_DIR)
+    parser.add_argument("--sims", type=int, default=N_SIMS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-n", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    preds, gw = load_predictions(args.gw, args.season or current_season())
+
+    if args.league is not None:
+        standings = load_standings(args.league, args.dir)
+        entry_ids = standings["entry"].tolist()
+    else:
+        standings = None
+        entry_ids = sorted(int(p.name) for p in (args.dir / "entry").glob("*") if p.name.isdigit())
+    if args.entry is not None and args.entry not in entry_ids:
+        entry_ids.append(args.entry)
+    picks = load_picks(entry_ids, gw, args.dir)
+    if picks.empty:
+        raise SystemExit(f"No picks found under {args.dir / 'entry'}")
+
+    # league table before the GW
+    entries = picks.groupby("entry", sort=False).agg(total=("total_points", "first"), picks_gw=("picks_gw", "first"))
+    if standings is not None:
+        entries = entries.join(standings.set_index("entry")[["entry_name", "player_name", "total"]],
+                               rsuffix="_standings")
+        entries["total"] = entries["total_standings"].fillna(entries["total"])
+        entries = entries.drop(columns="total_standings")
+    entries["total"] = entries["total"].fillna(0)
+    entries["rank_now"] = rankdata(-entries["total"].to_numpy(), method="min").astype(int)
+    entries = entries.reset_index()
+
+    # every predicted or owned element; owned without a prediction (ruled out / unknown) -> 0 points
+    elements = np.union1d(picks["element"].unique(), preds.index.to_numpy())
+    mu = preds["predicted_points"].reindex(elements).fillna(0.0).clip(lower=0).to_numpy()
+    team = preds["team_short"].reindex(elements).fillna("?")
+    team_idx = pd.factorize(team)[0]
+
+    M = multiplier_matrix(picks, entries["entry"].to_numpy(), elements)
+    owned = multiplier_matrix(picks.assign(multiplier=1), entries["entry"].to_numpy(), elements)
+    captained = multiplier_matrix(picks.assign(multiplier=picks["is_captain"].astype(int)),
+                                  entries["entry"].to_numpy(), elements)
+
+    eo = effective_ownership(M, owned, captained)
+    eo.insert(0, "element", elements)
+    eo.insert(1, "player_name", preds["player_name"].reindex(elements).to_numpy())
+    eo.insert(2, "team_short", team.to_numpy())
+    eo["predicted_points"] = mu
+
+    scores = simulate_scores(mu, team_idx, M, args.sims, args.seed)
+    ranks = rank_distribution(entries["total"].to_numpy(dtype=np.float32), scores)
+    table = rank_summary(entries, ranks, scores)
+    print(f"GW{gw}: {len(entries)} entries, {len(elements)} players, {args.sims} sims "
+          f"in {time.perf_counter() - t0:.2f}s")
+
+    print("\nHighest effective ownership:")
+    print(eo.nlargest(args.n, "eo_pct").round(1).to_string(index=False))
+
+    out_dir = args.dir / "reports"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tag = f"league{args.league}" if args.league is not None else "entries"
+
+    if args.entry is not None:
+        me = entries.index[entries["entry"] == args.entry]
+        if len(me):
+            i = int(me[0])
+            eo["our_multiplier"] = M[i]
+            eo["differential"] = (M[i] - eo["eo_pct"] / 100) * mu
+            # ~ how many points each entry gains on us per sim
+            swing = scores[:, i:i + 1] - scores
+            print(f"\nEntry {args.entry}: rank now {entries.loc[i, 'rank_now']}, "
+                  f"expected {ranks[:, i].mean():.1f}, P(rise) {(ranks[:, i] < entries.loc[i, 'rank_now']).mean():.2f}, "
+                  f"mean points vs league {swing.mean():+.2f}")
+            print("\nOur differentials (owned, gain vs league):")
+            print(eo[eo["our_multiplier"] > 0].nlargest(args.n, "differential").round(2).to_string(index=False))
+            print("\nBiggest threats (not owned, highly owned by the league):")
+            print(eo[eo["our_multiplier"] == 0].nsmallest(args.n, "differential").round(2).to_string(index=False))
+            print("\nBest differentials to bring in:")
+            cand = eo[eo["our_multiplier"] == 0].assign(differential=lambda d: (1 - d["eo_pct"] / 100) * d["predicted_points"])
+            print(cand.nlargest(args.n, "differential").round(2).to_string(index=False))
+        else:
+            print(f"\nEntry {args.entry} has no picks file; skipping differentials")
+
+    print("\nRank swings:")
+    print(table.head(args.n * 2).round(2).to_string(index=False))
+
+    eo.to_csv(out_dir / f"{tag}_gw{gw}_eo.csv", index=False)
+    table.to_csv(out_dir / f"{tag}_gw{gw}_ranks.csv", index=False)
+    print(f"\nWrote {out_dir / f'{tag}_gw{gw}_eo.csv'} and {out_dir / f'{tag}_gw{gw}_ranks.csv'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
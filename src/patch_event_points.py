@@ -3,6 +3,8 @@ from pathlib import Path
 import re
 import pandas as pd
 
+from schema import RAW_SCHEMA, apply_schema, read_table
+
 # ----- anchor paths to repo root -----
 THIS_FILE = Path(__file__).resolve()
 PROJECT_ROOT = THIS_FILE.parent.parent
@@ -21,7 +23,7 @@ def main():
     if not POINTS_DIR.is_dir():
         raise SystemExit(f"Missing points dir: {POINTS_DIR}")
 
-    df = pd.read_csv(IN_TRAIN)
+    df = read_table(IN_TRAIN, RAW_SCHEMA)
 
     # limit to current season only
     current_season = detect_current_season(df)
@@ -55,13 +57,14 @@ def main():
             idx = cur.index[need_update]                         # indices within the masked frame
             target_idx = df.loc[df_cur_mask].iloc[idx].index     # map back to original df indices
             df.loc[target_idx, "event_points_orig"] = df.loc[target_idx, "event_points"]
-            df.loc[target_idx, "event_points"] = cur.loc[need_update, "api_points"].astype(int).values
+            df.loc[target_idx, "event_points"] = cur.loc[need_update, "api_points"].astype(df["event_points"].dtype).values
 
         total_with_api += gw_with_api
         total_updated += gw_updates
         print(f"GW{gw}: rows with API data = {gw_with_api}, updated (0 -> API) = {gw_updates}")
 
-    # atomic overwrite
+    # atomic overwrite (keep the compact dtypes)
+    df = apply_schema(df, RAW_SCHEMA)
     tmp = IN_TRAIN.with_suffix(".tmp.csv")
     df.to_csv(tmp, index=False)
     tmp.replace(IN_TRAIN)
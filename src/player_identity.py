@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Cross-season player identity: (season, player_id) -> player_code.
+
+FPL element ids are re-issued every season. The player code (players.csv
+player_code / code, bootstrap-static `code`) stays with the player, so it's the
+key the rolling features follow across seasons.
+
+  data_processed/player_identity/
+    index.csv       season, player_id, player_code, web_name
+    manifest.json   fingerprint of the files each season was read from
+
+The index is updated incrementally: a season is re-read only when its
+players.csv (or, for the latest season, the bootstrap player index used to fill
+missing codes) changed since the last run. Bootstrap codes are only used when its
+web_names agree with that season's players.csv, so a stale payload is ignored.
+
+player_key() gives one int64 key per person for rows of any season: the player
+code where known, otherwise a negative season-local key, so a player without a
+code still gets a history (reset every season, as before).
+
+  python src/player_identity.py     # update the index + summary
+"""
+
+from __future__ import annotations
+from functools import lru_cache
+from pathlib import Path
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from bootstrap_cache import PLAYERS_FILE, RAW_FILE, player_index
+from validate_sources import fingerprint, warn_source
+
+THIS_FILE = Path(__file__).resolve()
+PROJECT_ROOT = THIS_FILE.parent.parent
+DATA_REPO_ROOT = Path("/home/mann-gandhi/FPL-Elo-Insights-data/data")
+INDEX_DIR = PROJECT_ROOT / "data_processed" / "player_identity"
+INDEX_FILE = INDEX_DIR / "index.csv"
+MANIFEST_FILE = INDEX_DIR / "manifest.json"
+
+INDEX_COLUMNS = ["season", "player_id", "player_code", "web_name"]
+INDEX_VERSION = 1
+LOCAL_KEY_STRIDE = 1_000_000   # fallback key = -(season_rank + 1) * stride - player_id
+BOOTSTRAP_NAME_MATCH = 0.9     # share of shared player_ids whose web_name must agree with the bootstrap
+
+
+############################
+# Build / update
+############################
+
+def _season_sources(root: Path) -> dict[str, list[Path]]:
+    """season -> files its identity rows come from (players.csv; + bootstrap for the latest)."""
+    seasons = sorted(p.name for p in root.iterdir() if p.is_dir() and (p / "players.csv").is_file())
+    sources = {s: [root / s / "players.csv"] for s in seasons}
+    if seasons and PLAYERS_FILE.is_file():
+        sources[seasons[-1]].append(PLAYERS_FILE)
+    return sources
+
+
+def _read_season(season: str, players_csv: Path, bootstrap: bool) -> pd.DataFrame:
+    players = pd.read_csv(players_csv, usecols=lambda c: c in {"player_id", "player_code", "code", "web_name"})
+    if "player_id" not in players.columns:
+        warn_source(players_csv, "no player_id column, season left out of the identity index")
+        return pd.DataFrame(columns=INDEX_COLUMNS)
+
+    code_col = next((c for c in ["player_code", "code"] if c in players.columns), None)
+    codes = players[code_col] if code_col else pd.Series(np.nan, index=players.index)
+    out = pd.DataFrame({
+        "season": season,
+        "player_id": pd.to_numeric(players["player_id"], errors="coerce"),
+        "player_code": pd.to_numeric(codes, errors="coerce"),
+        "web_name": players.get("web_name", pd.Series(pd.NA, index=players.index)),
+    }).dropna(subset=["player_id"])
+
+    # fill codes players.csv lacks from the bootstrap, but only if it's the same season:
+    # element ids are re-issued, so a stale payload would hand out other players' codes
+    if bootstrap and out["player_code"].isna().any() and (PLAYERS_FILE.is_file() or RAW_FILE.is_file()):
+        boot = player_index()
+        match = name_match(out, boot["web_name"])
+        if match >= BOOTSTRAP_NAME_MATCH:
+            boot_code = out["player_id"].map(boot["code"])
+            out["player_code"] = out["player_code"].fillna(pd.to_numeric(boot_code, errors="coerce"))
+        else:
+            warn_source(players_csv, f"bootstrap web_names match only {match:.0%} of players, "
+                                     f"looks like another season; codes not filled from it")
+    return out
+
+
+def name_match(rows: pd.DataFrame, names: pd.Series) -> float:
+    """
+    Share of rows (player_id, web_name) whose web_name equals names[player_id],
+    over the ids present in both (0 if nothing to compare). names is indexed by
+    FPL element id, e.g. a bootstrap payload's web_name.
+    """
+    shared = rows[rows["player_id"].isin(names.index) & rows["web_name"].notna()]
+    if shared.empty:
+        return 0.0
+    other = shared["player_id"].map(names).astype(str).str.strip()
+    return float((shared["web_name"].astype(str).str.strip() == other).mean())
+
+
+def _empty_index() -> pd.DataFrame:
+    return pd.DataFrame({
+        "season": pd.Series(dtype=str),
+        "player_id": pd.Series(dtype="int64"),
+        "player_code": pd.Series(dtype="Int64"),
+        "web_name": pd.Series(dtype=object),
+    })
+
+
+def update_index(root: Path | None = None) -> tuple[pd.DataFrame, dict]:
+    """
+    Re-read only the seasons whose sources changed; returns (index, stats).
+    root defaults to DATA_REPO_ROOT as it is at call time. A missing root gives an
+    empty index and leaves the stored one alone.
+    """
+    root = Path(root or DATA_REPO_ROOT)
+    if not root.is_dir():
+        warn_source(root, "data folder not found, identity index is empty")
+        return _empty_index(), {"seasons": 0, "read": 0, "cached": 0}
+    sources = _season_sources(root)
+    manifest, index = {}, pd.DataFrame(columns=INDEX_COLUMNS)
+    if MANIFEST_FILE.is_file() and INDEX_FILE.is_file():
+        stored = json.loads(MANIFEST_FILE.read_text())
+        if stored.get("version") == INDEX_VERSION:
+            manifest = stored.get("seasons", {})
+            index = pd.read_csv(INDEX_FILE, dtype={"season": str})
+
+    new_manifest, parts = {}, []
+    stats = {"seasons": len(sources), "read": 0, "cached": 0}
+    for season, paths in sources.items():
+        fps = {str(p): fingerprint(p) for p in paths}
+        if manifest.get(season) == fps:
+            parts.append(index[index["season"] == season])
+            stats["cached"] += 1
+        else:
+            parts.append(_read_season(season, paths[0], bootstrap=len(paths) > 1))
+            stats["read"] += 1
+        new_manifest[season] = fps
+
+    index = pd.concat(parts, ignore_index=True) if parts else _empty_index()
+    index["player_id"] = index["player_id"].astype("int64")
+    index["player_code"] = index["player_code"].astype("Int64")
+
+    if stats["read"] or set(manifest) != set(new_manifest):
+        INDEX_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = INDEX_FILE.with_name(INDEX_FILE.name + ".tmp")
+        index[INDEX_COLUMNS].to_csv(tmp, index=False)
+        tmp.replace(INDEX_FILE)
+        MANIFEST_FILE.write_text(json.dumps({"version": INDEX_VERSION, "seasons": new_manifest}))
+    return index, stats
+
+
+def identity_index(root: Path | None = None) -> pd.DataFrame:
+    return _identity_index(Path(root or DATA_REPO_ROOT))
+
+
+@lru_cache(maxsize=4)
+def _identity_index(root: Path) -> pd.DataFrame:
+    return update_index(root)[0]
+
+
+def season_matches(season: str, names: pd.Series, root: Path | None = None) -> bool:
+    """True if names (web_name by element id) agree with that season's players.csv."""
+    index = identity_index(root)
+    rows = index[index["season"].astype(str) == str(season)]
+    return name_match(rows, names) >= BOOTSTRAP_NAME_MATCH
+
+
+def code_map(root: Path | None = None) -> pd.DataFrame:
+    """season, player_id, player_code for every row with a known code."""
+    index = identity_index(root)
+    out = index.loc[index["player_code"].notna(), ["season", "player_id", "player_code"]]
+    return out.astype({"player_code": "int64"}).reset_index(drop=True)
+
+
+############################
+# Keys
+############################
+
+def player_key(season: pd.Series, player_id: pd.Series, root: Path | None = None) -> pd.Series:
+    """int64 person key per row: player_code, or a negative season-local key if unknown."""
+    season = season.astype(str)
+    pid = pd.to_numeric(player_id, errors="coerce").astype("int64")
+    codes = code_map(root)
+    lookup = pd.Series(codes["player_code"].to_numpy(),
+                       index=pd.MultiIndex.from_arrays([codes["season"].astype(str), codes["player_id"]]))
+    lookup = lookup[~lookup.index.duplicated()]
+    code = lookup.reindex(pd.MultiIndex.from_arrays([season, pid])).to_numpy(dtype=float)
+
+    ranks = {s: i for i, s in enumerate(sorted(set(season) | set(codes["season"].astype(str))))}
+    local = -(season.map(ranks).to_numpy(dtype=np.int64) + 1) * LOCAL_KEY_STRIDE - pid.to_numpy()
+    key = np.where(np.isnan(code), local, np.nan_to_num(code)).astype(np.int64)
+    return pd.Series(key, index=season.index, name="player_key")
+
+
+def main():
+    t0 = time.perf_counter()
+    index, stats = update_index()
+    print(f"Identity index: {len(index)} rows over {stats['seasons']} seasons "
+          f"({stats['read']} read, {stats['cached']} cached) in {time.perf_counter() - t0:.2f}s")
+    if index.empty:
+        return 0
+
+    known = index[index["player_code"].notna()]
+    per_code = known.groupby("player_code")["season"].nunique()
+    print(f"  with a player code: {len(known)} / {len(index)}")
+    print(f"  distinct players: {per_code.size}, in more than one season: {int((per_code > 1).sum())}")
+    dup = known.duplicated(["season", "player_code"], keep=False)
+    if dup.any():
+        print(f"  {int(dup.sum())} rows share a code within a season (their rolling histories are merged):")
+        print(known[dup].head(10).to_string(index=False))
+    print(f"Index: {INDEX_FILE}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
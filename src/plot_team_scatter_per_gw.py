@@ -5,16 +5,29 @@ produce an Actual-vs-Predicted scatter plot labeled with player names.
 
 Outputs:
   data_processed/plots/gw{N}/gw{N}_{TEAM}_actual_vs_pred.png
+  data_processed/plots/render_manifest.json   (content hash per rendered plot)
+
+Plots are rendered across a process pool with the non-interactive Agg backend.
+A team/GW plot is only redrawn when the hash of its input rows changed or the PNG
+is missing, so a partially failed GW gets completed on the next run and an updated
+error-analysis file re-renders just the teams that changed.
 """
 
 from __future__ import annotations
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import hashlib
+import json
+import os
 import re
 import sys
 import math
 import unicodedata
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")  # headless; must happen before pyplot import
 import matplotlib.pyplot as plt
 
 # ---------- repo paths ----------
@@ -22,6 +35,16 @@ THIS = Path(__file__).resolve()
 ROOT = THIS.parent.parent
 PRED_ERR_DIR = ROOT / "data_processed" / "error_analysis"
 OUT_BASE = ROOT / "data_processed" / "plots"
+MANIFEST_FILE = OUT_BASE / "render_manifest.json"
+
+# Bump when the plot layout changes so every figure gets redrawn once.
+RENDER_VERSION = 1
+HASH_COLS = ["player_name", "predicted_points", "event_points"]
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# one figure per worker process, created in _init_worker and reused for every plot
+_FIG = None
+_AX = None
 
 # ---------- helpers ----------
 def _gw_from_name(p: Path) -> int:
@@ -43,22 +66,55 @@ def _compute_limits(x: np.ndarray, y: np.ndarray, pad: float = 0.5) -> tuple[flo
     # Expand a bit so labels/points don’t sit on the border
     return (math.floor(lo - pad), math.ceil(hi + pad))
 
+def _rows_hash(df_team: pd.DataFrame) -> str:
+    """Content hash of the rows that end up on a team's plot."""
+    payload = df_team[HASH_COLS].sort_values(HASH_COLS).to_csv(index=False)
+    h = hashlib.sha1(f"v{RENDER_VERSION}\n".encode())
+    h.update(payload.encode("utf-8"))
+    return h.hexdigest()
+
+def _load_manifest() -> dict:
+    if not MANIFEST_FILE.is_file():
+        return {}
+    try:
+        return json.loads(MANIFEST_FILE.read_text())
+    except (json.JSONDecodeError, OSError):
+        # a corrupt manifest just means everything gets redrawn
+        return {}
+
+def _save_manifest(manifest: dict):
+    OUT_BASE.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST_FILE.with_suffix(".tmp.json")
+    tmp.write_text(json.dumps(manifest, sort_keys=True))
+    tmp.replace(MANIFEST_FILE)
+
+def _init_worker():
+    global _FIG, _AX
+    _FIG, _AX = plt.subplots(figsize=(6.4, 6.4))
+
 def _plot_team(df_team: pd.DataFrame, gw: int, team: str, out_dir: Path):
     x = df_team["predicted_points"].to_numpy(dtype=float)
     y = df_team["event_points"].to_numpy(dtype=float)
     names = df_team["player_name"].astype(str).tolist()
+    out_path = out_dir / f"gw{gw}_{_safe_tag(team)}_actual_vs_pred.png"
+    return _render(x, y, names, gw, team, out_path)
+
+def _render(x: np.ndarray, y: np.ndarray, names: list[str], gw: int, team: str, out_path: Path):
+    if _FIG is None:
+        _init_worker()
+    ax = _AX
+    ax.clear()
 
     lo, hi = _compute_limits(x, y, pad=0.5)
 
-    plt.figure(figsize=(6.4, 6.4))
-    plt.scatter(x, y, alpha=0.7)
+    ax.scatter(x, y, alpha=0.7)
 
     # y = x reference line
-    plt.plot([lo, hi], [lo, hi])
+    ax.plot([lo, hi], [lo, hi])
 
     # Annotate each point with player name (a small offset to reduce overlap)
     for xi, yi, name in zip(x, y, names):
-        plt.annotate(
+        ax.annotate(
             name,
             (xi, yi),
             textcoords="offset points",
@@ -66,42 +122,29 @@ def _plot_team(df_team: pd.DataFrame, gw: int, team: str, out_dir: Path):
             fontsize=8,
         )
 
-    plt.xlim(lo, hi)
-    plt.ylim(lo, hi)
-    plt.xlabel("Predicted points")
-    plt.ylabel("Actual points")
-    plt.title(f"GW{gw} — {team}: Actual vs Predicted")
-    plt.tight_layout()
+    ax.set_xlim(lo, hi)
+    ax.set_ylim(lo, hi)
+    ax.set_xlabel("Predicted points")
+    ax.set_ylabel("Actual points")
+    ax.set_title(f"GW{gw} — {team}: Actual vs Predicted")
+    _FIG.tight_layout()
 
-    out_path = out_dir / f"gw{gw}_{_safe_tag(team)}_actual_vs_pred.png"
-    plt.savefig(out_path, dpi=180)
-    plt.close()
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    _FIG.savefig(out_path, dpi=180)
     return out_path
 
-# ---------- main ----------
-def main():
-    if not PRED_ERR_DIR.exists():
-        print(f"ERROR: missing directory {PRED_ERR_DIR}", file=sys.stderr)
-        return 1
-
-    files = sorted(
-        [p for p in PRED_ERR_DIR.glob("gw*_pred_vs_actual.csv") if p.is_file()],
-        key=lambda p: _gw_from_name(p),
-    )
-    if not files:
-        print(f"No files like gw*_pred_vs_actual.csv found in {PRED_ERR_DIR}")
-        return 0
+def _render_job(job: dict):
+    """Worker entry point: job carries plain arrays so it pickles cheaply."""
+    out_path = _render(job["x"], job["y"], job["names"], job["gw"], job["team"], job["out_path"])
+    return job["key"], job["hash"], out_path, len(job["names"])
 
+def collect_jobs(files: list[Path], manifest: dict, force: bool = False) -> list[dict]:
+    """Build render jobs for every team/GW whose rows changed since the last render."""
+    jobs = []
     for fpath in files:
         gw = _gw_from_name(fpath)
         out_dir = OUT_BASE / f"gw{gw}"
 
-        # --- NEW: skip this GW entirely if its folder already exists ---
-        if out_dir.exists():
-            print(f"[GW{gw}] Output folder {out_dir.relative_to(ROOT)} already exists; skipping.")
-            continue
-        # ---------------------------------------------------------------
-
         df = pd.read_csv(fpath)
 
         # Basic sanity columns (as produced by your earlier script)
@@ -111,21 +154,106 @@ def main():
             print(f"[GW{gw}] Skipping {fpath.name}: missing columns {sorted(missing)}")
             continue
 
-        out_dir.mkdir(parents=True, exist_ok=True)
-
-        teams = sorted(df["team_short"].dropna().unique())
-        if not teams:
+        df = df[df["team_short"].notna()]
+        if df.empty:
             print(f"[GW{gw}] No teams found in {fpath.name}; skipping.")
             continue
 
-        print(f"[GW{gw}] {fpath.name} → {out_dir.relative_to(ROOT)} (teams: {len(teams)})")
-        for team in teams:
-            df_team = df[df["team_short"] == team].copy()
-            if df_team.empty:
+        n_before = len(jobs)
+        n_teams = 0
+        for team, df_team in df.groupby("team_short", sort=True):
+            n_teams += 1
+            team = str(team)
+            key = f"gw{gw}/{_safe_tag(team)}"
+            out_path = out_dir / f"gw{gw}_{_safe_tag(team)}_actual_vs_pred.png"
+            digest = _rows_hash(df_team)
+            if not force and manifest.get(key) == digest and out_path.is_file():
+                continue
+            jobs.append({
+                "key": key,
+                "hash": digest,
+                "gw": gw,
+                "team": team,
+                "x": df_team["predicted_points"].to_numpy(dtype=float),
+                "y": df_team["event_points"].to_numpy(dtype=float),
+                "names": df_team["player_name"].astype(str).tolist(),
+                "out_path": out_path,
+            })
+
+        n_new = len(jobs) - n_before
+        if n_new:
+            print(f"[GW{gw}] {fpath.name}: {n_new}/{n_teams} team plots to render")
+        else:
+            print(f"[GW{gw}] {fpath.name}: all {n_teams} team plots up to date")
+    return jobs
+
+def render_jobs(jobs: list[dict], manifest: dict, workers: int) -> int:
+    """Render jobs (in a process pool when workers > 1); returns number of failures."""
+    failures = 0
+    if workers <= 1:
+        for job in jobs:
+            try:
+                key, digest, out_path, n = _render_job(job)
+            except Exception as exc:  # keep going, the next run retries this plot
+                failures += 1
+                print(f"  [!] {job['key']} failed: {exc}")
+                continue
+            manifest[key] = digest
+            print(f"  - {out_path.relative_to(ROOT)}  (n={n})")
+        return failures
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(_render_job, job): job for job in jobs}
+        for fut in as_completed(futures):
+            job = futures[fut]
+            try:
+                key, digest, out_path, n = fut.result()
+            except Exception as exc:
+                failures += 1
+                print(f"  [!] {job['key']} failed: {exc}")
                 continue
-            out_path = _plot_team(df_team, gw, team, out_dir)
-            print(f"  - {team}: {out_path.relative_to(ROOT)}  (n={len(df_team)})")
+            manifest[key] = digest
+            print(f"  - {out_path.relative_to(ROOT)}  (n={n})")
+    return failures
+
+# ---------- main ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"render processes (default: {DEFAULT_WORKERS}; 1 = serial)")
+    parser.add_argument("--force", action="store_true",
+                        help="redraw every plot regardless of the manifest")
+    args = parser.parse_args(argv)
+
+    if not PRED_ERR_DIR.exists():
+        print(f"ERROR: missing directory {PRED_ERR_DIR}", file=sys.stderr)
+        return 1
 
+    files = sorted(
+        [p for p in PRED_ERR_DIR.glob("gw*_pred_vs_actual.csv") if p.is_file()],
+        key=lambda p: _gw_from_name(p),
+    )
+    if not files:
+        print(f"No files like gw*_pred_vs_actual.csv found in {PRED_ERR_DIR}")
+        return 0
+
+    manifest = _load_manifest()
+    jobs = collect_jobs(files, manifest, force=args.force)
+    if not jobs:
+        print("Nothing to render.")
+        return 0
+
+    workers = max(1, min(args.workers, len(jobs)))
+    print(f"Rendering {len(jobs)} plots with {workers} worker(s)...")
+    try:
+        failures = render_jobs(jobs, manifest, workers)
+    finally:
+        # persist whatever finished, so a crash mid-run doesn't lose completed work
+        _save_manifest(manifest)
+
+    if failures:
+        print(f"{failures} plot(s) failed; rerun to retry them.", file=sys.stderr)
+        return 1
     return 0
 
 if __name__ == "__main__":
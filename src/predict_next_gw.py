@@ -1,7 +1,24 @@
 from pathlib import Path
+import argparse
+import os
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingClassifier
+
+from profiling import profiled, profile_stage
+from schema import RAW_SCHEMA, FEATURE_SCHEMA, read_table
+from validate_sources import SOURCE_SCHEMAS, require_columns
+from features_with_fixture import (
+    SEASON_CONTEXT_FEATURES, add_season_context, aggregate_team_gw_fixtures, attach_team_gw_fixtures,
+    premier_league_fixtures, build_player_code_map, team_expectations, CARRY_FORM, rolling_key, past_rolling,
+)
+from team_model import TEAM_FEATURES, attach_team_expectations
+from fast_forest import compile_model, validate
+from blend import MODEL_NAMES, blend_predict, load_blend_config, load_blend_weights
+from bootstrap_cache import availability_snapshot
+from player_identity import season_matches
+import train_with_fixture as twf
 
 THIS_FILE = Path(__file__).resolve()
 PROJECT_ROOT = THIS_FILE.parent.parent
@@ -12,19 +29,49 @@ TRAIN_TABLE_WITH_FIXTURE = PROJECT_ROOT / "data_processed" / "training_table_wit
 
 PLAYER_ID_COL = "id"
 
+# Train on every season in the history (plus season-aware features) instead of
+# the current season only. Helps most in the first few GWs of a season.
+MULTI_SEASON = False
+RF_MAX_SAMPLES_MULTI = 0.3  # per-tree bootstrap fraction once the row count grows
+
+# "single":       one RF for every player
+# "per_position": one RF per position, trained concurrently, rows routed by position.
+#                 Positions with fewer than MIN_POSITION_ROWS training rows (or rows
+#                 with no known position) fall back to a pooled model.
+# "two_stage":    HistGBDT classifiers for P(minutes >= 1) and P(minutes >= 60), then an
+#                 RF trained only on rows where the player featured;
+#                 predicted_points = P(play) * E[points | played].
+# "blend":        Ridge + RF + HistGBDT combined with the per-position weights
+#                 train_with_fixture.py learned (data_processed/models/blend_weights.json),
+#                 refit with the feature set and params stored there.
+MODEL_MODE = "single"
+POSITIONS = ["Goalkeeper", "Defender", "Midfielder", "Forward"]
+MIN_POSITION_ROWS = 200
+
+# Single mode: score next-GW rows with the flattened forest (fast_forest.py) and
+# export it to data_processed/models/ for what-if / Monte Carlo scoring.
+# --check-fast also runs sklearn's predict to confirm the two match bit for bit.
+FAST_INFERENCE = False
+MODELS_DIR = PROJECT_ROOT / "data_processed" / "models"
+
+# Injury / suspension news (bootstrap_cache.availability_snapshot): unavailable
+# players are dropped and predicted_points is scaled by the chance of playing.
+AVAILABILITY = True
+
 ############################
 # Helpers to load base data
 ############################
 
 def load_training_history():
     """The historical training table (with fixture difficulty) we already built."""
-    df_hist = pd.read_csv(TRAIN_TABLE_WITH_FIXTURE)
+    df_hist = read_table(TRAIN_TABLE_WITH_FIXTURE, FEATURE_SCHEMA)
     df_hist["gameweek"] = df_hist["gameweek"].astype(int)
     return df_hist
 
+@profiled()
 def load_raw_player_rows():
     """Per-player per-finished-GW rows from ingest.py output."""
-    df = pd.read_csv(RAW_FILE)
+    df = read_table(RAW_FILE, RAW_SCHEMA)
     df["gameweek"] = df["gameweek"].astype(int)
     return df
 
@@ -39,7 +86,7 @@ def build_player_team_map():
         if not players_csv.is_file():
             continue
         players_df = pd.read_csv(players_csv)
-        if "player_id" not in players_df.columns or "team_code" not in players_df.columns:
+        if not require_columns(players_df.columns, ["player_id", "team_code", "position"], players_csv):
             continue
         tmp = players_df[["player_id", "team_code", "position"]].copy()
         tmp["season"] = season_name
@@ -49,6 +96,15 @@ def build_player_team_map():
     out["team_code"] = pd.to_numeric(out["team_code"], errors="coerce")
     return out
 
+def attach_position(df):
+    """Add 'position' from players.csv (per season), used to route per-position models."""
+    ptm = build_player_team_map().rename(columns={"player_id": PLAYER_ID_COL})
+    return df.drop(columns=["position"], errors="ignore").merge(
+        ptm[["season", PLAYER_ID_COL, "position"]],
+        on=["season", PLAYER_ID_COL],
+        how="left"
+    )
+
 def build_opponent_strength_lookup():
     """(season, team_code) -> opp_strength_defence_home/away from teams.csv"""
     rows = []
@@ -61,7 +117,7 @@ def build_opponent_strength_lookup():
             continue
         teams_df = pd.read_csv(teams_csv)
         needed = ["code", "short_name", "strength_defence_home", "strength_defence_away"]
-        if not all(c in teams_df.columns for c in needed):
+        if not require_columns(teams_df.columns, needed, teams_csv):
             continue
         tmp = teams_df[needed].copy()
         tmp["season"] = season_name
@@ -79,8 +135,8 @@ def build_fixture_table():
     """
     Build long fixture table:
       season, gameweek, team_code, opp_code, is_home, team_elo, opp_elo
-    Only keep Premier League fixtures for a given GW.
-    Some GWs don't have 'tournament' column; fallback: check match_id contains 'prem'.
+    Only keep Premier League fixtures for a given GW (see
+    features_with_fixture.premier_league_fixtures for the fallbacks).
     """
     rows = []
     for season_dir in DATA_REPO_ROOT.iterdir():
@@ -106,15 +162,10 @@ def build_fixture_table():
                 continue
             fx = pd.read_csv(fixtures_csv)
 
+            if not require_columns(fx.columns, SOURCE_SCHEMAS["fixtures"]["required"], fixtures_csv):
+                continue
             # Filter to Premier League only
-            if "tournament" in fx.columns:
-                fx_pl = fx[fx["tournament"].astype(str).str.contains("prem", case=False, na=False)].copy()
-            else:
-                # fallback: use match_id string
-                if "match_id" in fx.columns:
-                    fx_pl = fx[fx["match_id"].astype(str).str.contains("prem", case=False, na=False)].copy()
-                else:
-                    fx_pl = fx.copy()
+            fx_pl = premier_league_fixtures(fx, fixtures_csv)
 
             if fx_pl.empty:
                 continue
@@ -180,27 +231,28 @@ def load_player_lookup(season_name: str):
 # Build the TRAINING dataset for the model
 #########################################
 
+@profiled()
 def compute_rolling_features_for_history(df_raw):
     """
     Add historical rolling features up through each finished gameweek.
     This matches what we did in features_with_fixture.py.
     """
     df_raw = df_raw.sort_values(by=["season", PLAYER_ID_COL, "gameweek"]).copy()
+    key = rolling_key(df_raw)
 
-    g = df_raw.groupby(["season", PLAYER_ID_COL], group_keys=False)
-
-    df_raw["pts_prev_gw"] = g["event_points"].shift(1)
-    df_raw["pts_avg_last3"] = g["event_points"].shift(1).rolling(window=3, min_periods=1).mean()
-    df_raw["mins_avg_last3"] = g["minutes"].shift(1).rolling(window=3, min_periods=1).mean()
+    df_raw["pts_prev_gw"] = df_raw["event_points"].astype(float).groupby(key, sort=False).shift(1)
+    df_raw["pts_avg_last3"] = past_rolling(df_raw["event_points"], key, 3)
+    df_raw["mins_avg_last3"] = past_rolling(df_raw["minutes"], key, 3)
     played60 = (df_raw["minutes"] >= 60).astype(float)
-    df_raw["played60_rate_last3"] = g[played60.name].shift(1).rolling(window=3, min_periods=1).mean()
+    df_raw["played60_rate_last3"] = past_rolling(played60, key, 3)
 
     return df_raw
 
+@profiled()
 def attach_fixture_context(df_raw):
     """
-    Merge team_code, then fixture info, then opponent defensive strength,
-    and compute opp_def_strength.
+    Merge team_code, then the per-(team, GW) fixture vector
+    (n_fixtures, is_home, team_elo, opp_elo, opp_def_strength, opp_code).
     """
     # player -> team_code
     ptm = build_player_team_map().rename(columns={"player_id": PLAYER_ID_COL})
@@ -210,34 +262,10 @@ def attach_fixture_context(df_raw):
         how="left"
     )
 
-    fixtures_long = build_fixture_table()
-    df = df.merge(
-        fixtures_long,
-        on=["season", "gameweek", "team_code"],
-        how="left"
-    )
-
-    opp_strength = build_opponent_strength_lookup().rename(columns={
-        "team_code": "opp_code",
-        "strength_defence_home": "opp_strength_defence_home",
-        "strength_defence_away": "opp_strength_defence_away",
-    })
-
-    df = df.merge(
-        opp_strength,
-        on=["season", "opp_code"],
-        how="left"
-    )
-
-    def pick_def_strength(row):
-        if pd.isna(row.get("is_home")):
-            return np.nan
-        if row["is_home"] == 1:
-            return row["opp_strength_defence_away"]
-        else:
-            return row["opp_strength_defence_home"]
-
-    df["opp_def_strength"] = df.apply(pick_def_strength, axis=1)
+    # one fixture vector per (team, GW): DGWs don't duplicate rows, blanks get n_fixtures = 0
+    fixtures_agg = aggregate_team_gw_fixtures(build_fixture_table(), build_opponent_strength_lookup())
+    df = attach_team_gw_fixtures(df, fixtures_agg)
+    df = attach_team_expectations(df, team_expectations())
 
     return df
 
@@ -255,17 +283,19 @@ def build_train_frame_for_model(df_hist_full):
         "now_cost",
         "selected_by_percent",
         "form",
+        "n_fixtures",
         "is_home",
         "team_elo",
         "opp_elo",
         "opp_def_strength",
         "team_code",
         "opp_code",
+        *TEAM_FEATURES,
     ]
 
-    # clean snapshot text -> numeric
+    # clean snapshot text -> numeric (no-op when ingest already parsed them)
     for col in ["selected_by_percent", "form", "now_cost"]:
-        if col in df_hist_full.columns:
+        if col in df_hist_full.columns and not pd.api.types.is_numeric_dtype(df_hist_full[col]):
             df_hist_full[col] = (
                 df_hist_full[col]
                 .astype(str)
@@ -286,6 +316,7 @@ def build_train_frame_for_model(df_hist_full):
 # Build the PREDICTION dataset for the NEXT GW
 #########################################
 
+@profiled()
 def build_next_gw_feature_rows(df_raw, season_current, last_gw, next_gw):
     """
     We synthesize "what the player looks like going into next_gw":
@@ -293,40 +324,27 @@ def build_next_gw_feature_rows(df_raw, season_current, last_gw, next_gw):
       - latest snapshot (now_cost, form, selected_by_percent) from last_gw row
       - merge next_gw fixture info (is_home, opp_elo, etc.)
     """
-    # Only rows up to last_gw for this season
-    df_season_hist = df_raw[
-        (df_raw["season"] == season_current) &
-        (df_raw["gameweek"] <= last_gw)
-    ].copy()
-
-    # We'll compute aggregates per player
-    rows = []
-    for pid, g in df_season_hist.groupby(PLAYER_ID_COL):
-        g_sorted = g.sort_values("gameweek")
-
-        # last row = last_gw row for this player (latest snapshot)
-        last_row = g_sorted.iloc[-1]
-        last3 = g_sorted.tail(3)
-
-        pts_prev_gw = last_row["event_points"]  # "previous GW" for next_gw
-        pts_avg_last3 = last3["event_points"].mean()
-        mins_avg_last3 = last3["minutes"].mean()
-        played60_rate_last3 = (last3["minutes"] >= 60).mean()
-
-        rows.append({
-            "season": season_current,
-            "gameweek": next_gw,
-            PLAYER_ID_COL: pid,
-            "pts_prev_gw": pts_prev_gw,
-            "pts_avg_last3": pts_avg_last3,
-            "mins_avg_last3": mins_avg_last3,
-            "played60_rate_last3": played60_rate_last3,
-            "now_cost": last_row.get("now_cost", np.nan),
-            "selected_by_percent": last_row.get("selected_by_percent", np.nan),
-            "form": last_row.get("form", np.nan),
-        })
-
-    df_next = pd.DataFrame(rows)
+    # Only rows up to last_gw for this season (+ earlier seasons when form carries over)
+    is_current = df_raw["season"] == season_current
+    in_past = (is_current & (df_raw["gameweek"] <= last_gw))
+    if CARRY_FORM:
+        in_past |= df_raw["season"].astype(str) < str(season_current)
+    df_hist = df_raw[in_past].sort_values(by=["season", PLAYER_ID_COL, "gameweek"])
+
+    # one placeholder row per current player at next_gw, carrying the latest
+    # snapshot (now_cost, form, selected_by_percent from the last_gw row); the
+    # rolling engine then sees exactly the windows a finished next_gw row would
+    snapshot_cols = [c for c in ["now_cost", "selected_by_percent", "form"] if c in df_hist.columns]
+    last_rows = df_hist[df_hist["season"] == season_current].groupby(PLAYER_ID_COL, observed=True).tail(1)
+    df_next = last_rows[["season", PLAYER_ID_COL, *snapshot_cols]].assign(
+        gameweek=next_gw, event_points=np.nan, minutes=np.nan,
+    )
+    frame = pd.concat([df_hist[["season", PLAYER_ID_COL, "gameweek", "event_points", "minutes", *snapshot_cols]],
+                       df_next], ignore_index=True)
+    frame = compute_rolling_features_for_history(frame)
+    df_next = frame[frame["event_points"].isna() & (frame["gameweek"] == next_gw)
+                    & (frame["season"] == season_current)].drop(columns=["event_points", "minutes"])
+    df_next = df_next.reset_index(drop=True)
 
     # add team_code
     ptm = build_player_team_map().rename(columns={"player_id": PLAYER_ID_COL})
@@ -336,43 +354,22 @@ def build_next_gw_feature_rows(df_raw, season_current, last_gw, next_gw):
         how="left"
     )
 
-    # add fixture info for next_gw
+    # add fixture info for next_gw (aggregated over a DGW; blanks -> n_fixtures = 0)
     fixtures_long = build_fixture_table()
-    df_next = df_next.merge(
+    fixtures_agg = aggregate_team_gw_fixtures(
         fixtures_long[
             (fixtures_long["season"] == season_current)
             & (fixtures_long["gameweek"] == next_gw)
         ],
-        on=["season", "gameweek", "team_code"],
-        how="left",
-        suffixes=("", "_fixture")
-    )
-
-    # opponent defensive strength lookup
-    opp_strength = build_opponent_strength_lookup().rename(columns={
-        "team_code": "opp_code",
-        "strength_defence_home": "opp_strength_defence_home",
-        "strength_defence_away": "opp_strength_defence_away",
-    })
-    df_next = df_next.merge(
-        opp_strength[["season", "opp_code", "opp_strength_defence_home", "opp_strength_defence_away"]],
-        on=["season", "opp_code"],
-        how="left"
+        build_opponent_strength_lookup(),
     )
+    df_next = attach_team_gw_fixtures(df_next, fixtures_agg)
+    df_next = attach_team_expectations(df_next, team_expectations())
 
-    # compute opp_def_strength the same way
-    def pick_def_strength(row):
-        if pd.isna(row.get("is_home")):
-            return np.nan
-        if row["is_home"] == 1:
-            return row["opp_strength_defence_away"]
-        else:
-            return row["opp_strength_defence_home"]
-
-    df_next["opp_def_strength"] = df_next.apply(pick_def_strength, axis=1)
-
-    # clean snapshot text -> numeric
+    # clean snapshot text -> numeric (no-op when ingest already parsed them)
     for col in ["selected_by_percent", "form", "now_cost"]:
+        if pd.api.types.is_numeric_dtype(df_next[col]):
+            continue
         df_next[col] = (
             df_next[col]
             .astype(str)
@@ -380,11 +377,179 @@ def build_next_gw_feature_rows(df_raw, season_current, last_gw, next_gw):
         )
         df_next[col] = pd.to_numeric(df_next[col], errors="coerce")
 
-    # keep only guys who actually HAVE a PL fixture
-    df_next = df_next[df_next["is_home"].notna()].copy()
+    # keep everyone with a known team; blanking players are zeroed after predict
+    df_next = df_next[df_next["n_fixtures"].notna()].copy()
 
     return df_next
 
+#########################################
+# Availability (injuries / suspensions)
+#########################################
+
+def attach_availability(df, season, next_gw):
+    """
+    Add 'avail_prob' (1.0 when unknown). Joined on player_code (stable across
+    seasons), or on the FPL element id when players.csv has no code column.
+    A snapshot whose web_names don't match the season's players.csv is ignored.
+    """
+    df = df.copy()
+    snap = availability_snapshot(season, next_gw)
+    if snap is not None and not season_matches(season, snap.set_index("element")["web_name"], DATA_REPO_ROOT):
+        print(f"Availability: snapshot names don't match {season}'s players.csv; skipped.")
+        snap = None
+    if snap is None:
+        df["avail_prob"] = 1.0
+        return df
+
+    codes = build_player_code_map()
+    codes = codes[codes["season"].astype(str) == str(season)]
+    if len(codes):
+        key = df[PLAYER_ID_COL].map(codes.set_index("player_id")["player_code"])
+        prob = key.map(snap.drop_duplicates("code").set_index("code")["play_prob"])
+    else:
+        prob = df[PLAYER_ID_COL].map(snap.set_index("element")["play_prob"])
+    df["avail_prob"] = prob.fillna(1.0).to_numpy()
+    return df
+
+
+############################
+# Models
+############################
+
+def make_point_model(n_jobs=-1):
+    return RandomForestRegressor(
+        n_estimators=200,
+        max_samples=RF_MAX_SAMPLES_MULTI if MULTI_SEASON else None,
+        random_state=42,
+        n_jobs=n_jobs,
+    )
+
+def _fit_slice(key, X, y, n_jobs):
+    return key, make_point_model(n_jobs).fit(X, y)
+
+def fit_per_position_models(train_df, feature_cols):
+    """
+    {position: fitted RF} plus a pooled "_all" model. "_all" is always fitted:
+    besides positions too small to get their own model, predict_per_position
+    sends it every row whose position is missing or unlisted (a player not in
+    players.csv, a non-playing role), which the training rows can't anticipate.
+    The slices are fitted concurrently (threads: RF fitting releases the GIL),
+    with the cores split between them.
+    """
+    slices = {
+        pos: train_df[train_df["position"] == pos]
+        for pos in POSITIONS
+    }
+    slices = {pos: d for pos, d in slices.items() if len(d) >= MIN_POSITION_ROWS}
+    slices["_all"] = train_df
+
+    n_workers = len(slices)
+    per_model_jobs = max(1, (os.cpu_count() or 1) // n_workers)
+    fitted = Parallel(n_jobs=n_workers, prefer="threads")(
+        delayed(_fit_slice)(key, d[feature_cols], d["event_points"], per_model_jobs)
+        for key, d in slices.items()
+    )
+    for key, d in slices.items():
+        print(f"  {key:<11} model: {len(d)} training rows")
+    return dict(fitted)
+
+def _fit_probability(X, y):
+    """Classifier for a boolean target; a constant if the history has only one class."""
+    if y.nunique() < 2:
+        return float(y.iloc[0])
+    return HistGradientBoostingClassifier(
+        max_iter=200, learning_rate=0.1, random_state=42
+    ).fit(X, y)
+
+def _predict_probability(clf, X):
+    if isinstance(clf, float):
+        return np.full(len(X), clf)
+    return clf.predict_proba(X)[:, 1]
+
+def fit_two_stage_models(train_df, feature_cols):
+    """
+    Most history rows are zero-minute appearances; the points RF only sees the
+    rows where the player featured, and the (cheap) classifiers handle the rest.
+    """
+    X = train_df[feature_cols]
+    minutes = train_df["minutes"]
+    played = minutes >= 1
+    print(f"  two-stage: {int(played.sum())} of {len(train_df)} rows have minutes > 0")
+    return {
+        "p_play": _fit_probability(X, played),
+        "p_60": _fit_probability(X, minutes >= 60),
+        "points": make_point_model().fit(X[played], train_df.loc[played, "event_points"]),
+    }
+
+def predict_two_stage(models, X):
+    """Return expected points, P(minutes >= 1), P(minutes >= 60)."""
+    p_play = _predict_probability(models["p_play"], X)
+    p_60 = np.minimum(_predict_probability(models["p_60"], X), p_play)
+    return p_play * models["points"].predict(X), p_play, p_60
+
+def fit_blend_models(train_df):
+    """
+    The three models the blend weights were learned on: same feature columns,
+    same constructor params (tuned / compact included, as stored in
+    blend_weights.json by train_with_fixture), and rows with NaN features
+    dropped as train_with_fixture.build_xy does.
+    Returns ({model name: fitted model}, feature_cols).
+    """
+    config = load_blend_config()
+    feature_set = config.get("feature_set", twf.BLEND_FEATURE_SET)
+    feature_cols = config.get("feature_cols") or twf.FEATURES_EXTENDED_BASIC
+    params = config.get("model_params") or twf.model_params(feature_set)
+
+    train_df = twf.add_engineered_columns(train_df.copy())
+    missing = [c for c in feature_cols if c not in train_df.columns]
+    if missing:
+        raise RuntimeError(f"Blend feature set '{feature_set}' needs columns predict doesn't build: {missing}")
+    X, y, _ = twf.build_xy(train_df, feature_cols)
+    print(f"Blend: '{feature_set}' ({len(feature_cols)} cols), {len(X)} rows")
+    models = {name: model.fit(X, y) for name, model in twf.make_models(params).items()}
+    return models, feature_cols
+
+def predict_blend(models, df, feature_cols):
+    weights = load_blend_weights()
+    if not weights:
+        print("No blend weights yet (run train_with_fixture.py); using equal weights.")
+        weights = {"_all": {m: 1 / len(MODEL_NAMES) for m in MODEL_NAMES}}
+    df = twf.add_engineered_columns(df.copy()).reset_index(drop=True)
+    X = df[feature_cols]
+    # Ridge was trained on complete rows only and can't score NaNs: rows with a
+    # missing feature (blanks, new players) use the tree models' share of the weights
+    complete = X.notna().all(axis=1).to_numpy()
+    preds = pd.DataFrame({m: models[m].predict(X) for m in MODEL_NAMES if m != "Ridge"})
+    preds["Ridge"] = np.nan
+    if complete.any():
+        preds.loc[complete, "Ridge"] = models["Ridge"].predict(X[complete])
+
+    out = np.full(len(df), np.nan)
+    if complete.any():
+        out[complete] = blend_predict(preds[complete], df.loc[complete, "position"], weights)
+    if (~complete).any():
+        out[~complete] = blend_predict(preds[~complete].fillna({"Ridge": 0.0}),
+                                       df.loc[~complete, "position"], _without_ridge(weights))
+    return out
+
+def _without_ridge(weights):
+    """Blend weights with Ridge's share moved onto the tree models (equal split if it had all of it)."""
+    out = {}
+    for key, w in weights.items():
+        trees = {m: w[m] for m in MODEL_NAMES if m != "Ridge"}
+        total = sum(trees.values())
+        out[key] = {"Ridge": 0.0, **{m: (v / total if total > 0 else 1 / len(trees)) for m, v in trees.items()}}
+    return out
+
+def predict_per_position(models, df, feature_cols):
+    """Route each row to its position's model (pooled model if there isn't one)."""
+    preds = np.full(len(df), np.nan)
+    route = df["position"].where(df["position"].isin(models.keys()), "_all").to_numpy()
+    for key in np.unique(route):
+        mask = route == key
+        preds[mask] = models[key].predict(df.loc[mask, feature_cols])
+    return preds
+
 ############################
 # Pretty-print
 ############################
@@ -404,7 +569,12 @@ def print_top_by_position(preds_named, top_n=10):
 # Main
 ############################
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Predict next-GW points")
+    parser.add_argument("--check-fast", action="store_true",
+                        help="with FAST_INFERENCE: check the flattened forest against sklearn's predict")
+    args = parser.parse_args(argv)
+
     # 1. load history to know last completed GW + season
     df_hist = load_training_history()
     season_current = sorted(df_hist["season"].unique())[-1]
@@ -423,13 +593,19 @@ def main():
     df_hist_full = attach_fixture_context(df_hist_full)
     df_hist_full = compute_rolling_features_for_history(df_hist_full)
 
+    if MULTI_SEASON:
+        df_hist_full = add_season_context(df_hist_full, df_raw)
+
     train_df, feature_cols = build_train_frame_for_model(df_hist_full)
 
-    # only keep rows up to last_gw
-    train_df = train_df[
-        (train_df["season"] == season_current) &
-        (train_df["gameweek"] <= last_gw)
-    ].copy()
+    # only keep rows up to last_gw (all earlier seasons too in multi-season mode)
+    is_current = train_df["season"].astype(str) == season_current
+    if MULTI_SEASON:
+        feature_cols = feature_cols + SEASON_CONTEXT_FEATURES
+        train_df = train_df[~is_current | (train_df["gameweek"] <= last_gw)].copy()
+        print(f"Multi-season training: {train_df['season'].nunique()} seasons, {len(train_df)} rows")
+    else:
+        train_df = train_df[is_current & (train_df["gameweek"] <= last_gw)].copy()
 
     if train_df.empty:
         print("Training frame is empty. Something's wrong with historical data.")
@@ -439,22 +615,68 @@ def main():
     X_train = train_df[feature_cols].copy()
     y_train = train_df["event_points"].copy()
 
-    model = RandomForestRegressor(
-        n_estimators=200,
-        random_state=42,
-        n_jobs=-1,
-    )
-    model.fit(X_train, y_train)
+    with profile_stage("model.fit", rows=len(X_train)):
+        if MODEL_MODE == "per_position":
+            print("Training per-position models:")
+            models = fit_per_position_models(attach_position(train_df), feature_cols)
+        elif MODEL_MODE == "two_stage":
+            models = fit_two_stage_models(train_df, feature_cols)
+        elif MODEL_MODE == "blend":
+            models, blend_cols = fit_blend_models(train_df)
+        else:
+            model = make_point_model().fit(X_train, y_train)
 
     # 5. build synthetic NEXT GW rows
     df_next = build_next_gw_feature_rows(df_raw, season_current, last_gw, next_gw)
-    if df_next.empty:
+    if df_next.empty or not (df_next["n_fixtures"] > 0).any():
         print("No next-GW prediction frame. Do we have PL fixtures for that GW?")
         return
+    if MULTI_SEASON:
+        df_next = add_season_context(df_next, df_raw)
 
     # same feature order
     X_next = df_next[feature_cols].copy()
-    df_next["predicted_points"] = model.predict(X_next)
+    with profile_stage("model.predict", rows=len(X_next)):
+        if MODEL_MODE == "per_position":
+            df_next = attach_position(df_next)
+            df_next["predicted_points"] = predict_per_position(models, df_next, feature_cols)
+            df_next = df_next.drop(columns=["position"])
+        elif MODEL_MODE == "two_stage":
+            df_next["predicted_points"], df_next["prob_play"], df_next["prob_60"] = (
+                predict_two_stage(models, X_next)
+            )
+        elif MODEL_MODE == "blend":
+            df_next = attach_position(df_next)
+            df_next["predicted_points"] = predict_blend(models, df_next, blend_cols)
+            df_next = df_next.drop(columns=["position"])
+        elif FAST_INFERENCE:
+            flat = compile_model(model)
+            print(f"Flattened RF: {flat.n_trees} trees, {flat.nbytes / 2**20:.1f} MB")
+            if args.check_fast:
+                check = validate(model, flat, X_next)
+                print(f"  exact match={check['exact']} (max diff {check['max_abs_diff']:.2e}), "
+                      f"sklearn {check['sklearn_s'] * 1e3:.1f} ms vs flat {check['flat_s'] * 1e3:.1f} ms")
+            df_next["predicted_points"] = flat.predict(X_next)
+            MODELS_DIR.mkdir(parents=True, exist_ok=True)
+            flat.save(MODELS_DIR / f"gw{next_gw}_rf_flat.npz")
+        else:
+            df_next["predicted_points"] = model.predict(X_next)
+
+    # scale by chance of playing, drop players ruled out
+    if AVAILABILITY:
+        df_next = attach_availability(df_next, season_current, next_gw)
+        out = df_next["avail_prob"] <= 0
+        df_next = df_next[~out].copy()
+        df_next["predicted_points"] *= df_next["avail_prob"]
+        print(f"Availability: dropped {int(out.sum())} unavailable players, "
+              f"{int((df_next['avail_prob'] < 1).sum())} doubtful scaled by chance of playing.")
+
+    # a player whose team blanks can't score
+    blank = df_next["n_fixtures"] == 0
+    df_next.loc[blank, [c for c in ["predicted_points", "prob_play", "prob_60"] if c in df_next.columns]] = 0.0
+    if blank.any():
+        print(f"{int(blank.sum())} players blank in GW{next_gw}; "
+              f"{int((df_next['n_fixtures'] > 1).sum())} have a double.")
 
     # 6. attach readable names/positions
     lookup = load_player_lookup(season_current)
@@ -486,7 +708,7 @@ def main():
         "team_short",
         "position",
         "predicted_points"
-    ]].copy()
+    ] + [c for c in ["prob_play", "prob_60", "avail_prob"] if c in preds_named.columns]].copy()
 
     # create predictions/ dir if not exists
     predictions_dir = PROJECT_ROOT / "predictions"
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Price / ownership history built from bootstrap-static snapshots.
+
+fpl_api_bootstrap.py replaces the bootstrap cache on every run. Before that
+happens, append_snapshot() records the players whose now_cost changed or whose
+selected_by_percent moved by at least MIN_OWNERSHIP_CHANGE, compared with the
+last stored value. The first snapshot records everyone.
+
+  data_processed/price_history/
+    deltas.csv    ts, gw, code, element, now_cost (tenths), selected_by_percent
+    latest.csv    last stored value per player (what the next delta is diffed against)
+
+history() loads the deltas once, indexed by (code, ts). The queries below answer
+with as-of lookups on that index. code is the FPL player code, which stays the
+same across seasons.
+
+  python src/price_history.py                 # summary + recent risers / fallers
+  python src/price_history.py --append-cache  # record the current bootstrap cache
+"""
+
+from __future__ import annotations
+from functools import lru_cache
+from pathlib import Path
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+THIS_FILE = Path(__file__).resolve()
+PROJECT_ROOT = THIS_FILE.parent.parent
+STORE_DIR = PROJECT_ROOT / "data_processed" / "price_history"
+DELTAS_FILE = STORE_DIR / "deltas.csv"
+LATEST_FILE = STORE_DIR / "latest.csv"
+
+COLUMNS = ["ts", "gw", "code", "element", "now_cost", "selected_by_percent"]
+MIN_OWNERSHIP_CHANGE = 0.1   # percentage points; the API reports one decimal
+MOMENTUM_DAYS = (3, 7)
+
+
+############################
+# Write
+############################
+
+def _snapshot_frame(players: pd.DataFrame, ts: pd.Timestamp, gw) -> pd.DataFrame:
+    """bootstrap_cache.player_index() -> one row per player in the store's layout."""
+    players = players[players["code"].notna() & players["now_cost"].notna()]
+    return pd.DataFrame({
+        "ts": ts.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "gw": gw if gw is not None else -1,
+        "code": players["code"].astype("int64").to_numpy(),
+        "element": players.index.to_numpy(),
+        "now_cost": players["now_cost"].astype("int64").to_numpy(),
+        "selected_by_percent": players["selected_by_percent"].astype(float).round(1).to_numpy(),
+    })
+
+
+def _changed(snap: pd.DataFrame, latest: pd.DataFrame) -> pd.Series:
+    prev = latest.set_index("code").reindex(snap["code"])
+    cost_moved = prev["now_cost"].to_numpy() != snap["now_cost"].to_numpy()
+    own_moved = ~(np.abs(prev["selected_by_percent"].to_numpy() - snap["selected_by_percent"].to_numpy())
+                  < MIN_OWNERSHIP_CHANGE - 1e-9)   # NaN (new player) counts as moved
+    return pd.Series(cost_moved | own_moved, index=snap.index)
+
+
+def append_snapshot(players: pd.DataFrame, gw=None, ts: pd.Timestamp | None = None) -> int:
+    """Append the changed players of one snapshot; returns the number of rows written."""
+    ts = ts or pd.Timestamp.now(tz="UTC")
+    snap = _snapshot_frame(players, ts, gw)
+    latest = pd.read_csv(LATEST_FILE) if LATEST_FILE.is_file() else snap.iloc[:0]
+    delta = snap[_changed(snap, latest)]
+
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    if len(delta):
+        delta[COLUMNS].to_csv(DELTAS_FILE, mode="a", header=not DELTAS_FILE.is_file(), index=False)
+        latest = pd.concat([latest[~latest["code"].isin(delta["code"])], delta], ignore_index=True)
+        tmp = LATEST_FILE.with_name(LATEST_FILE.name + ".tmp")
+        latest[COLUMNS].to_csv(tmp, index=False)
+        tmp.replace(LATEST_FILE)
+    history.cache_clear()
+    return len(delta)
+
+
+############################
+# Read / query
+############################
+
+@lru_cache(maxsize=1)
+def history() -> pd.DataFrame:
+    """All deltas, indexed by (code, ts), sorted."""
+    if not DELTAS_FILE.is_file():
+        return pd.DataFrame(columns=COLUMNS[1:], index=pd.MultiIndex.from_arrays([[], []], names=["code", "ts"]))
+    df = pd.read_csv(DELTAS_FILE, dtype={"gw": "int16", "code": "int64", "element": "int32",
+                                         "now_cost": "int16", "selected_by_percent": "float64"})
+    df["ts"] = pd.to_datetime(df["ts"], utc=True)
+    return df.set_index(["code", "ts"]).sort_index()
+
+
+def state_at(as_of=None) -> pd.DataFrame:
+    """Last known now_cost / selected_by_percent per player at as_of (default: latest), by code."""
+    h = history()
+    if as_of is not None:
+        h = h[h.index.get_level_values("ts") <= _as_of_ts(as_of)]
+    return h.groupby(level="code").tail(1).reset_index(level="ts")
+
+
+def _as_of_ts(as_of) -> pd.Timestamp:
+    if as_of is None:
+        h = history()
+        return h.index.get_level_values("ts").max() if len(h) else pd.Timestamp.now(tz="UTC")
+    ts = pd.Timestamp(as_of)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts
+
+
+def price_trend(days: int = 7, as_of=None) -> pd.Series:
+    """now_cost change (in £m) over the last `days` days, by code."""
+    end = _as_of_ts(as_of)
+    now = state_at(end)["now_cost"]
+    then = state_at(end - pd.Timedelta(days=days))["now_cost"].reindex(now.index)
+    return ((now - then.fillna(now)) / 10.0).rename(f"price_change_{days}d")
+
+
+def ownership_momentum(days: int = 3, as_of=None) -> pd.Series:
+    """selected_by_percent change (percentage points) over the last `days` days, by code."""
+    end = _as_of_ts(as_of)
+    now = state_at(end)["selected_by_percent"]
+    then = state_at(end - pd.Timedelta(days=days))["selected_by_percent"].reindex(now.index)
+    return (now - then.fillna(now)).round(1).rename(f"ownership_change_{days}d")
+
+
+def momentum_features(as_of=None, days=MOMENTUM_DAYS) -> pd.DataFrame:
+    """Per code: current price / ownership plus their change over each window."""
+    end = _as_of_ts(as_of)
+    out = state_at(end)[["element", "now_cost", "selected_by_percent"]].copy()
+    out["now_cost"] = out["now_cost"] / 10.0
+    for d in days:
+        out[f"price_change_{d}d"] = price_trend(d, end)
+        out[f"ownership_change_{d}d"] = ownership_momentum(d, end)
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Price / ownership history from bootstrap snapshots")
+    parser.add_argument("--append-cache", action="store_true",
+                        help="record the current bootstrap cache as a snapshot")
+    parser.add_argument("--days", type=int, default=3, help="window for the risers / fallers table")
+    parser.add_argument("-n", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.append_cache:
+        from bootstrap_cache import RAW_FILE, next_event_id, player_index
+        ts = pd.Timestamp(RAW_FILE.stat().st_mtime, unit="s", tz="UTC") if RAW_FILE.is_file() else None
+        n = append_snapshot(player_index(), next_event_id(), ts)
+        print(f"Appended {n} changed players")
+
+    t0 = time.perf_counter()
+    h = history()
+    if h.empty:
+        print(f"No history yet in {DELTAS_FILE}; run src/fpl_api_bootstrap.py.")
+        return 0
+    ts = h.index.get_level_values("ts")
+    print(f"{len(h)} delta rows, {ts.nunique()} snapshots, {h.index.get_level_values('code').nunique()} players, "
+          f"{ts.min():%Y-%m-%d} .. {ts.max():%Y-%m-%d}, {DELTAS_FILE.stat().st_size / 1024:.1f} KB "
+          f"(loaded in {time.perf_counter() - t0:.2f}s)")
+
+    feats = momentum_features(days=(args.days, 7))
+    col = f"ownership_change_{args.days}d"
+    print(f"\nOwnership risers ({args.days}d):")
+    print(feats.nlargest(args.n, col).to_string())
+    print(f"\nOwnership fallers ({args.days}d):")
+    print(feats.nsmallest(args.n, col).to_string())
+    moved = feats[feats["price_change_7d"] != 0]
+    print(f"\nPrice changes over 7d: {len(moved)} players")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,176 @@
+# src/profiling.py
+"""
+Lightweight stage profiling for the pipeline scripts.
+
+Wrap the expensive steps with the decorator or the context manager:
+
+    @profiled("load_all_player_gameweek_stats")
+    def load_all_player_gameweek_stats(): ...
+
+    with profile_stage("model.fit", rows=len(X_train)):
+        model.fit(X_train, y_train)
+
+Each record holds wall time, RSS before/after, the process peak RSS and a row
+count (taken from the returned DataFrame / Series when not given). Profiling is
+opt-in: with FPL_PROFILE=1 the records are written when the script exits to
+
+    data_processed/profiles/{script}_{YYYYmmdd-HHMMSS}.json
+    data_processed/profiles/{script}_{YYYYmmdd-HHMMSS}.csv
+
+Environment switches:
+    FPL_PROFILE=1     record stages and write the files above (default off, so
+                      importing a profiled module costs nothing and writes nothing)
+    FPL_CPROFILE=1    also dump a cProfile of the whole run next to the JSON (.prof)
+"""
+
+from __future__ import annotations
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+import atexit
+import csv
+import json
+import os
+import sys
+import time
+
+try:
+    import resource  # not available on Windows
+except ImportError:  # pragma: no cover
+    resource = None
+
+THIS_FILE = Path(__file__).resolve()
+PROJECT_ROOT = THIS_FILE.parent.parent
+PROFILE_DIR = PROJECT_ROOT / "data_processed" / "profiles"
+
+ENABLED = os.environ.get("FPL_PROFILE", "0") == "1"
+CPROFILE = ENABLED and os.environ.get("FPL_CPROFILE", "0") == "1"
+
+RECORDS: list[dict] = []
+_RUN_STARTED = time.strftime("%Y%m%d-%H%M%S")
+_PROFILER = None
+
+
+def _script_name() -> str:
+    return Path(sys.argv[0]).stem if sys.argv and sys.argv[0] else "interactive"
+
+
+def current_rss_mb() -> float | None:
+    """Resident set size right now (Linux /proc), None where unavailable."""
+    try:
+        with open("/proc/self/statm") as fh:
+            pages = int(fh.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb() -> float | None:
+    """High-water mark RSS of this process so far."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def _row_count(obj) -> int | None:
+    shape = getattr(obj, "shape", None)
+    if shape:
+        return int(shape[0])
+    if isinstance(obj, tuple) and obj:
+        return _row_count(obj[0])
+    return None
+
+
+@contextmanager
+def profile_stage(name: str, rows: int | None = None):
+    """
+    Time a block. Yields the record dict so callers can fill in `rows`
+    after the fact (e.g. rec["rows"] = len(df)).
+    """
+    rec = {"stage": name, "rows": rows}
+    if not ENABLED:
+        yield rec
+        return
+    rss0 = current_rss_mb()
+    t0 = time.perf_counter()
+    try:
+        yield rec
+    finally:
+        rec["wall_s"] = round(time.perf_counter() - t0, 4)
+        rec["rss_start_mb"] = None if rss0 is None else round(rss0, 1)
+        rss1 = current_rss_mb()
+        rec["rss_end_mb"] = None if rss1 is None else round(rss1, 1)
+        peak = peak_rss_mb()
+        rec["peak_rss_mb"] = None if peak is None else round(peak, 1)
+        RECORDS.append(rec)
+
+
+def profiled(name: str | None = None):
+    """Decorator form of profile_stage; row count comes from the return value."""
+    def deco(fn):
+        stage_name = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with profile_stage(stage_name) as rec:
+                out = fn(*args, **kwargs)
+                if rec["rows"] is None:
+                    rec["rows"] = _row_count(out)
+            return out
+        return wrapper
+    return deco
+
+
+def write_profile(out_dir: Path = PROFILE_DIR) -> Path | None:
+    """Write collected records (and the cProfile dump, if enabled). Returns the JSON path."""
+    if not ENABLED or not RECORDS:
+        return None
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = out_dir / f"{_script_name()}_{_RUN_STARTED}"
+
+    payload = {
+        "script": _script_name(),
+        "started": _RUN_STARTED,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": RECORDS,
+    }
+    json_path = stem.with_suffix(".json")
+    json_path.write_text(json.dumps(payload, indent=2))
+
+    fields = ["stage", "wall_s", "rows", "rss_start_mb", "rss_end_mb", "peak_rss_mb"]
+    with stem.with_suffix(".csv").open("w", newline="") as fh:
+        w = csv.DictWriter(fh, fieldnames=fields, extrasaction="ignore")
+        w.writeheader()
+        w.writerows(RECORDS)
+
+    if _PROFILER is not None:
+        _PROFILER.disable()
+        _PROFILER.dump_stats(str(stem.with_suffix(".prof")))
+    return json_path
+
+
+def print_summary():
+    if not RECORDS:
+        return
+    print("\n--- profile ---")
+    for r in RECORDS:
+        rows = "" if r.get("rows") is None else f"  rows={r['rows']}"
+        peak = "" if r.get("peak_rss_mb") is None else f"  peak={r['peak_rss_mb']:.0f}MB"
+        print(f"{r['stage']:<40} {r['wall_s']:>8.2f}s{rows}{peak}")
+
+
+def _at_exit():
+    path = write_profile()
+    if path is not None:
+        print_summary()
+        print(f"Profile written to {path}")
+
+
+if ENABLED:
+    if CPROFILE:
+        import cProfile
+        _PROFILER = cProfile.Profile()
+        _PROFILER.enable()
+    atexit.register(_at_exit)
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Run the weekly refresh as one command.
+
+Each script of the README pipeline is a stage with declared inputs/outputs:
+
+  ingest -> patch_event_points -> features -> train
+                                           -> predict -> error_analysis -> plot
+
+A stage is skipped when the content hashes of its inputs (data files, directories
+and its own script) match the last successful run and its outputs exist. Stages
+whose dependencies are satisfied run concurrently (e.g. training alongside the
+predict -> error_analysis -> plot chain).
+
+State:  data_processed/pipeline_state.json
+Logs:   data_processed/pipeline_logs/{stage}.log
+
+Usage:
+  python src/run_pipeline.py                 # run whatever changed
+  python src/run_pipeline.py --dry-run       # show what would run
+  python src/run_pipeline.py --force train   # force a stage (and everything downstream)
+"""
+
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import subprocess
+import sys
+import time
+
+THIS_FILE = Path(__file__).resolve()
+SRC_DIR = THIS_FILE.parent
+PROJECT_ROOT = SRC_DIR.parent
+DATA_DIR = PROJECT_ROOT / "data_processed"
+DATA_REPO_ROOT = Path("/home/mann-gandhi/FPL-Elo-Insights-data/data")
+
+STATE_FILE = DATA_DIR / "pipeline_state.json"
+LOG_DIR = DATA_DIR / "pipeline_logs"
+
+RAW_FILE = DATA_DIR / "training_base_raw.csv"
+TRAIN_TABLE = DATA_DIR / "training_table_with_fixture.csv"
+PRED_DIR = PROJECT_ROOT / "predictions"
+# injury news read by predict (fpl_api_bootstrap.py refreshes both)
+BOOTSTRAP_FILE = DATA_DIR / "fpl_api_cache" / "bootstrap-static.json.gz"
+AVAILABILITY_DIR = DATA_DIR / "availability"
+
+
+@dataclass
+class Stage:
+    name: str
+    script: str
+    inputs: list[Path]
+    outputs: list[Path]
+    deps: list[str] = field(default_factory=list)
+    args: list[str] = field(default_factory=list)
+    # stage is a no-op (treated as done) when this input doesn't exist
+    skip_if_missing: Path | None = None
+
+
+STAGES = [
+    Stage("ingest", "ingest.py",
+          inputs=[DATA_REPO_ROOT],
+          outputs=[RAW_FILE]),
+    # patches training_base_raw.csv in place; input hashes are recorded after the
+    # run, so the rewritten file doesn't make the stage look dirty next time
+    Stage("patch_event_points", "patch_event_points.py",
+          inputs=[RAW_FILE, DATA_DIR / "actual-points"],
+          outputs=[RAW_FILE],
+          deps=["ingest"],
+          skip_if_missing=DATA_DIR / "actual-points"),
+    Stage("features", "features_with_fixture.py",
+          inputs=[RAW_FILE, DATA_REPO_ROOT],
+          outputs=[TRAIN_TABLE],
+          deps=["patch_event_points"]),
+    Stage("train", "train_with_fixture.py",
+          inputs=[TRAIN_TABLE],
+          outputs=[DATA_DIR / "residuals"],
+          deps=["features"]),
+    Stage("predict", "predict_next_gw.py",
+          inputs=[RAW_FILE, TRAIN_TABLE, DATA_REPO_ROOT, BOOTSTRAP_FILE, AVAILABILITY_DIR],
+          outputs=[PRED_DIR],
+          deps=["features"]),
+    Stage("error_analysis", "error_analysis.py",
+          inputs=[RAW_FILE, PRED_DIR],
+          outputs=[DATA_DIR / "error_analysis"],
+          deps=["predict"]),
+    Stage("plot", "plot_team_scatter_per_gw.py",
+          inputs=[DATA_DIR / "error_analysis"],
+          outputs=[DATA_DIR / "plots"],
+          deps=["error_analysis"]),
+]
+STAGES_BY_NAME = {s.name: s for s in STAGES}
+
+# Only these files count as inputs when a directory is declared.
+HASHED_SUFFIXES = {".csv", ".json", ".gz", ".py"}
+
+
+############################
+# Content hashing
+############################
+
+class Hasher:
+    """
+    SHA-1 content hashes with a (size, mtime_ns) memo persisted in the state file,
+    so unchanged files in the big data repo aren't re-read on every run.
+    """
+
+    def __init__(self, memo: dict | None = None):
+        self.memo = memo or {}
+
+    def file_hash(self, path: Path) -> str:
+        st = path.stat()
+        key = str(path)
+        hit = self.memo.get(key)
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            return hit[2]
+        h = hashlib.sha1()
+        with path.open("rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self.memo[key] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def path_hash(self, path: Path) -> str:
+        if path.is_file():
+            return self.file_hash(path)
+        if path.is_dir():
+            h = hashlib.sha1()
+            files = sorted(
+                p for p in path.rglob("*")
+                if p.is_file() and p.suffix.lower() in HASHED_SUFFIXES
+            )
+            for p in files:
+                h.update(str(p.relative_to(path)).encode("utf-8"))
+                h.update(self.file_hash(p).encode("ascii"))
+            return h.hexdigest()
+        return "missing"
+
+    def stage_hash(self, stage: Stage) -> dict:
+        hashes = {"script": self.file_hash(SRC_DIR / stage.script)}
+        for p in stage.inputs:
+            hashes[str(p)] = self.path_hash(p)
+        return hashes
+
+
+############################
+# State
+############################
+
+def load_state() -> dict:
+    if not STATE_FILE.is_file():
+        return {"stages": {}, "file_memo": {}}
+    try:
+        state = json.loads(STATE_FILE.read_text())
+    except (json.JSONDecodeError, OSError):
+        return {"stages": {}, "file_memo": {}}
+    state.setdefault("stages", {})
+    state.setdefault("file_memo", {})
+    return state
+
+def save_state(state: dict):
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_FILE.with_suffix(".tmp.json")
+    tmp.write_text(json.dumps(state, indent=1, sort_keys=True))
+    tmp.replace(STATE_FILE)
+
+def downstream_of(names: set[str]) -> set[str]:
+    """All stages that (transitively) depend on any of `names`, including them."""
+    out = set(names)
+    changed = True
+    while changed:
+        changed = False
+        for s in STAGES:
+            if s.name not in out and any(d in out for d in s.deps):
+                out.add(s.name)
+                changed = True
+    return out
+
+
+############################
+# Running
+############################
+
+def is_dirty(stage: Stage, state: dict, hasher: Hasher) -> tuple[bool, str]:
+    prev = state["stages"].get(stage.name)
+    if prev is None or prev.get("status") != "ok":
+        return True, "never ran successfully"
+    missing = [p for p in stage.outputs if not p.exists()]
+    if missing:
+        return True, f"missing output {missing[0].relative_to(PROJECT_ROOT)}"
+    current = hasher.stage_hash(stage)
+    if current != prev.get("inputs"):
+        changed = sorted(k for k in current if current[k] != prev.get("inputs", {}).get(k))
+        return True, "changed: " + ", ".join(Path(c).name for c in changed)
+    return False, "up to date"
+
+def run_stage(stage: Stage) -> tuple[int, float]:
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    log_path = LOG_DIR / f"{stage.name}.log"
+    t0 = time.perf_counter()
+    with log_path.open("w") as log:
+        proc = subprocess.run(
+            [sys.executable, str(SRC_DIR / stage.script), *stage.args],
+            cwd=PROJECT_ROOT,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    return proc.returncode, time.perf_counter() - t0
+
+def run_pipeline(targets: set[str], forced: set[str], jobs: int, dry_run: bool) -> int:
+    state = load_state()
+    hasher = Hasher(state["file_memo"])
+
+    pending = {s.name for s in STAGES if s.name in targets}
+    done, failed, ran = set(), set(), set()
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            ready = [
+                STAGES_BY_NAME[n] for n in sorted(pending, key=[s.name for s in STAGES].index)
+                if all(d in done or d in failed or d not in targets for d in STAGES_BY_NAME[n].deps)
+            ]
+            for stage in ready:
+                pending.discard(stage.name)
+                if any(d in failed for d in stage.deps):
+                    failed.add(stage.name)
+                    print(f"[{stage.name}] skipped: upstream failed")
+                    continue
+
+                if stage.skip_if_missing is not None and not stage.skip_if_missing.exists():
+                    done.add(stage.name)
+                    print(f"[{stage.name}] no {stage.skip_if_missing.name}/; nothing to do")
+                    continue
+
+                upstream_ran = any(d in ran for d in stage.deps)
+                if stage.name in forced:
+                    dirty, why = True, "forced"
+                elif upstream_ran and dry_run:
+                    dirty, why = True, "upstream would run"
+                else:
+                    dirty, why = is_dirty(stage, state, hasher)
+
+                if not dirty:
+                    done.add(stage.name)
+                    print(f"[{stage.name}] {why}; skipping")
+                    continue
+                if dry_run:
+                    ran.add(stage.name)
+                    done.add(stage.name)
+                    print(f"[{stage.name}] would run ({why})")
+                    continue
+
+                print(f"[{stage.name}] running {stage.script} ({why})")
+                running[pool.submit(run_stage, stage)] = stage
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                stage = running.pop(fut)
+                rc, elapsed = fut.result()
+                if rc == 0:
+                    done.add(stage.name)
+                    ran.add(stage.name)
+                    state["stages"][stage.name] = {
+                        "status": "ok",
+                        # hashed after the run: in-place stages record their own result
+                        "inputs": hasher.stage_hash(stage),
+                        "seconds": round(elapsed, 2),
+                        "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    }
+                    print(f"[{stage.name}] ok in {elapsed:.1f}s")
+                else:
+                    failed.add(stage.name)
+                    state["stages"][stage.name] = {"status": "failed", "returncode": rc}
+                    log = (LOG_DIR / f"{stage.name}.log").relative_to(PROJECT_ROOT)
+                    print(f"[{stage.name}] FAILED (exit {rc}); see {log}")
+                save_state(state)
+
+    if not dry_run:
+        save_state(state)
+    return 1 if failed else 0
+
+def main(argv=None):
+    names = [s.name for s in STAGES]
+    parser = argparse.ArgumentParser(description="Run the fpl-model pipeline, skipping unchanged stages.")
+    parser.add_argument("--only", nargs="+", choices=names, metavar="STAGE",
+                        help=f"run only these stages (choices: {', '.join(names)})")
+    parser.add_argument("--force", nargs="*", choices=names, metavar="STAGE",
+                        help="rerun these stages and everything downstream (no names = all)")
+    parser.add_argument("--jobs", type=int, default=2, help="max stages running at once")
+    parser.add_argument("--dry-run", action="store_true", help="print the plan without running")
+    args = parser.parse_args(argv)
+
+    targets = set(args.only) if args.only else set(names)
+    if args.force is None:
+        forced = set()
+    elif args.force == []:
+        forced = set(names)
+    else:
+        forced = downstream_of(set(args.force))
+
+    return run_pipeline(targets, forced & targets, args.jobs, args.dry_run)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,137 @@
+# src/schema.py
+"""
+Declared column dtypes for the raw player-gameweek table and the feature table.
+
+ingest.py applies RAW_SCHEMA once (this is also where '12.3%' style snapshot
+strings become numbers), and every reader goes through read_table() so the
+compact dtypes survive the CSV round trip:
+
+  - small counts (gameweek, goals, cards, ...)  -> int8 / int16
+  - rates, prices, xG, rolling averages          -> float32
+  - season / position / team_short               -> category
+
+Integer columns that contain NaN (e.g. team_code for unmapped players) fall back
+to float32 rather than pandas' nullable Int types, which sklearn can't consume.
+Values outside the declared integer range are upcast instead of wrapping.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# columns that arrive as text in the source CSVs ("12.3%", "4.5")
+SNAPSHOT_TEXT_COLS = ["selected_by_percent", "form", "now_cost"]
+
+_INT8_COUNTS = [
+    "goals_scored", "assists", "clean_sheets", "goals_conceded", "own_goals",
+    "penalties_saved", "penalties_missed", "yellow_cards", "red_cards", "saves",
+    "bonus", "starts", "total_shots",
+]
+_FLOAT_RATES = [
+    "now_cost", "form", "selected_by_percent",
+    "expected_goals", "expected_assists", "expected_goal_involvements",
+    "expected_goals_conceded", "influence", "creativity", "threat", "ict_index",
+]
+
+RAW_SCHEMA = {
+    "season": "category",
+    "gameweek": "int8",
+    "id": "int16",
+    "event_points": "int8",
+    "event_points_orig": "float32",
+    "minutes": "int16",
+    "bps": "int16",
+    **{c: "int8" for c in _INT8_COUNTS},
+    **{c: "float32" for c in _FLOAT_RATES},
+}
+
+_ROLLING_COLS = [
+    "pts_prev_gw", "pts_avg_last3", "pts_avg_last5",
+    "mins_avg_last3", "mins_avg_last5",
+    "played60_rate_last3", "played60_rate_last5",
+    "xgi_avg_last3", "xgi_avg_last5",
+    "shots_last3", "shots_last5",
+    "cs_rate_last3", "cs_rate_last5",
+    "gc_avg_last3", "gc_avg_last5",
+]
+
+FEATURE_SCHEMA = {
+    **RAW_SCHEMA,
+    "team_code": "int16",
+    "opp_code": "int16",
+    "n_fixtures": "int8",
+    "is_home": "int8",          # share of home fixtures: float32 once a DGW splits home/away
+    "team_elo": "float32",
+    "opp_elo": "float32",
+    "opp_def_strength": "float32",
+    "team_xg": "float32",
+    "team_xga": "float32",
+    "team_cs_prob": "float32",
+    "position": "category",
+    "team_short": "category",
+    **{c: "float32" for c in _ROLLING_COLS},
+    # season context (features_with_fixture.add_season_context)
+    "prev_season_pts_avg": "float32",
+    "prev_season_mins_avg": "float32",
+    "has_prev_season": "int8",
+    "is_promoted": "int8",
+    "opp_is_promoted": "int8",
+}
+
+
+def _to_numeric(s: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(s):
+        return s
+    return pd.to_numeric(s.astype(str).str.replace("%", "", regex=False), errors="coerce")
+
+
+def _fit_int(s: pd.Series, dtype: str) -> pd.Series:
+    """Cast to the declared int dtype, widening if values don't fit; float32 if NaN present."""
+    if s.isna().any():
+        return s.astype("float32")
+    if not np.all(np.isclose(s, np.round(s))):
+        return s.astype("float32")
+    for cand in (dtype, "int16", "int32", "int64"):
+        info = np.iinfo(cand)
+        if np.dtype(cand).itemsize < np.dtype(dtype).itemsize:
+            continue
+        if s.empty or (s.min() >= info.min and s.max() <= info.max):
+            return s.astype(cand)
+    return s.astype("int64")
+
+
+def apply_schema(df: pd.DataFrame, schema: dict = RAW_SCHEMA) -> pd.DataFrame:
+    """Downcast columns present in `schema`, in place. Unknown columns are left alone."""
+    for col, dtype in schema.items():
+        if col not in df.columns:
+            continue
+        s = df[col]
+        if dtype == "category":
+            if not isinstance(s.dtype, pd.CategoricalDtype):
+                df[col] = s.astype(str).where(s.notna()).astype("category")
+            continue
+        s = _to_numeric(s)
+        if dtype.startswith("int"):
+            df[col] = _fit_int(s, dtype)
+        else:
+            df[col] = s.astype(dtype)
+    return df
+
+
+def read_table(path: Path, schema: dict = RAW_SCHEMA, **read_kwargs) -> pd.DataFrame:
+    """
+    read_csv straight into the compact dtypes. Falls back to inference + apply_schema
+    when the file doesn't match (older CSVs with '%' strings, NaN in int columns).
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = {c: t for c, t in schema.items() if c in header}
+    try:
+        df = pd.read_csv(path, dtype=dtypes, **read_kwargs)
+    except (ValueError, TypeError, OverflowError):
+        df = pd.read_csv(path, **read_kwargs)
+    return apply_schema(df, schema)
+
+
+def memory_mb(df: pd.DataFrame) -> float:
+    return float(df.memory_usage(deep=True).sum()) / 2**20
@@ -0,0 +1,189 @@
+# src/synthetic_data.py
+"""
+Generate a synthetic FPL-Elo-Insights-shaped data folder for offline benchmarks.
+
+Layout (same as the real data repo):
+    {root}/{season}/players.csv
+    {root}/{season}/teams.csv
+    {root}/{season}/By Gameweek/GW{n}/player_gameweek_stats.csv
+    {root}/{season}/By Gameweek/GW{n}/fixtures.csv
+
+The latest season also gets fixtures for one extra "upcoming" GW (no stats yet),
+so predict_next_gw has something to predict.
+
+Numbers are random but not meaningless: every player has a fixed quality and
+nailedness, points depend on minutes, quality and fixture Elo, so the models
+have some signal to fit.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+POSITIONS = ["Goalkeeper", "Defender", "Midfielder", "Forward"]
+POSITION_WEIGHTS = [0.1, 0.33, 0.4, 0.17]
+N_TEAMS = 20
+# bump when the generated data changes (2: now_cost in tenths); cached datasets are keyed by it
+GENERATOR_VERSION = 2
+
+
+def _season_name(start_year: int) -> str:
+    return f"{start_year}-{start_year + 1}"
+
+
+def _round_robin(n_teams: int, rng) -> list[list[tuple[int, int]]]:
+    """Circle-method schedule: list of rounds, each a list of (home_idx, away_idx)."""
+    teams = list(range(n_teams))
+    rounds = []
+    for r in range(n_teams - 1):
+        pairs = []
+        for i in range(n_teams // 2):
+            a, b = teams[i], teams[-1 - i]
+            pairs.append((a, b) if (r + i) % 2 == 0 else (b, a))
+        rounds.append(pairs)
+        teams = [teams[0]] + [teams[-1]] + teams[1:-1]
+    order = rng.permutation(len(rounds))
+    first_half = [rounds[i] for i in order]
+    second_half = [[(b, a) for a, b in rnd] for rnd in first_half]
+    return first_half + second_half
+
+
+def generate_dataset(
+    root: Path,
+    n_players: int = 600,
+    n_gameweeks: int = 38,
+    n_seasons: int = 1,
+    seed: int = 0,
+    first_season: int = 2020,
+    upcoming_gw: bool = True,
+) -> Path:
+    """Write a synthetic data folder under `root` and return `root`."""
+    rng = np.random.default_rng(seed)
+    root = Path(root)
+    schedule = _round_robin(N_TEAMS, rng)
+
+    # stable player identities across seasons (player_code), FPL ids reshuffle each season
+    pool_size = int(n_players * 1.3)
+    codes = rng.choice(np.arange(10_000, 10_000 + pool_size * 10), pool_size, replace=False)
+    quality = rng.gamma(2.0, 1.0, pool_size)
+    nailed = rng.beta(2.0, 1.5, pool_size)
+    pos_idx = rng.choice(len(POSITIONS), pool_size, p=POSITION_WEIGHTS)
+
+    # team codes look like the real ones (small ints, not 1..20)
+    all_team_codes = np.arange(1, 60)
+    team_elo_base = {}
+
+    for s in range(n_seasons):
+        season = _season_name(first_season + s)
+        season_dir = root / season
+        gw_root = season_dir / "By Gameweek"
+        gw_root.mkdir(parents=True, exist_ok=True)
+
+        # ~3 teams change per season (relegation / promotion)
+        if s == 0:
+            team_codes = rng.choice(all_team_codes, N_TEAMS, replace=False)
+        else:
+            keep = rng.choice(team_codes, N_TEAMS - 3, replace=False)
+            fresh = rng.choice(np.setdiff1d(all_team_codes, team_codes), 3, replace=False)
+            team_codes = np.concatenate([keep, fresh])
+        for code in team_codes:
+            team_elo_base.setdefault(int(code), float(rng.normal(1750, 120)))
+
+        pd.DataFrame({
+            "code": team_codes,
+            "id": np.arange(1, N_TEAMS + 1),
+            "name": [f"Team {c}" for c in team_codes],
+            "short_name": [f"T{c:02d}" for c in team_codes],
+            "strength_defence_home": rng.integers(1000, 1400, N_TEAMS),
+            "strength_defence_away": rng.integers(1000, 1400, N_TEAMS),
+            "elo": [round(team_elo_base[int(c)]) for c in team_codes],
+        }).to_csv(season_dir / "teams.csv", index=False)
+
+        members = rng.choice(pool_size, n_players, replace=False)
+        fpl_ids = np.arange(1, n_players + 1)
+        player_team = team_codes[rng.integers(0, N_TEAMS, n_players)]
+        pd.DataFrame({
+            "player_code": codes[members],
+            "player_id": fpl_ids,
+            "first_name": "Syn",
+            "second_name": [f"Player{c}" for c in codes[members]],
+            "web_name": [f"P{c}" for c in codes[members]],
+            "team_code": player_team,
+            "position": [POSITIONS[i] for i in pos_idx[members]],
+        }).to_csv(season_dir / "players.csv", index=False)
+
+        q = quality[members]
+        nail = nailed[members]
+        # now_cost in tenths of £m, as the FPL API reports it (55 = £5.5m)
+        price = np.round(40 + 12 * q + rng.normal(0, 3, n_players)).clip(39, 150).astype(int)
+        form = np.zeros(n_players)
+
+        is_last = s == n_seasons - 1
+        last_gw_dir = n_gameweeks + (1 if (is_last and upcoming_gw) else 0)
+        for gw in range(1, last_gw_dir + 1):
+            gw_dir = gw_root / f"GW{gw}"
+            gw_dir.mkdir(exist_ok=True)
+
+            pairs = schedule[(gw - 1) % len(schedule)]
+            home = team_codes[[a for a, _ in pairs]]
+            away = team_codes[[b for _, b in pairs]]
+            home_elo = np.array([team_elo_base[int(c)] for c in home]) + rng.normal(0, 15, len(pairs))
+            away_elo = np.array([team_elo_base[int(c)] for c in away]) + rng.normal(0, 15, len(pairs))
+            finished = gw <= n_gameweeks
+            home_goals = rng.poisson(np.exp(0.35 + (home_elo - away_elo) / 600))
+            away_goals = rng.poisson(np.exp(0.15 + (away_elo - home_elo) / 600))
+            pd.DataFrame({
+                "gameweek": gw,
+                "kickoff_time": f"{first_season + s}-08-01T15:00:00Z",
+                "home_team": home,
+                "home_team_elo": home_elo.round(1),
+                "home_score": np.where(finished, home_goals, np.nan),
+                "away_score": np.where(finished, away_goals, np.nan),
+                "away_team": away,
+                "away_team_elo": away_elo.round(1),
+                "finished": finished,
+                "match_id": [f"{season}-prem-{gw}-{i}" for i in range(len(pairs))],
+                "tournament": "premier-league",
+            }).to_csv(gw_dir / "fixtures.csv", index=False)
+
+            if not finished:
+                continue
+
+            # per-player match context
+            fixture_of = {int(c): i for i, c in enumerate(home)}
+            fixture_of.update({int(c): i for i, c in enumerate(away)})
+            fx_i = np.array([fixture_of[int(c)] for c in player_team])
+            at_home = np.isin(player_team, home)
+            conceded = np.where(at_home, away_goals[fx_i], home_goals[fx_i])
+            elo_edge = np.where(at_home, home_elo[fx_i] - away_elo[fx_i], away_elo[fx_i] - home_elo[fx_i])
+
+            plays = rng.random(n_players) < nail
+            minutes = np.where(plays, rng.choice([90, 90, 90, 75, 62, 30], n_players), 0)
+            minutes = np.where((~plays) & (rng.random(n_players) < 0.15), rng.integers(1, 30, n_players), minutes)
+            xg = np.where(minutes > 0, rng.gamma(0.5, 0.1 * q) * (1 + elo_edge / 800), 0).clip(0)
+            xa = np.where(minutes > 0, rng.gamma(0.5, 0.07 * q), 0)
+            goals = rng.poisson(xg)
+            assists = rng.poisson(xa)
+            cs = ((conceded == 0) & (minutes >= 60)).astype(int)
+            appearance = np.where(minutes >= 60, 2, np.where(minutes > 0, 1, 0))
+            points = appearance + 5 * goals + 3 * assists + 4 * cs * np.isin(pos_idx[members], [0, 1])
+            form = 0.75 * form + 0.25 * points
+
+            pd.DataFrame({
+                "id": fpl_ids,
+                "event_points": points,
+                "minutes": minutes,
+                "goals_scored": goals,
+                "assists": assists,
+                "clean_sheets": cs,
+                "goals_conceded": np.where(minutes > 0, conceded, 0),
+                "expected_goals": xg.round(2),
+                "expected_assists": xa.round(2),
+                "total_shots": rng.poisson(xg * 8),
+                "now_cost": price,
+                "selected_by_percent": [f"{v:.1f}%" for v in (q * 4 + rng.random(n_players)).clip(0, 70)],
+                "form": form.round(1),
+            }).to_csv(gw_dir / "player_gameweek_stats.csv", index=False)
+
+    return root
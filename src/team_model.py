@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Team-level goals model: expected goals for / against and clean-sheet chance
+per (season, gameweek, team), broadcast to every player of that team.
+
+One row per team per fixture (home and away), target = goals scored:
+
+  goals ~ Poisson(exp(b . [elo_diff, is_home, opp_def_strength]))
+
+xga of a team is the xg of its opponent's row of the same fixture, and the
+clean-sheet chance is P(0 goals) = exp(-xga). In a double gameweek the values
+are summed (expected goals / expected clean sheets over both fixtures); in a
+blank they're 0.
+
+No leakage: the fit is an expanding window. GW g of a season is predicted by a
+model trained only on finished fixtures of earlier GWs (and earlier seasons).
+Only ~20 teams are predicted per GW, and the model is refit only when new
+results have arrived.
+
+Output columns (TEAM_FEATURES): team_xg, team_xga, team_cs_prob
+
+  python src/team_model.py     # writes data_processed/team_model/team_gw_expectations.csv
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import PoissonRegressor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+THIS_FILE = Path(__file__).resolve()
+PROJECT_ROOT = THIS_FILE.parent.parent
+OUT_FILE = PROJECT_ROOT / "data_processed" / "team_model" / "team_gw_expectations.csv"
+
+TEAM_FEATURES = ["team_xg", "team_xga", "team_cs_prob"]
+DESIGN_COLS = ["elo_diff", "is_home", "opp_def_strength"]
+MIN_TRAIN_FIXTURES = 40     # team-fixture rows needed before the first fit
+POISSON_ALPHA = 1e-3
+
+
+def make_goals_model():
+    return make_pipeline(
+        SimpleImputer(strategy="median"),
+        StandardScaler(),
+        PoissonRegressor(alpha=POISSON_ALPHA, max_iter=300),
+    )
+
+
+def fixture_rows(fixtures_long: pd.DataFrame, opp_strength_lookup: pd.DataFrame) -> pd.DataFrame:
+    """
+    features_with_fixture.build_fixture_table() rows + the design columns.
+    goals_for is NaN for fixtures that haven't been played.
+    """
+    opp = opp_strength_lookup[["season", "team_code", "strength_defence_home", "strength_defence_away"]]
+    fx = fixtures_long.merge(
+        opp.rename(columns={"team_code": "opp_code"}), on=["season", "opp_code"], how="left"
+    )
+    fx["opp_def_strength"] = np.where(
+        fx["is_home"] == 1, fx["strength_defence_away"], fx["strength_defence_home"]
+    )
+    fx["elo_diff"] = fx["team_elo"] - fx["opp_elo"]
+    if "goals_for" not in fx.columns:
+        fx["goals_for"] = np.nan
+    return fx.drop(columns=["strength_defence_home", "strength_defence_away"])
+
+
+def predict_expanding(fx: pd.DataFrame) -> pd.Series:
+    """xg per team-fixture row, each GW predicted from strictly earlier results."""
+    keys = fx[["season", "gameweek"]].drop_duplicates().sort_values(["season", "gameweek"])
+    rank = pd.Series(np.arange(len(keys)), index=pd.MultiIndex.from_frame(keys))
+    fx_rank = rank.reindex(pd.MultiIndex.from_frame(fx[["season", "gameweek"]])).to_numpy()
+    finished = fx["goals_for"].notna().to_numpy()
+    X = fx[DESIGN_COLS].to_numpy(dtype=float)
+    y = fx["goals_for"].to_numpy(dtype=float)
+
+    xg = np.full(len(fx), np.nan)
+    model, n_fit = None, 0
+    for r in range(len(keys)):
+        train = finished & (fx_rank < r)
+        n_train = int(train.sum())
+        if n_train < MIN_TRAIN_FIXTURES:
+            continue
+        if n_train != n_fit:            # new results since the last fit
+            model = make_goals_model().fit(X[train], y[train])
+            n_fit = n_train
+        rows = fx_rank == r
+        xg[rows] = model.predict(X[rows])
+    return pd.Series(xg, index=fx.index)
+
+
+def team_gw_expectations(fixtures_long: pd.DataFrame, opp_strength_lookup: pd.DataFrame) -> pd.DataFrame:
+    """(season, gameweek, team_code) -> team_xg, team_xga, team_cs_prob."""
+    fx = fixture_rows(fixtures_long, opp_strength_lookup)
+    fx["xg"] = predict_expanding(fx)
+    return expectations_from_rows(fx)
+
+
+def expectations_from_rows(fx: pd.DataFrame) -> pd.DataFrame:
+    """fixture_rows() with an xg column -> per (season, gameweek, team_code) sums."""
+    # opponent's row of the same fixture: its xg is our xga
+    fx = fx.copy()
+    mirror = fx[["season", "gameweek", "team_code", "opp_code", "is_home", "xg"]].rename(columns={
+        "team_code": "opp_code", "opp_code": "team_code", "xg": "xga",
+    })
+    mirror["is_home"] = 1 - mirror["is_home"]
+    mirror = mirror.drop_duplicates(["season", "gameweek", "team_code", "opp_code", "is_home"])
+    fx = fx.merge(mirror, on=["season", "gameweek", "team_code", "opp_code", "is_home"], how="left")
+    fx["cs_prob"] = np.exp(-fx["xga"])
+
+    out = (
+        fx.groupby(["season", "gameweek", "team_code"], sort=False)[["xg", "xga", "cs_prob"]]
+        .sum(min_count=1)
+        .reset_index()
+        .rename(columns={"xg": "team_xg", "xga": "team_xga", "cs_prob": "team_cs_prob"})
+    )
+    return out
+
+
+def attach_team_expectations(df: pd.DataFrame, expectations: pd.DataFrame) -> pd.DataFrame:
+    """Broadcast the per-(team, GW) values to player rows; blank GWs (n_fixtures = 0) get 0."""
+    df = df.drop(columns=TEAM_FEATURES, errors="ignore").merge(
+        expectations.astype({"team_code": "int64"}),
+        on=["season", "gameweek", "team_code"],
+        how="left",
+    )
+    if "n_fixtures" in df.columns:
+        blank = df["n_fixtures"] == 0
+        df.loc[blank, TEAM_FEATURES] = 0.0
+    return df
+
+
+def main():
+    from features_with_fixture import build_fixture_table, build_opponent_strength_lookup
+
+    t0 = time.perf_counter()
+    fx = fixture_rows(build_fixture_table(), build_opponent_strength_lookup())
+    fx["xg"] = predict_expanding(fx)
+    exp = expectations_from_rows(fx)
+    print(f"{len(exp)} team-GW rows from {len(fx)} team-fixture rows in {time.perf_counter() - t0:.2f}s")
+
+    # calibration on played fixtures that got a prediction
+    played = fx[fx["goals_for"].notna() & fx["xg"].notna()]
+    if len(played):
+        mae = float(np.abs(played["goals_for"] - played["xg"]).mean())
+        base = float(np.abs(played["goals_for"] - played["goals_for"].mean()).mean())
+        cs_rate = float((played["goals_for"] == 0).mean())
+        print(f"Goals MAE {mae:.3f} (constant mean: {base:.3f}), "
+              f"mean xg {played['xg'].mean():.2f} vs goals {played['goals_for'].mean():.2f}, "
+              f"P(0 goals) observed {cs_rate:.2f} vs predicted {np.exp(-played['xg']).mean():.2f}")
+
+    OUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    exp.to_csv(OUT_FILE, index=False)
+    print(f"Wrote {OUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,19 @@
 from pathlib import Path
+import argparse
+import json
 import pandas as pd
 import numpy as np
 
 from sklearn.metrics import mean_absolute_error
 from sklearn.linear_model import Ridge
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.experimental import enable_hist_gradient_boosting  # noqa: F401
 from sklearn.ensemble import HistGradientBoostingRegressor
 
+from profiling import profile_stage
+from schema import FEATURE_SCHEMA, read_table
+from fast_forest import compile_model, validate
+from blend import MODEL_NAMES, blend_scores, learn_blend_weights, save_blend_weights
+
 
 # ============================================================
 # Config
@@ -25,6 +31,40 @@ TARGET_COL = "event_points"
 cutoff_gw = 29  # <-- set this manually (int). Example: 8, 9, etc.
 EVAL_GW = cutoff_gw + 1  # <-- set this manually (int). Example: 9, 10, etc.
 
+# Multi-season mode: train on every season in the table (prior seasons in full +
+# current season up to cutoff_gw) instead of the current season only.
+# Can also be switched on with `--all-seasons`.
+MULTI_SEASON = False
+
+# With several seasons the row count grows several-fold; each RF tree then sees a
+# bootstrap subsample of this fraction, which bounds per-tree memory and fit time.
+# (HGB bins features into histograms already and doesn't need this.)
+RF_MAX_SAMPLES_MULTI = 0.3
+
+# Written by tune_hyperparams.py; when present its RF/HGB params replace the defaults.
+TUNED_PARAMS_FILE = PROJECT_ROOT / "data_processed" / "tuning" / "best_params.json"
+USE_TUNED_PARAMS = True
+
+# Score the residual GW with the flattened tree ensemble (fast_forest.py) when the
+# best model is an RF / HGB; --check-fast also checks it against sklearn's predict.
+FAST_INFERENCE = False
+
+# Written by compact_models.py: depth / leaf limits that keep the models small
+# with (almost) no MAE cost. With COMPACT_MODELS the limits are applied and the
+# best tree model is kept per GW as a compacted flat model in MODELS_DIR.
+COMPACT_SETTINGS_FILE = PROJECT_ROOT / "data_processed" / "compaction" / "chosen_settings.json"
+COMPACT_MODELS = False
+MODELS_DIR = PROJECT_ROOT / "data_processed" / "models"
+
+# Blend weights (blend.py) are learned on this feature set's out-of-fold predictions
+# for the last BLEND_VAL_GWS GWs <= cutoff_gw (expanding window, one fold per GW)
+# and scored on the test split; it is the set predict_next_gw trains on.
+BLEND_FEATURE_SET = "extended_basic"
+BLEND_VAL_GWS = 3
+
+# Written by feature_selection.py; evaluated as an extra 'selected' feature set.
+SELECTED_FEATURES_FILE = PROJECT_ROOT / "data_processed" / "feature_selection" / "chosen_features.json"
+
 
 # ============================================================
 # Feature sets
@@ -47,6 +87,7 @@ FEATURES_BASELINE = [
 FEATURES_EXTENDED_BASIC = FEATURES_BASELINE + [
     "team_code",
     "opp_code",
+    "n_fixtures",
 ]
 
 FEATURES_EXTENDED_INTERACT = FEATURES_EXTENDED_BASIC + [
@@ -54,6 +95,34 @@ FEATURES_EXTENDED_INTERACT = FEATURES_EXTENDED_BASIC + [
     "form_x_home",
 ]
 
+# team-level expected goals for / against + clean-sheet chance (team_model.py)
+FEATURES_TEAM_MODEL = FEATURES_EXTENDED_BASIC + [
+    "team_xg",
+    "team_xga",
+    "team_cs_prob",
+]
+
+# only evaluated in multi-season mode (see features_with_fixture.SEASON_CONTEXT_FEATURES)
+FEATURES_SEASON_AWARE = FEATURES_EXTENDED_BASIC + [
+    "gameweek",
+    "prev_season_pts_avg",
+    "prev_season_mins_avg",
+    "has_prev_season",
+    "is_promoted",
+    "opp_is_promoted",
+]
+
+# every feature set main() can evaluate (and pick as best); tune_hyperparams /
+# compact_models offer the same names. "selected" is read from SELECTED_FEATURES_FILE.
+FEATURE_SETS = {
+    "baseline": FEATURES_BASELINE,
+    "extended_basic": FEATURES_EXTENDED_BASIC,
+    "extended_interact": FEATURES_EXTENDED_INTERACT,
+    "team_model": FEATURES_TEAM_MODEL,
+    "season_aware": FEATURES_SEASON_AWARE,
+}
+FEATURE_SET_NAMES = [*FEATURE_SETS, "selected"]
+
 
 # ============================================================
 # Helpers
@@ -62,10 +131,11 @@ FEATURES_EXTENDED_INTERACT = FEATURES_EXTENDED_BASIC + [
 def clean_snapshot_columns(df: pd.DataFrame):
     """
     Convert string-ish snapshot cols like 'selected_by_percent' ('12.3%')
-    into numeric. In-place.
+    into numeric. In-place. Columns already parsed at ingest (numeric dtype
+    via schema.read_table) are left untouched.
     """
     for col in ["selected_by_percent", "form", "now_cost"]:
-        if col in df.columns:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
             df[col] = (
                 df[col]
                 .astype(str)
@@ -98,16 +168,106 @@ def add_engineered_columns(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def make_train_test_split(df_season: pd.DataFrame, cutoff_gw: int):
+def load_tuned_params(feature_set: str):
+    """
+    {"rf": {...}, "hgb": {...}} that tune_hyperparams.py tuned on this feature set,
+    or {} if it hasn't been tuned (params don't carry over between feature sets).
+    """
+    if not USE_TUNED_PARAMS or not TUNED_PARAMS_FILE.is_file():
+        return {}
+    data = json.loads(TUNED_PARAMS_FILE.read_text())
+    if any("params" in rec for rec in data.values()):
+        # old layout, one record per model: keep the ones tuned on this set
+        return {name: rec["params"] for name, rec in data.items()
+                if "params" in rec and rec.get("feature_set") == feature_set}
+    return {name: rec.get("params", {}) for name, rec in data.get(feature_set, {}).items()}
+
+
+def load_compact_settings():
+    """
+    {"rf": {...}, "hgb": {...}} size limits from compact_models.py, or {} when off / not run.
+    """
+    if not COMPACT_MODELS or not COMPACT_SETTINGS_FILE.is_file():
+        return {}
+    data = json.loads(COMPACT_SETTINGS_FILE.read_text())
+    return {name: rec.get("params", {}) for name, rec in data.items()}
+
+
+def load_selected_features():
+    """
+    Feature list chosen by feature_selection.py, or [] if it hasn't been run.
+    """
+    if not SELECTED_FEATURES_FILE.is_file():
+        return []
+    return json.loads(SELECTED_FEATURES_FILE.read_text()).get("features", [])
+
+
+def feature_set_columns(name: str):
+    """Columns of a feature set in FEATURE_SET_NAMES."""
+    if name != "selected":
+        return FEATURE_SETS[name]
+    selected = load_selected_features()
+    if not selected:
+        raise RuntimeError(f"No selected features in {SELECTED_FEATURES_FILE}; run src/feature_selection.py first.")
+    return selected
+
+
+def make_train_test_split(df_season: pd.DataFrame, cutoff_gw: int, season_current=None):
     """
     - train = all rows with gameweek <= cutoff_gw
     - test  = all rows with gameweek >  cutoff_gw
+
+    If season_current is given (multi-season frame), earlier seasons go to
+    train in full and the cutoff applies to season_current only.
     """
-    df_train = df_season[df_season["gameweek"] <= cutoff_gw].copy()
-    df_test  = df_season[df_season["gameweek"] >  cutoff_gw].copy()
+    if season_current is None:
+        df_train = df_season[df_season["gameweek"] <= cutoff_gw].copy()
+        df_test  = df_season[df_season["gameweek"] >  cutoff_gw].copy()
+        return df_train, df_test
+
+    is_current = df_season["season"] == season_current
+    df_train = df_season[~is_current | (df_season["gameweek"] <= cutoff_gw)].copy()
+    df_test  = df_season[is_current & (df_season["gameweek"] > cutoff_gw)].copy()
     return df_train, df_test
 
 
+def model_params(feature_set_name: str, rf_max_samples=None):
+    """
+    Constructor params of the three models for this feature set: defaults, then
+    the params tuned on that set, then the compaction limits.
+    rf_max_samples: per-tree bootstrap fraction for the RF (None = full sample).
+    """
+    tuned = load_tuned_params(feature_set_name)
+    compact = load_compact_settings()
+    rf_params = {"n_estimators": 300, **tuned.get("rf", {}), **compact.get("rf", {})}
+    if rf_max_samples is not None:
+        rf_params["max_samples"] = rf_max_samples
+    hgb_params = {
+        "learning_rate": 0.05, "max_depth": 6, "max_iter": 500,
+        **tuned.get("hgb", {}), **compact.get("hgb", {}),
+    }
+    return {"Ridge": {"alpha": 1.0}, "RandomForest": rf_params, "HistGBDT": hgb_params}
+
+
+def make_models(params):
+    """{model name: unfitted model} from model_params(); predict_next_gw's blend uses it too."""
+    return {
+        "Ridge": Ridge(**params["Ridge"], random_state=42),
+        "RandomForest": RandomForestRegressor(**params["RandomForest"], random_state=42, n_jobs=-1),
+        "HistGBDT": HistGradientBoostingRegressor(**params["HistGBDT"], random_state=42),
+    }
+
+
+def validation_gws(df: pd.DataFrame, season_current: str, n: int):
+    """
+    The last n GWs of season_current that are <= cutoff_gw. Tuning / selection /
+    compaction validate on these so the test split (gameweek > cutoff_gw) stays
+    unseen until train_with_fixture scores it.
+    """
+    gw = df.loc[df["season"].astype(str) == season_current, "gameweek"]
+    return [int(g) for g in sorted(gw[gw <= cutoff_gw].unique())[-n:]]
+
+
 def build_xy(df_subset: pd.DataFrame, feature_cols):
     """
     Build train/test matrices for a given feature set.
@@ -132,7 +292,8 @@ def train_and_eval_model(
     """
     Fit model, compute train/test MAE, return dict of scores plus fitted model.
     """
-    model.fit(X_train, y_train)
+    with profile_stage(f"{model_name}.fit[{feature_set_name}]", rows=len(X_train)):
+        model.fit(X_train, y_train)
 
     y_pred_train = model.predict(X_train)
     y_pred_test  = model.predict(X_test)
@@ -147,6 +308,7 @@ def train_and_eval_model(
         "train_mae": mae_train,
         "test_mae": mae_test,
         "fitted_model": model,
+        "y_pred_test": y_pred_test,
     }
 
 
@@ -212,10 +374,12 @@ def run_feature_set(
     df_test,
     feature_cols,
     feature_set_name: str,
+    rf_max_samples=None,
 ):
     """
     Train & evaluate Ridge / RF / HGBDT on this feature set.
     Return list of result dicts (with fitted_model + aligned data).
+    rf_max_samples: per-tree bootstrap fraction for the RF (None = full sample).
     """
     X_train, y_train, df_train_used = build_xy(df_train, feature_cols)
     X_test,  y_test,  df_test_used  = build_xy(df_test,  feature_cols)
@@ -223,58 +387,103 @@ def run_feature_set(
     if len(X_train) == 0 or len(X_test) == 0:
         return []
 
-    # Ridge
-    ridge_model = Ridge(alpha=1.0, random_state=42)
-    ridge_scores = train_and_eval_model(
-        ridge_model,
-        X_train, y_train, X_test, y_test,
-        model_name="Ridge",
-        feature_set_name=feature_set_name,
-    )
+    params = model_params(feature_set_name, rf_max_samples)
+    models = make_models(params)
 
-    # Random Forest
-    rf_model = RandomForestRegressor(
-        n_estimators=300,
-        random_state=42,
-        n_jobs=-1,
-    )
-    rf_scores = train_and_eval_model(
-        rf_model,
-        X_train, y_train, X_test, y_test,
-        model_name="RandomForest",
-        feature_set_name=feature_set_name,
-    )
-
-    # HistGradientBoosting
-    hgb_model = HistGradientBoostingRegressor(
-        learning_rate=0.05,
-        max_depth=6,
-        max_iter=500,
-        random_state=42,
-    )
-    hgb_scores = train_and_eval_model(
-        hgb_model,
-        X_train, y_train, X_test, y_test,
-        model_name="HistGBDT",
-        feature_set_name=feature_set_name,
-    )
+    ridge_scores, rf_scores, hgb_scores = [
+        train_and_eval_model(
+            models[name],
+            X_train, y_train, X_test, y_test,
+            model_name=name,
+            feature_set_name=feature_set_name,
+        )
+        for name in MODEL_NAMES
+    ]
 
     # attach context we’ll need downstream
     for scores in [ridge_scores, rf_scores, hgb_scores]:
         scores["df_train_used"] = df_train_used
         scores["df_test_used"]  = df_test_used
         scores["feature_cols"]  = feature_cols
+        scores["model_params"]  = params
 
     return [ridge_scores, rf_scores, hgb_scores]
 
 
+def blend_oof_predictions(df_train_used, feature_cols, params, season_current: str):
+    """
+    Out-of-fold predictions of the three models for the last BLEND_VAL_GWS GWs
+    <= cutoff_gw: for each GW g the models are refit on the rows before g.
+    Returns (rows with one prediction column per model, the GWs used).
+    """
+    val_gws = validation_gws(df_train_used, season_current, BLEND_VAL_GWS)
+    is_current = df_train_used["season"].astype(str) == season_current
+    gw = df_train_used["gameweek"]
+    parts = []
+    for g in val_gws:
+        df_fit = df_train_used[~is_current | (gw < g)]
+        df_val = df_train_used[is_current & (gw == g)]
+        if df_fit.empty or df_val.empty:
+            continue
+        models = make_models(params)
+        preds = {}
+        for name in MODEL_NAMES:
+            with profile_stage(f"blend.{name}.fit[GW{g}]", rows=len(df_fit)):
+                models[name].fit(df_fit[feature_cols], df_fit[TARGET_COL])
+            preds[name] = models[name].predict(df_val[feature_cols])
+        parts.append(df_val[[PLAYER_ID_COL, "gameweek", TARGET_COL]].assign(**preds))
+    if not parts:
+        return pd.DataFrame(), []
+    return pd.concat(parts, ignore_index=True), val_gws
+
+
+def fit_blend(all_results, feature_set_name: str, season_current: str):
+    """
+    Learn per-position blend weights on out-of-fold predictions for GWs <= cutoff_gw
+    and save them; then score the blend on the test split, which the weights never saw.
+    """
+    recs = {r["model"]: r for r in all_results if r["feature_set"] == feature_set_name}
+    if not all(m in recs for m in MODEL_NAMES):
+        print(f"\nNo blend: feature set '{feature_set_name}' wasn't trained with all models.")
+        return
+    rec = recs[MODEL_NAMES[0]]
+    oof, val_gws = blend_oof_predictions(
+        rec["df_train_used"], rec["feature_cols"], rec["model_params"], season_current
+    )
+    if oof.empty:
+        print(f"\nNo blend: no gameweeks <= {cutoff_gw} to learn the weights on.")
+        return
+    positions = attach_player_print_info(oof[[PLAYER_ID_COL]], season_current)["position"]
+    weights, summary = learn_blend_weights(oof, oof[TARGET_COL], positions)
+    save_blend_weights(weights, feature_set_name, rec["feature_cols"], val_gws, rec["model_params"])
+    print(f"\n=== Blend on '{feature_set_name}': weights fit on out-of-fold GWs {val_gws} ===")
+    print(summary.round(4).to_string(index=False))
+
+    df_test_used = rec["df_test_used"]
+    preds = pd.DataFrame({m: recs[m]["y_pred_test"] for m in MODEL_NAMES})
+    test_positions = attach_player_print_info(df_test_used[[PLAYER_ID_COL]], season_current)["position"]
+    scores = blend_scores(preds, df_test_used[TARGET_COL], test_positions, weights)
+    print(f"\n=== Blend on '{feature_set_name}': test MAE (GWs > {cutoff_gw}, unseen by the weights) ===")
+    print(scores.round(4).to_string(index=False))
+
+
 # ============================================================
 # main
 # ============================================================
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark models on the fixture training table")
+    parser.add_argument("--all-seasons", action="store_true", default=MULTI_SEASON,
+                        help="train on all seasons (season-aware features), test on current season")
+    parser.add_argument("--check-fast", action="store_true",
+                        help="with FAST_INFERENCE: check the flattened model against sklearn's predict")
+    args = parser.parse_args(argv)
+    multi_season = args.all_seasons
+
     # Load processed table (already merged with fixture info)
-    df = pd.read_csv(DATA_FILE)
+    with profile_stage("load_training_table") as rec:
+        df = read_table(DATA_FILE, FEATURE_SCHEMA)
+        rec["rows"] = len(df)
     print(f"Loaded {DATA_FILE.name} with shape: {df.shape}")
     print("Columns:", list(df.columns))
 
@@ -283,15 +492,18 @@ def main():
     df = add_engineered_columns(df)
 
     df["gameweek"] = pd.to_numeric(df["gameweek"], errors="coerce")
-    df["season"]   = df["season"].astype(str)
 
-    # Focus on last season in data
-    seasons = sorted(df["season"].unique())
+    # Focus on last season in data (or keep everything in multi-season mode)
+    seasons = sorted(df["season"].astype(str).unique())
     season_current = seasons[-1]
-    df_season = df[df["season"] == season_current].copy()
+    if multi_season:
+        df_season = df.copy()
+        print(f"\nMulti-season mode: {len(seasons)} seasons, {len(df_season)} rows")
+    else:
+        df_season = df[df["season"] == season_current].copy()
 
     # Check available GWs
-    gws = sorted(df_season["gameweek"].dropna().unique())
+    gws = sorted(df_season.loc[df_season["season"] == season_current, "gameweek"].dropna().unique())
     print("\nGameweeks in this season:", gws)
 
     # Train/test split cutoff.
@@ -300,7 +512,9 @@ def main():
     print("    train = gameweek <= ", cutoff_gw)
     print("    test  = gameweek >  ", cutoff_gw)
 
-    df_train, df_test = make_train_test_split(df_season, cutoff_gw)
+    df_train, df_test = make_train_test_split(
+        df_season, cutoff_gw, season_current if multi_season else None
+    )
 
     # Which feature sets do we evaluate?
     feature_sets = {
@@ -308,6 +522,23 @@ def main():
         "extended_basic": FEATURES_EXTENDED_BASIC,
         "extended_interact": FEATURES_EXTENDED_INTERACT,
     }
+    if all(c in df.columns for c in FEATURES_TEAM_MODEL):
+        feature_sets["team_model"] = FEATURES_TEAM_MODEL
+    if multi_season and all(c in df.columns for c in FEATURES_SEASON_AWARE):
+        feature_sets["season_aware"] = FEATURES_SEASON_AWARE
+    selected = load_selected_features()
+    if selected and all(c in df.columns for c in selected):
+        feature_sets["selected"] = selected
+
+    for fs_name in feature_sets:
+        tuned = load_tuned_params(fs_name)
+        if tuned:
+            print(f"\nUsing tuned hyperparameters from {TUNED_PARAMS_FILE.name} for '{fs_name}':")
+            for name, params in tuned.items():
+                print(f"  {name}: {params}")
+    compact = load_compact_settings()
+    if compact:
+        print(f"\nUsing size limits from {COMPACT_SETTINGS_FILE.name}: {compact}")
 
     print("\nFeature sets to evaluate:")
     for name, cols in feature_sets.items():
@@ -319,7 +550,10 @@ def main():
     all_results = []
     for fs_name, fs_cols in feature_sets.items():
         all_results.extend(
-            run_feature_set(df_train, df_test, fs_cols, fs_name)
+            run_feature_set(
+                df_train, df_test, fs_cols, fs_name,
+                rf_max_samples=RF_MAX_SAMPLES_MULTI if multi_season else None,
+            )
         )
 
     if not all_results:
@@ -345,6 +579,8 @@ def main():
         ]
     )
 
+    fit_blend(all_results, BLEND_FEATURE_SET, season_current)
+
     # Pick best combo (lowest test_mae)
     best_idx = results_table["test_mae"].idxmin()
     best_row_summary = results_table.loc[best_idx]
@@ -390,9 +626,23 @@ def main():
         print("Falling back to all test gameweeks in residual output.\n")
 
     # Predict on just those rows
-    df_eval["predicted_points"] = best_model.predict(df_eval[best_feature_cols])
+    if FAST_INFERENCE and best_model_name in ("RandomForest", "HistGBDT"):
+        flat = compile_model(best_model)
+        if args.check_fast:
+            check = validate(best_model, flat, df_eval[best_feature_cols])
+            print(f"\nFlattened {best_model_name}: exact match={check['exact']}, "
+                  f"sklearn {check['sklearn_s'] * 1e3:.1f} ms vs flat {check['flat_s'] * 1e3:.1f} ms")
+        df_eval["predicted_points"] = flat.predict(df_eval[best_feature_cols])
+    else:
+        df_eval["predicted_points"] = best_model.predict(df_eval[best_feature_cols])
     df_eval["actual_points"] = df_eval[TARGET_COL]
 
+    if COMPACT_MODELS and best_model_name in ("RandomForest", "HistGBDT"):
+        MODELS_DIR.mkdir(parents=True, exist_ok=True)
+        model_file = MODELS_DIR / f"gw{EVAL_GW}_{best_model_name}_{best_feature_set}.npz"
+        compile_model(best_model).compact().save(model_file)
+        print(f"Saved compacted model ({model_file.stat().st_size / 2**20:.1f} MB) to {model_file}")
+
     # Human friendly columns
     df_named = attach_player_print_info(df_eval, season_current)
 
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Successive-halving hyperparameter search for the RF / HistGBDT models used in
+train_with_fixture.run_feature_set().
+
+- Folds are time-ordered: for each of the last N GWs g up to
+  train_with_fixture.cutoff_gw, train = everything before g, validate = g. No
+  future data leaks into a fold, and the test split (GWs after cutoff_gw) is
+  never used for tuning.
+- The preprocessed fold matrices (float32 X, y, fold indices) are cached in
+  data_processed/cache/ keyed by a hash of the training table + feature list +
+  fold config, so repeated searches skip the CSV load / cleaning entirely.
+- HalvingRandomSearchCV starts many candidates on a small budget (few trees /
+  boosting iterations), keeps the best third each round and parallelizes
+  candidates across cores.
+
+Output:
+  data_processed/tuning/best_params.json        per feature set; train_with_fixture
+                                                applies them to that set only
+  data_processed/tuning/cv_results_{model}.csv
+
+Usage:
+  python src/tune_hyperparams.py                       # both models, extended_basic
+  python src/tune_hyperparams.py --model hgb --folds 6 --candidates 60
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.stats import loguniform
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+
+import train_with_fixture as twf
+from schema import FEATURE_SCHEMA, read_table
+
+THIS_FILE = Path(__file__).resolve()
+PROJECT_ROOT = THIS_FILE.parent.parent
+CACHE_DIR = PROJECT_ROOT / "data_processed" / "cache"
+TUNING_DIR = PROJECT_ROOT / "data_processed" / "tuning"
+BEST_PARAMS_FILE = TUNING_DIR / "best_params.json"
+
+# resource = the knob successive halving grows between rounds
+SEARCH_SPACES = {
+    "rf": {
+        "estimator": lambda: RandomForestRegressor(random_state=42, n_jobs=1),
+        "resource": "n_estimators",
+        "min_resources": 25,
+        "max_resources": 300,
+        "params": {
+            "max_depth": [None, 8, 12, 16, 24],
+            "min_samples_leaf": [1, 2, 5, 10, 20],
+            "max_features": [1.0, 0.7, 0.5, "sqrt"],
+            "max_samples": [None, 0.5, 0.8],
+        },
+    },
+    "hgb": {
+        "estimator": lambda: HistGradientBoostingRegressor(random_state=42),
+        "resource": "max_iter",
+        "min_resources": 50,
+        "max_resources": 600,
+        "params": {
+            "learning_rate": loguniform(0.01, 0.2),
+            "max_depth": [None, 3, 4, 6, 8],
+            "max_leaf_nodes": [15, 31, 63],
+            "min_samples_leaf": [10, 20, 50, 100],
+            "l2_regularization": loguniform(1e-4, 1.0),
+        },
+    },
+}
+
+
+############################
+# Folds (cached)
+############################
+
+def _fold_cache_key(feature_cols, n_folds: int, multi_season: bool) -> str:
+    h = hashlib.sha1()
+    with twf.DATA_FILE.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    h.update(json.dumps([feature_cols, n_folds, multi_season, twf.cutoff_gw]).encode())
+    return h.hexdigest()[:16]
+
+
+def build_time_folds(df: pd.DataFrame, season_current: str, n_folds: int):
+    """One fold per trailing GW <= cutoff_gw of the current season: train on everything earlier."""
+    is_current = (df["season"].astype(str) == season_current).to_numpy()
+    gw = df["gameweek"].to_numpy()
+    eval_gws = twf.validation_gws(df, season_current, n_folds)
+    folds = []
+    for g in eval_gws:
+        train_idx = np.flatnonzero(~is_current | (gw < g))
+        test_idx = np.flatnonzero(is_current & (gw == g))
+        if len(train_idx) and len(test_idx):
+            folds.append((train_idx, test_idx))
+    return folds, eval_gws
+
+
+def load_fold_matrices(feature_cols, n_folds: int, multi_season: bool, refresh: bool = False):
+    """Return X (float32), y, folds; from cache when the training table is unchanged."""
+    key = _fold_cache_key(feature_cols, n_folds, multi_season)
+    cache_file = CACHE_DIR / f"tune_folds_{key}.npz"
+    if cache_file.is_file() and not refresh:
+        z = np.load(cache_file)
+        folds = [(z[f"train_{i}"], z[f"test_{i}"]) for i in range(int(z["n_folds"]))]
+        print(f"Loaded cached fold matrices {cache_file.name} ({z['X'].shape[0]} rows)")
+        return z["X"], z["y"], folds
+
+    df = read_table(twf.DATA_FILE, FEATURE_SCHEMA)
+    df = twf.add_engineered_columns(twf.clean_snapshot_columns(df))
+    season_current = sorted(df["season"].astype(str).unique())[-1]
+    if not multi_season:
+        df = df[df["season"].astype(str) == season_current]
+    df = df.dropna(subset=feature_cols + [twf.TARGET_COL]).reset_index(drop=True)
+
+    X = df[feature_cols].to_numpy(dtype=np.float32)
+    y = df[twf.TARGET_COL].to_numpy(dtype=np.float32)
+    folds, eval_gws = build_time_folds(df, season_current, n_folds)
+    if not folds:
+        raise RuntimeError("Not enough gameweeks in the training table to build time folds.")
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    arrays = {"X": X, "y": y, "n_folds": np.array(len(folds))}
+    for i, (tr, te) in enumerate(folds):
+        arrays[f"train_{i}"] = tr
+        arrays[f"test_{i}"] = te
+    np.savez(cache_file, **arrays)
+    print(f"Built {len(folds)} time folds (validation GWs {eval_gws}); cached to {cache_file.name}")
+    return X, y, folds
+
+
+############################
+# Search
+############################
+
+def tune_model(name: str, X, y, folds, n_candidates: int, factor: int, n_jobs: int, seed: int):
+    space = SEARCH_SPACES[name]
+    search = HalvingRandomSearchCV(
+        space["estimator"](),
+        space["params"],
+        n_candidates=n_candidates,
+        factor=factor,
+        resource=space["resource"],
+        min_resources=space["min_resources"],
+        max_resources=space["max_resources"],
+        cv=folds,
+        scoring="neg_mean_absolute_error",
+        refit=False,
+        n_jobs=n_jobs,
+        random_state=seed,
+        verbose=0,
+    )
+    t0 = time.perf_counter()
+    search.fit(X, y)
+    elapsed = time.perf_counter() - t0
+
+    best = {
+        k: (v.item() if hasattr(v, "item") else v)
+        for k, v in search.best_params_.items()
+    }
+    cv_mae = float(-search.best_score_)
+    print(f"[{name}] best CV MAE {cv_mae:.4f} in {elapsed:.1f}s "
+          f"({len(search.cv_results_['params'])} fits over {search.n_iterations_} rounds)")
+    print(f"[{name}] {best}")
+
+    TUNING_DIR.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(search.cv_results_).drop(columns=["params"]).to_csv(
+        TUNING_DIR / f"cv_results_{name}.csv", index=False
+    )
+    return {"params": best, "cv_mae": cv_mae, "seconds": round(elapsed, 1)}
+
+
+def save_best_params(results: dict, feature_set: str):
+    """best_params.json: {feature_set: {model: {params, cv_mae, ...}}}."""
+    existing = {}
+    if BEST_PARAMS_FILE.is_file():
+        existing = json.loads(BEST_PARAMS_FILE.read_text())
+        if any("params" in rec for rec in existing.values()):   # old per-model layout
+            old, existing = existing, {}
+            for name, rec in old.items():
+                existing.setdefault(rec.get("feature_set", "extended_basic"), {})[name] = rec
+    per_set = existing.setdefault(feature_set, {})
+    for name, res in results.items():
+        per_set[name] = {**res, "cutoff_gw": twf.cutoff_gw, "tuned_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    BEST_PARAMS_FILE.write_text(json.dumps(existing, indent=2))
+    print(f"Wrote {BEST_PARAMS_FILE.relative_to(PROJECT_ROOT)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Successive-halving search for RF / HGB")
+    parser.add_argument("--model", choices=["rf", "hgb", "both"], default="both")
+    parser.add_argument("--feature-set", choices=twf.FEATURE_SET_NAMES, default="extended_basic")
+    parser.add_argument("--folds", type=int, default=4, help="number of GWs up to cutoff_gw used as folds")
+    parser.add_argument("--candidates", type=int, default=40, help="initial random candidates")
+    parser.add_argument("--factor", type=int, default=3, help="keep 1/factor candidates per round")
+    parser.add_argument("--all-seasons", action="store_true", help="include earlier seasons in training folds")
+    parser.add_argument("--jobs", type=int, default=-1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--refresh-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    feature_cols = twf.feature_set_columns(args.feature_set)
+    X, y, folds = load_fold_matrices(feature_cols, args.folds, args.all_seasons, args.refresh_cache)
+
+    models = ["rf", "hgb"] if args.model == "both" else [args.model]
+    results = {
+        m: tune_model(m, X, y, folds, args.candidates, args.factor, args.jobs, args.seed)
+        for m in models
+    }
+    save_best_params(results, args.feature_set)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
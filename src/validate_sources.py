@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Header / dtype checks for the upstream FPL-Elo-Insights CSVs.
+
+Every source file is checked against SOURCE_SCHEMAS by reading only its header
+and the first SAMPLE_ROWS rows (as strings):
+  missing      required columns that aren't there (the loaders skip the file)
+  unexpected   columns the schema doesn't know (new upstream columns / renames)
+  bad_dtypes   sampled values that don't parse as the declared kind
+
+Results are cached per file fingerprint (size + mtime) and schema version in
+data_processed/cache/source_validation.json, so a rerun only opens new or
+changed files. One drift summary per source kind is printed at the end.
+
+The loaders use require_columns() / warn_source() so a file they can't use
+raises a SourceSchemaWarning instead of being skipped silently.
+
+  python src/validate_sources.py            # exit code 1 if a required column is missing
+  python src/validate_sources.py --strict   # ... or a sampled dtype is off
+"""
+
+from __future__ import annotations
+from collections import Counter
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import time
+import warnings
+
+import pandas as pd
+
+THIS_FILE = Path(__file__).resolve()
+PROJECT_ROOT = THIS_FILE.parent.parent
+DATA_REPO_ROOT = Path("/home/mann-gandhi/FPL-Elo-Insights-data/data")
+CACHE_FILE = PROJECT_ROOT / "data_processed" / "cache" / "source_validation.json"
+
+SCHEMA_VERSION = 1
+SAMPLE_ROWS = 200
+MAX_BAD_FRACTION = 0.05   # sampled non-empty values allowed to fail the dtype check
+
+# kind of each column: int / num / pct ('12.3%') / bool / str
+SOURCE_SCHEMAS = {
+    "players": {
+        "file": "players.csv",
+        "required": {"player_id": "int", "team_code": "int", "web_name": "str", "position": "str"},
+        "optional": {"player_code": "int", "first_name": "str", "second_name": "str"},
+    },
+    "teams": {
+        "file": "teams.csv",
+        "required": {
+            "code": "int", "short_name": "str",
+            "strength_defence_home": "num", "strength_defence_away": "num",
+        },
+        "optional": {"id": "int", "name": "str", "elo": "num"},
+    },
+    "fixtures": {
+        "file": "fixtures.csv",
+        "required": {
+            "home_team": "int", "away_team": "int",
+            "home_team_elo": "num", "away_team_elo": "num",
+        },
+        "optional": {
+            "gameweek": "int", "kickoff_time": "str", "home_score": "num", "away_score": "num",
+            "finished": "bool", "match_id": "str", "tournament": "str",
+        },
+        # needed to tell Premier League fixtures from cup games
+        "one_of": ["tournament", "match_id"],
+    },
+    "player_gameweek_stats": {
+        "file": "player_gameweek_stats.csv",
+        "required": {"id": "int", "event_points": "int", "minutes": "int"},
+        "optional": {
+            "goals_scored": "int", "assists": "int", "clean_sheets": "int", "goals_conceded": "int",
+            "saves": "int", "bonus": "int", "bps": "int", "total_shots": "int",
+            "expected_goals": "num", "expected_assists": "num",
+            "expected_goal_involvements": "num", "expected_goals_conceded": "num",
+            "now_cost": "num", "selected_by_percent": "pct", "form": "num",
+        },
+    },
+}
+
+
+class SourceSchemaWarning(UserWarning):
+    """An upstream file can't be used as-is (missing columns, fallback parsing)."""
+
+
+def warn_source(path: Path, message: str):
+    warnings.warn(f"{path}: {message}", SourceSchemaWarning, stacklevel=3)
+
+
+def require_columns(columns, required, path: Path) -> bool:
+    """True if all required columns are present; otherwise warn (the caller skips the file)."""
+    missing = [c for c in required if c not in columns]
+    if missing:
+        warn_source(path, f"missing columns {missing}, file skipped")
+        return False
+    return True
+
+
+############################
+# Checks
+############################
+
+def schema_hash() -> str:
+    payload = json.dumps({"v": SCHEMA_VERSION, "s": SOURCE_SCHEMAS, "n": SAMPLE_ROWS}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+
+def fingerprint(path: Path) -> str:
+    st = path.stat()
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def iter_source_files(root: Path = DATA_REPO_ROOT):
+    """(kind, path) for every source file, in season / gameweek order."""
+    for season_dir in sorted(p for p in root.iterdir() if p.is_dir()):
+        for kind in ("players", "teams"):
+            path = season_dir / SOURCE_SCHEMAS[kind]["file"]
+            if path.is_file():
+                yield kind, path
+        by_gw_dir = season_dir / "By Gameweek"
+        if not by_gw_dir.is_dir():
+            continue
+        gw_dirs = [p for p in by_gw_dir.iterdir() if p.is_dir() and p.name[2:].isdigit()]
+        for gw_dir in sorted(gw_dirs, key=lambda p: int(p.name[2:])):
+            for kind in ("fixtures", "player_gameweek_stats"):
+                path = gw_dir / SOURCE_SCHEMAS[kind]["file"]
+                if path.is_file():
+                    yield kind, path
+
+
+def _bad_fraction(values: pd.Series, kind: str) -> float:
+    values = values.dropna()
+    values = values[values.str.strip() != ""]
+    if values.empty or kind == "str":
+        return 0.0
+    if kind == "bool":
+        ok = values.str.lower().isin(["true", "false", "1", "0"])
+    else:
+        if kind == "pct":
+            values = values.str.rstrip("%")
+        num = pd.to_numeric(values, errors="coerce")
+        ok = num.notna()
+        if kind == "int":
+            ok &= (num.round() == num) | num.isna()
+    return float(1 - ok.mean())
+
+
+def check_file(path: Path, kind: str) -> dict:
+    spec = SOURCE_SCHEMAS[kind]
+    sample = pd.read_csv(path, nrows=SAMPLE_ROWS, dtype=str, keep_default_na=True)
+    cols = list(sample.columns)
+    known = {**spec["required"], **spec.get("optional", {})}
+
+    missing = [c for c in spec["required"] if c not in cols]
+    one_of = spec.get("one_of")
+    if one_of and not any(c in cols for c in one_of):
+        missing.append(" | ".join(one_of))
+
+    bad = {}
+    for col, col_kind in known.items():
+        if col in cols:
+            frac = _bad_fraction(sample[col], col_kind)
+            if frac > MAX_BAD_FRACTION:
+                bad[col] = round(frac, 3)
+
+    return {
+        "kind": kind,
+        "header": cols,
+        "missing": missing,
+        "unexpected": [c for c in cols if c not in known],
+        "bad_dtypes": bad,
+    }
+
+
+def validate_sources(root: Path = DATA_REPO_ROOT, use_cache: bool = True) -> tuple[list[dict], dict]:
+    """Check every source file; unchanged files come from the fingerprint cache."""
+    key = schema_hash()
+    cache = {}
+    if use_cache and CACHE_FILE.is_file():
+        stored = json.loads(CACHE_FILE.read_text())
+        if stored.get("schema") == key:
+            cache = stored.get("files", {})
+
+    results, new_cache = [], {}
+    stats = {"files": 0, "checked": 0, "cached": 0}
+    for kind, path in iter_source_files(root):
+        rel = str(path.relative_to(root))
+        fp = fingerprint(path)
+        hit = cache.get(str(path))
+        if hit and hit["fingerprint"] == fp:
+            res = hit["result"]
+            stats["cached"] += 1
+        else:
+            res = check_file(path, kind)
+            stats["checked"] += 1
+        new_cache[str(path)] = {"fingerprint": fp, "result": res}
+        results.append({"path": rel, **res})
+        stats["files"] += 1
+
+    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    CACHE_FILE.write_text(json.dumps({"schema": key, "files": new_cache}))
+    return results, stats
+
+
+############################
+# Drift summary
+############################
+
+def summarize(results: list[dict]) -> pd.DataFrame:
+    """One row per source kind: files, header variants, failing files, new columns."""
+    rows = []
+    for kind in SOURCE_SCHEMAS:
+        res = [r for r in results if r["kind"] == kind]
+        if not res:
+            continue
+        unexpected = Counter(c for r in res for c in r["unexpected"])
+        rows.append({
+            "kind": kind,
+            "files": len(res),
+            "header_variants": len({tuple(r["header"]) for r in res}),
+            "missing_required": sum(bool(r["missing"]) for r in res),
+            "bad_dtypes": sum(bool(r["bad_dtypes"]) for r in res),
+            "unexpected_columns": ", ".join(f"{c} ({n})" for c, n in unexpected.most_common(5)),
+        })
+    return pd.DataFrame(rows)
+
+
+def print_problems(results: list[dict], limit: int = 10):
+    problems = [r for r in results if r["missing"] or r["bad_dtypes"]]
+    for r in problems[:limit]:
+        parts = []
+        if r["missing"]:
+            parts.append(f"missing {r['missing']}")
+        if r["bad_dtypes"]:
+            parts.append(f"bad dtypes {r['bad_dtypes']}")
+        print(f"  {r['path']}: {'; '.join(parts)}")
+    if len(problems) > limit:
+        print(f"  ... and {len(problems) - limit} more")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate upstream CSV headers / dtypes")
+    parser.add_argument("--root", type=Path, default=DATA_REPO_ROOT)
+    parser.add_argument("--no-cache", action="store_true", help="recheck every file")
+    parser.add_argument("--strict", action="store_true", help="fail on dtype drift too")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    results, stats = validate_sources(args.root, use_cache=not args.no_cache)
+    summary = summarize(results)
+
+    print(f"Validated {stats['files']} files ({stats['checked']} checked, {stats['cached']} cached) "
+          f"in {time.perf_counter() - t0:.2f}s, schema v{SCHEMA_VERSION}")
+    if not summary.empty:
+        print(summary.to_string(index=False))
+    print_problems(results)
+
+    failed = summary["missing_required"].sum() if not summary.empty else 0
+    if args.strict and not summary.empty:
+        failed += summary["bad_dtypes"].sum()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())